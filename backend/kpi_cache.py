@@ -0,0 +1,99 @@
+from collections import OrderedDict
+import os
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from models import EtlRun
+
+KPI_CACHE_TTL = float(os.getenv("KPI_CACHE_TTL", "3600"))           # seconds an entry stays valid
+KPI_CACHE_MAXSIZE = int(os.getenv("KPI_CACHE_MAXSIZE", "256"))       # entries kept (LRU); 0 disables the cache
+KPI_CACHE_VERSION_CHECK = float(os.getenv("KPI_CACHE_VERSION_CHECK", "30"))  # seconds between version checks
+
+_UNCHECKED = object()
+
+class KPICache:
+    """
+    In-process cache for dashboard KPI results.
+
+    Entries are keyed by endpoint plus normalized filter parameters, expire after `ttl` seconds
+    and are evicted least-recently-used beyond `maxsize`. The whole cache is dropped when the
+    latest published ETL run (etl_run) changes.
+    """
+    def __init__(self, ttl: float = KPI_CACHE_TTL, maxsize: int = KPI_CACHE_MAXSIZE,
+                 version_check: float = KPI_CACHE_VERSION_CHECK):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.version_check = version_check
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Any = _UNCHECKED
+        self._version_checked_at = 0.0
+
+    @staticmethod
+    def make_key(endpoint: str, **params) -> Hashable:
+        """
+        Build a cache key; None, empty strings and 'all' are the same (unfiltered) slice.
+        """
+        normalized = []
+        for name, value in sorted(params.items()):
+            if isinstance(value, str):
+                value = value.strip()
+            if value in (None, "", "all"):
+                value = None
+            normalized.append((name, value))
+        return (endpoint, tuple(normalized))
+
+    def _refresh_version(self, db: Session) -> None:
+        now = time.monotonic()
+        if self._version is not _UNCHECKED and now - self._version_checked_at < self.version_check:
+            return
+
+        try:
+            version = db.query(func.max(EtlRun.run_id)).filter(EtlRun.estado == "publicado").scalar()
+        except Exception as e:
+            # Warehouse without the run table yet: rely on the TTL alone
+            print(f"Warning: could not read warehouse version: {e}")
+            db.rollback()
+            version = None
+
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            self._version_checked_at = now
+
+    def get(self, db: Session, key: Hashable) -> Optional[Dict[str, Any]]:
+        if self.maxsize <= 0:
+            return None
+        self._refresh_version(db)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Dict[str, Any]) -> Dict[str, Any]:
+        if self.maxsize <= 0:
+            return value
+
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version = _UNCHECKED
+
+kpi_cache = KPICache()
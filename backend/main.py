@@ -25,8 +25,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+from query_budget import install_query_budget
 from routers import dashboard, predictions
 
+install_query_budget(app)
+
 print("Loading routers...")
 app.include_router(dashboard.router)
 app.include_router(predictions.router)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, DECIMAL
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Text, ForeignKey, DECIMAL
 from sqlalchemy.orm import relationship
 from database import Base
 
@@ -20,6 +20,13 @@ class FactProyecto(Base):
     empleados_asignados = Column(Integer)
     roi = Column(Float)
     tuct = Column(Float)
+
+    # Derived metrics materialized by the ETL
+    ev = Column(Float)
+    spi = Column(Float)
+    cpi = Column(Float)
+    delay_days = Column(Integer) # Days past fecha_fin_plan (0 if on time), NULL without both dates
+    on_time = Column(Integer)    # 1 if fecha_fin_real <= fecha_fin_plan, NULL without both dates
     
     fecha_inicio_plan = Column(Integer, ForeignKey("dim_tiempo.tiempo_id"))
     fecha_fin_plan = Column(Integer, ForeignKey("dim_tiempo.tiempo_id"))
@@ -78,3 +85,52 @@ class DimFaseSDLC(Base):
     __tablename__ = "dim_fase_sdlc"
     fase_sdlc_id = Column(Integer, primary_key=True)
     nombre_fase = Column(String(100))
+
+class AggKpi(Base):
+    """Additive KPI measures pre-aggregated by the ETL (tipo × estado × país × mes de inicio)."""
+    __tablename__ = "agg_kpi"
+    agg_id = Column(Integer, primary_key=True)
+    tipo_proyecto_id = Column(Integer, ForeignKey("dim_tipo_proyecto.tipo_proyecto_id"))
+    estado_id = Column(Integer, ForeignKey("dim_estado.estado_id"))
+    pais = Column(String(255))
+    mes_inicio = Column(Date)
+
+    n_proyectos = Column(Integer)
+    ganancia_proyecto = Column(DECIMAL(15, 2))
+    roi = Column(DECIMAL(15, 2))
+    monto_planificado = Column(DECIMAL(15, 2))
+    monto_real = Column(DECIMAL(15, 2))
+    ev = Column(Float)
+    tareas_planificadas = Column(Integer)
+    tareas_completadas = Column(Integer)
+    tareas_retrasadas = Column(Integer)
+    horas_planificadas = Column(DECIMAL(15, 2))
+    horas_trabajadas = Column(DECIMAL(15, 2))
+    empleados_asignados = Column(Integer)
+    proyectos_a_tiempo = Column(Integer)
+    dias_retraso = Column(Integer)
+
+class AggKpiDefecto(Base):
+    __tablename__ = "agg_kpi_defecto"
+    agg_id = Column(Integer, primary_key=True)
+    tipo_proyecto_id = Column(Integer, ForeignKey("dim_tipo_proyecto.tipo_proyecto_id"))
+    estado_id = Column(Integer, ForeignKey("dim_estado.estado_id"))
+    pais = Column(String(255))
+    mes_inicio = Column(Date)
+    severidad = Column(String(50))
+    fase_id = Column("fase_sdlc_id", Integer, ForeignKey("dim_fase_sdlc.fase_sdlc_id"))
+    n_defectos = Column(Integer)
+    con_tipo = Column(Integer) # defects with a known defect type
+
+class EtlRun(Base):
+    __tablename__ = "etl_run"
+    run_id = Column(Integer, primary_key=True) # One row per ETL run
+    inicio = Column(DateTime)
+    fin = Column(DateTime)
+    modo = Column(String(20))
+    estado = Column(String(20)) # 'publicado', 'sin_cambios', 'sin_publicar' or 'error'
+    duracion_s = Column(DECIMAL(12, 3))
+    filas_cargadas = Column(Integer)
+    filas_rechazadas = Column(Integer) # rows of loads that failed and were rolled back
+    pico_rss_mb = Column(DECIMAL(12, 1))
+    reporte = Column(Text) # JSON run report
@@ -0,0 +1,50 @@
+from contextvars import ContextVar
+import os
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from kpi_cache import kpi_cache
+
+# Max SQL statements a dashboard/prediction request may issue. 0 disables the guard (production).
+SQL_STATEMENT_BUDGET = int(os.getenv("SQL_STATEMENT_BUDGET", "0"))
+GUARDED_PREFIXES = ("/dashboard", "/predictions")
+
+_statement_counter: ContextVar = ContextVar("statement_counter", default=None)
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _statement_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+def install_query_budget(app: FastAPI, budget: int = SQL_STATEMENT_BUDGET):
+    """
+    Test-time guard: fail any guarded request that sends more than `budget` statements to the database.
+    Catches N+1 lazy loads and per-row queries before they reach the remote MySQL.
+    """
+    if budget <= 0:
+        return
+
+    # Listen on every Engine so sessions from overridden get_db dependencies are counted too
+    if not event.contains(Engine, "before_cursor_execute", _count_statement):
+        event.listen(Engine, "before_cursor_execute", _count_statement)
+
+    @app.middleware("http")
+    async def enforce_query_budget(request: Request, call_next):
+        if not request.url.path.startswith(GUARDED_PREFIXES):
+            return await call_next(request)
+
+        counter = [0]
+        token = _statement_counter.set(counter)
+        try:
+            response = await call_next(request)
+        finally:
+            _statement_counter.reset(token)
+
+        if counter[0] > budget:
+            detail = f"SQL statement budget exceeded: {counter[0]} statements (limit {budget}) for {request.url.path}"
+            print(f"ERROR: {detail}")
+            # The endpoint may already have cached its result; drop it so the repeat call is checked too
+            kpi_cache.clear()
+            return JSONResponse(status_code=500, content={"detail": detail})
+        return response
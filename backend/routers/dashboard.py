@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session, joinedload, aliased
-from sqlalchemy import func
+from sqlalchemy import func, case, and_
 from typing import List, Dict, Any
+import datetime
+import os
 from database import get_db
-from models import FactProyecto, DimEstado, DimTipoProyecto, DimCliente, FactDefecto, DimTipoDefecto, DimFaseSDLC, DimTiempo
+from kpi_cache import kpi_cache
+from models import FactProyecto, DimEstado, DimTipoProyecto, DimCliente, FactDefecto, DimTipoDefecto, DimFaseSDLC, DimTiempo, AggKpi, AggKpiDefecto
 import schemas
 
 router = APIRouter(
@@ -11,6 +14,265 @@ router = APIRouter(
     tags=["dashboard"]
 )
 
+CRITICAL_SEVERITIES = ['Critico', 'Alta']
+
+# 'sql' pushes the portfolio aggregation down to the database, 'agg' reads the ETL summary tables
+# (agg_kpi / agg_kpi_defecto) and 'python' keeps the row-by-row loop.
+# The summary tables are bucketed by start month: in 'agg' mode a start_date that is not the 1st
+# of a month is answered by the 'sql' path instead (see _agg_answerable).
+KPI_AGGREGATION = os.getenv("KPI_AGGREGATION", "sql")
+
+def _project_query(db: Session, *columns):
+    """
+    Query FactProyecto with the dimensions the dashboard reads (estado, tipo_proyecto, cliente)
+    loaded in the same statement, so iterating the rows never issues a lazy SELECT per project.
+    """
+    return db.query(FactProyecto, *columns).options(
+        joinedload(FactProyecto.estado),
+        joinedload(FactProyecto.tipo_proyecto),
+        joinedload(FactProyecto.cliente)
+    )
+
+def _apply_project_filters(query, start_date=None, project_type=None, status=None, country=None, estado_joined=False):
+    """
+    Apply the Slice & Dice filters to a query that selects from FactProyecto.
+    """
+    if start_date:
+        # Filter by start date (assuming fecha_inicio_real)
+        TiempoInicio = aliased(DimTiempo)
+        query = query.join(TiempoInicio, FactProyecto.fecha_inicio_real == TiempoInicio.tiempo_id)\
+                     .filter(TiempoInicio.fecha >= start_date)
+
+    if project_type and project_type != 'all':
+        query = query.join(DimTipoProyecto, FactProyecto.tipo_proyecto_id == DimTipoProyecto.tipo_proyecto_id)\
+                     .filter(DimTipoProyecto.nombre == project_type)
+
+    if status and status != 'all':
+        if not estado_joined:
+            query = query.join(DimEstado, FactProyecto.estado_id == DimEstado.estado_id)
+        query = query.filter(DimEstado.nombre_estado == status)
+
+    if country and country != 'all':
+        query = query.join(DimCliente, FactProyecto.cliente_id == DimCliente.cliente_id)\
+                     .filter(DimCliente.pais == country)
+
+    return query
+
+def _defect_breakdown(db: Session, filters: Dict[str, Any]):
+    """
+    Defect metrics for the filtered projects in a single round-trip.
+    Defects are joined to FactProyecto and filtered with the same predicate as the project query,
+    then grouped by severity and phase; the four breakdowns are folded from those few rows.
+    """
+    query = db.query(
+        FactDefecto.severidad,
+        DimFaseSDLC.nombre_fase,
+        func.count(FactDefecto.defecto_id).label("total"),
+        func.count(DimFaseSDLC.fase_sdlc_id).label("with_phase"),
+        func.count(DimTipoDefecto.tipo_defecto_id).label("with_type")
+    ).select_from(FactDefecto)\
+        .join(FactProyecto, FactDefecto.proyecto_id == FactProyecto.proyecto_id)\
+        .outerjoin(DimFaseSDLC, FactDefecto.fase_id == DimFaseSDLC.fase_sdlc_id)\
+        .outerjoin(DimTipoDefecto, FactDefecto.tipo_defecto_id == DimTipoDefecto.tipo_defecto_id)
+    query = _apply_project_filters(query, **filters)
+
+    return _fold_defect_rows(query.group_by(FactDefecto.severidad, DimFaseSDLC.nombre_fase).all())
+
+def _defect_breakdown_agg(db: Session, filters: Dict[str, Any]):
+    """
+    Same defect metrics as _defect_breakdown, summed from the agg_kpi_defecto summary table.
+    """
+    n = AggKpiDefecto.n_defectos
+    query = db.query(
+        AggKpiDefecto.severidad,
+        DimFaseSDLC.nombre_fase,
+        func.sum(n).label("total"),
+        func.sum(case((DimFaseSDLC.fase_sdlc_id.isnot(None), n), else_=0)).label("with_phase"),
+        func.sum(AggKpiDefecto.con_tipo).label("with_type")
+    ).select_from(AggKpiDefecto)\
+        .outerjoin(DimFaseSDLC, AggKpiDefecto.fase_id == DimFaseSDLC.fase_sdlc_id)
+    query = _apply_agg_filters(query, AggKpiDefecto, **filters)
+
+    return _fold_defect_rows(query.group_by(AggKpiDefecto.severidad, DimFaseSDLC.nombre_fase).all())
+
+def _fold_defect_rows(rows):
+    critical_defects = 0
+    total_defects = 0
+    defects_by_phase = {}
+    defects_by_severity = {}
+
+    for row in rows:
+        # SUM() comes back as DECIMAL on MySQL; keep the counts integral in the JSON
+        with_phase = int(row.with_phase or 0)
+        with_type = int(row.with_type or 0)
+        total_defects += int(row.total or 0)
+        # Phase and severity breakdowns only count defects with a known phase / defect type
+        if with_phase:
+            defects_by_phase[row.nombre_fase] = defects_by_phase.get(row.nombre_fase, 0) + with_phase
+        if with_type:
+            defects_by_severity[row.severidad] = defects_by_severity.get(row.severidad, 0) + with_type
+            if row.severidad in CRITICAL_SEVERITIES:
+                critical_defects += with_type
+
+    return critical_defects, total_defects, defects_by_phase, defects_by_severity
+
+def _agg_answerable(filters: Dict[str, Any]) -> bool:
+    """
+    agg_kpi is bucketed by start month, so a start_date filter can only be served from it on a month boundary.
+    """
+    start_date = filters.get("start_date")
+    if not start_date:
+        return True
+    try:
+        return datetime.date.fromisoformat(start_date[:10]).day == 1
+    except ValueError:
+        return False
+
+def _apply_agg_filters(query, table, start_date=None, project_type=None, status=None, country=None, estado_joined=False):
+    """
+    Slice & Dice filters for the summary tables (same semantics as _apply_project_filters).
+    """
+    if start_date:
+        query = query.filter(table.mes_inicio >= start_date)
+
+    if project_type and project_type != 'all':
+        query = query.join(DimTipoProyecto, table.tipo_proyecto_id == DimTipoProyecto.tipo_proyecto_id)\
+                     .filter(DimTipoProyecto.nombre == project_type)
+
+    if status and status != 'all':
+        if not estado_joined:
+            query = query.join(DimEstado, table.estado_id == DimEstado.estado_id)
+        query = query.filter(DimEstado.nombre_estado == status)
+
+    if country and country != 'all':
+        query = query.filter(table.pais == country)
+
+    return query
+
+def _empty_totals():
+    return {
+        "projects": 0, "profit": 0.0, "roi": 0.0, "pv": 0.0, "ac": 0.0, "ev": 0.0,
+        "tasks_planned": 0.0, "tasks_completed": 0.0, "tasks_delayed": 0.0,
+        "hours_planned": 0.0, "hours_real": 0.0, "employees": 0.0,
+        "on_time": 0, "delay_days": 0
+    }
+
+def _aggregate_kpis_python(db: Session, filters: Dict[str, Any]):
+    """
+    Portfolio totals computed row by row in Python (legacy mode).
+    """
+    query = _apply_project_filters(_project_query(db), **filters)
+
+    totals = _empty_totals()
+    status_counts_dict = {}
+
+    for proj in query.all():
+        totals["projects"] += 1
+
+        totals["profit"] += float(proj.ganancia_proyecto or 0)
+        totals["roi"] += float(proj.roi or 0)
+
+        totals["pv"] += float(proj.monto_planificado or 0)
+        totals["ac"] += float(proj.monto_real or 0)
+        totals["ev"] += float(proj.ev or 0) # Materialized by the ETL
+
+        totals["tasks_planned"] += float(proj.tareas_planificadas or 1)
+        totals["tasks_completed"] += float(proj.tareas_completadas or 0)
+        totals["tasks_delayed"] += float(proj.tareas_retrasadas or 0)
+
+        totals["hours_planned"] += float(proj.horas_planificadas or 0)
+        totals["hours_real"] += float(proj.horas_trabajadas or 0)
+        totals["employees"] += float(proj.empleados_asignados or 0)
+
+        # Status Count
+        st = proj.estado.nombre_estado if proj.estado else "Unknown"
+        status_counts_dict[st] = status_counts_dict.get(st, 0) + 1
+
+        # Delay (NULL when the project lacks plan/real end dates)
+        if proj.on_time is not None:
+            totals["on_time"] += proj.on_time
+            totals["delay_days"] += proj.delay_days or 0
+
+    return totals, status_counts_dict
+
+def _aggregate_kpis_sql(db: Session, filters: Dict[str, Any]):
+    """
+    Portfolio totals computed by the database in a single GROUP BY query.
+    One row comes back per project status, so the final sums in Python are over a handful of rows.
+    """
+    t_total = func.coalesce(FactProyecto.tareas_planificadas, 0)
+
+    query = db.query(
+        DimEstado.nombre_estado.label("estado"),
+        func.count(FactProyecto.fact_id).label("projects"),
+        func.sum(func.coalesce(FactProyecto.ganancia_proyecto, 0)).label("profit"),
+        func.sum(func.coalesce(FactProyecto.roi, 0)).label("roi"),
+        func.sum(func.coalesce(FactProyecto.monto_planificado, 0)).label("pv"),
+        func.sum(func.coalesce(FactProyecto.monto_real, 0)).label("ac"),
+        func.sum(func.coalesce(FactProyecto.ev, 0)).label("ev"),
+        # Same convention as the row loop: a project without planned tasks counts as one
+        func.sum(case((t_total == 0, 1), else_=t_total)).label("tasks_planned"),
+        func.sum(func.coalesce(FactProyecto.tareas_completadas, 0)).label("tasks_completed"),
+        func.sum(func.coalesce(FactProyecto.tareas_retrasadas, 0)).label("tasks_delayed"),
+        func.sum(func.coalesce(FactProyecto.horas_planificadas, 0)).label("hours_planned"),
+        func.sum(func.coalesce(FactProyecto.horas_trabajadas, 0)).label("hours_real"),
+        func.sum(func.coalesce(FactProyecto.empleados_asignados, 0)).label("employees"),
+        func.sum(func.coalesce(FactProyecto.on_time, 0)).label("on_time"),
+        func.sum(func.coalesce(FactProyecto.delay_days, 0)).label("delay_days")
+    ).select_from(FactProyecto)\
+        .outerjoin(DimEstado, FactProyecto.estado_id == DimEstado.estado_id)
+    query = _apply_project_filters(query, estado_joined=True, **filters)
+
+    return _fold_status_rows(query.group_by(DimEstado.nombre_estado).all())
+
+def _aggregate_kpis_agg(db: Session, filters: Dict[str, Any]):
+    """
+    Portfolio totals summed from the agg_kpi summary table built by the ETL.
+    The cost depends on the number of summary rows, not on the size of the portfolio.
+    """
+    measures = {
+        "projects": AggKpi.n_proyectos,
+        "profit": AggKpi.ganancia_proyecto,
+        "roi": AggKpi.roi,
+        "pv": AggKpi.monto_planificado,
+        "ac": AggKpi.monto_real,
+        "ev": AggKpi.ev,
+        "tasks_planned": AggKpi.tareas_planificadas,
+        "tasks_completed": AggKpi.tareas_completadas,
+        "tasks_delayed": AggKpi.tareas_retrasadas,
+        "hours_planned": AggKpi.horas_planificadas,
+        "hours_real": AggKpi.horas_trabajadas,
+        "employees": AggKpi.empleados_asignados,
+        "on_time": AggKpi.proyectos_a_tiempo,
+        "delay_days": AggKpi.dias_retraso
+    }
+    query = db.query(
+        DimEstado.nombre_estado.label("estado"),
+        *[func.sum(column).label(key) for key, column in measures.items()]
+    ).select_from(AggKpi)\
+        .outerjoin(DimEstado, AggKpi.estado_id == DimEstado.estado_id)
+    query = _apply_agg_filters(query, AggKpi, estado_joined=True, **filters)
+
+    return _fold_status_rows(query.group_by(DimEstado.nombre_estado).all())
+
+def _fold_status_rows(rows):
+    """
+    Add up per-status aggregate rows into portfolio totals and a status histogram.
+    """
+    totals = _empty_totals()
+    status_counts_dict = {}
+
+    for row in rows:
+        st = row.estado if row.estado is not None else "Unknown"
+        status_counts_dict[st] = status_counts_dict.get(st, 0) + int(row.projects or 0)
+        for key in totals:
+            totals[key] += float(getattr(row, key) or 0)
+
+    for key in ("projects", "on_time", "delay_days"):
+        totals[key] = int(totals[key])
+
+    return totals, status_counts_dict
+
 @router.get("/kpis/general")
 def get_general_kpis(
     start_date: str = None,
@@ -23,118 +285,56 @@ def get_general_kpis(
     """
     Get high-level KPIs for the dashboard with optional Slice & Dice filters.
     """
-    query = db.query(FactProyecto)
+    filters = {
+        "start_date": start_date,
+        "project_type": project_type,
+        "status": status,
+        "country": country
+    }
+    cache_key = kpi_cache.make_key("kpis/general", **filters)
+    cached = kpi_cache.get(db, cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        # Alias DimTiempo for plan and real dates
-        TiempoPlan = aliased(DimTiempo)
-        TiempoReal = aliased(DimTiempo)
-
-        # Query FactProyecto along with the actual dates
-        query = db.query(FactProyecto, TiempoPlan.fecha.label("fecha_plan_date"), TiempoReal.fecha.label("fecha_real_date"))\
-            .outerjoin(TiempoPlan, FactProyecto.fecha_fin_plan == TiempoPlan.tiempo_id)\
-            .outerjoin(TiempoReal, FactProyecto.fecha_fin_real == TiempoReal.tiempo_id)
-        
-        # Apply Filters (Slice & Dice)
-        if start_date:
-            # Filter by start date (assuming fecha_inicio_real)
-            TiempoInicio = aliased(DimTiempo)
-            query = query.join(TiempoInicio, FactProyecto.fecha_inicio_real == TiempoInicio.tiempo_id)\
-                         .filter(TiempoInicio.fecha >= start_date)
-                         
-        if end_date:
-            pass 
-
-        if project_type and project_type != 'all':
-            query = query.join(DimTipoProyecto).filter(DimTipoProyecto.nombre == project_type)
-            
-        if status and status != 'all':
-            query = query.join(DimEstado).filter(DimEstado.nombre_estado == status)
-            
-        if country and country != 'all':
-            query = query.join(DimCliente).filter(DimCliente.pais == country)
+        use_summary = KPI_AGGREGATION == "agg" and _agg_answerable(filters)
+        if use_summary:
+            totals, status_counts_dict = _aggregate_kpis_agg(db, filters)
+        elif KPI_AGGREGATION == "python":
+            totals, status_counts_dict = _aggregate_kpis_python(db, filters)
+        else:
+            totals, status_counts_dict = _aggregate_kpis_sql(db, filters)
+
+        total_projects = totals["projects"]
 
-        # Fetch results
-        results = query.all()
-        
-        total_projects = len(results)
-        
         if total_projects == 0:
-            return {
+            return kpi_cache.put(cache_key, {
                 "total_projects": 0,
                 "avg_roi": 0.0,
                 "total_profit": 0.0,
                 "projects_by_status": {},
                 "avg_delay_days": 0,
                 "on_time_projects_pct": 0
-            }
-            
+            })
+
         # Aggregations
-        total_profit = 0
-        total_roi = 0
-        total_pv = 0
-        total_ac = 0
-        total_ev = 0
-        
-        total_tasks_planned = 0
-        total_tasks_completed = 0
-        total_tasks_delayed = 0
-        
-        total_hours_planned = 0
-        total_hours_real = 0
-        total_employees = 0
-        
-        on_time_count = 0
-        total_delay_days = 0
-        
-        project_ids = []
-        status_counts_dict = {}
+        total_profit = totals["profit"]
+        total_pv = totals["pv"]
+        total_ac = totals["ac"]
+        total_ev = totals["ev"]
 
-        for row in results:
-            proj = row[0] # FactProyecto object
-            f_plan = row.fecha_plan_date
-            f_real = row.fecha_real_date
-            
-            project_ids.append(proj.proyecto_id)
-            
-            total_profit += float(proj.ganancia_proyecto or 0)
-            total_roi += float(proj.roi or 0)
-            
-            pv = float(proj.monto_planificado or 0)
-            ac = float(proj.monto_real or 0)
-            total_pv += pv
-            total_ac += ac
-            
-            # EV Calculation per project
-            t_total = float(proj.tareas_planificadas or 1)
-            t_done = float(proj.tareas_completadas or 0)
-            prog = t_done / t_total if t_total > 0 else 0
-            total_ev += prog * pv
-            
-            total_tasks_planned += t_total
-            total_tasks_completed += t_done
-            total_tasks_delayed += float(proj.tareas_retrasadas or 0)
-            
-            total_hours_planned += float(proj.horas_planificadas or 0)
-            total_hours_real += float(proj.horas_trabajadas or 0)
-            total_employees += float(proj.empleados_asignados or 0)
-            
-            # Status Count
-            st = proj.estado.nombre_estado if proj.estado else "Unknown"
-            status_counts_dict[st] = status_counts_dict.get(st, 0) + 1
-            
-            # Delay Calculation
-            if f_real and f_plan:
-                if f_real <= f_plan:
-                    on_time_count += 1
-                else:
-                    delta = f_real - f_plan
-                    total_delay_days += delta.days
-        
-        avg_roi = total_roi / total_projects
-        avg_employees_assigned = total_employees / total_projects
+        total_tasks_planned = totals["tasks_planned"]
+        total_tasks_completed = totals["tasks_completed"]
+        total_tasks_delayed = totals["tasks_delayed"]
+
+        total_hours_planned = totals["hours_planned"]
+        total_hours_real = totals["hours_real"]
+
+        avg_roi = totals["roi"] / total_projects
+        avg_employees_assigned = totals["employees"] / total_projects
         
-        on_time_projects_pct = (on_time_count / total_projects * 100)
-        avg_delay_days = total_delay_days / total_projects # Average delay across ALL projects
+        on_time_projects_pct = (totals["on_time"] / total_projects * 100)
+        avg_delay_days = totals["delay_days"] / total_projects # Average delay across ALL projects
         
         hours_real_vs_planned_pct = ((total_hours_real - total_hours_planned) / total_hours_planned * 100) if total_hours_planned > 0 else 0
         cost_real_vs_planned_pct = ((total_ac - total_pv) / total_pv * 100) if total_pv > 0 else 0
@@ -158,36 +358,13 @@ def get_general_kpis(
         if risk_score == 1: risk_status = "Medium"
         elif risk_score >= 2: risk_status = "High"
 
-        # Defects Metrics (Separate queries for efficiency)
-        critical_defects = 0
-        total_defects = 0
-        defects_by_phase = {}
-        defects_by_severity = {}
-        
-        if project_ids:
-            critical_defects = db.query(func.count(FactDefecto.defecto_id))\
-                .join(DimTipoDefecto, FactDefecto.tipo_defecto_id == DimTipoDefecto.tipo_defecto_id)\
-                .filter(FactDefecto.proyecto_id.in_(project_ids))\
-                .filter(FactDefecto.severidad.in_(['Critico', 'Alta']))\
-                .scalar() or 0
-                
-            total_defects = db.query(func.count(FactDefecto.defecto_id))\
-                .filter(FactDefecto.proyecto_id.in_(project_ids))\
-                .scalar() or 0
-                
-            defects_phase_query = db.query(DimFaseSDLC.nombre_fase, func.count(FactDefecto.defecto_id))\
-                .join(FactDefecto, FactDefecto.fase_id == DimFaseSDLC.fase_sdlc_id)\
-                .filter(FactDefecto.proyecto_id.in_(project_ids))\
-                .group_by(DimFaseSDLC.nombre_fase).all()
-            defects_by_phase = {p: c for p, c in defects_phase_query}
-            
-            defects_severity_query = db.query(FactDefecto.severidad, func.count(FactDefecto.defecto_id))\
-                .join(DimTipoDefecto, FactDefecto.tipo_defecto_id == DimTipoDefecto.tipo_defecto_id)\
-                .filter(FactDefecto.proyecto_id.in_(project_ids))\
-                .group_by(FactDefecto.severidad).all()
-            defects_by_severity = {s: c for s, c in defects_severity_query}
+        # Defects Metrics (one filtered join, no project id list)
+        if use_summary:
+            critical_defects, total_defects, defects_by_phase, defects_by_severity = _defect_breakdown_agg(db, filters)
+        else:
+            critical_defects, total_defects, defects_by_phase, defects_by_severity = _defect_breakdown(db, filters)
             
-        return {
+        return kpi_cache.put(cache_key, {
             "risk_status": risk_status,
             "total_projects": total_projects,
             "avg_roi": round(avg_roi, 2),
@@ -211,7 +388,7 @@ def get_general_kpis(
             "projects_by_status": status_counts_dict,
             "defects_by_phase": defects_by_phase,
             "defects_by_severity": defects_by_severity
-        }
+        })
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -222,8 +399,13 @@ def get_okr_metrics(db: Session = Depends(get_db)):
     """
     Get metrics for Balanced Scorecard with real data.
     """
+    cache_key = kpi_cache.make_key("kpis/okrs")
+    cached = kpi_cache.get(db, cache_key)
+    if cached is not None:
+        return cached
+
     try:
-        projects = db.query(FactProyecto).all()
+        projects = _project_query(db).all()
         total_projects = len(projects)
         
         if total_projects == 0:
@@ -251,43 +433,40 @@ def get_okr_metrics(db: Session = Depends(get_db)):
         profitable_pct = (profitable_count / total_projects) * 100
 
         # --- Customer ---
-        # Re-query with joins for dates
-        TiempoPlan = aliased(DimTiempo)
-        TiempoReal = aliased(DimTiempo)
-        
-        projects_dates = db.query(FactProyecto, TiempoPlan.fecha, TiempoReal.fecha)\
-            .outerjoin(TiempoPlan, FactProyecto.fecha_fin_plan == TiempoPlan.tiempo_id)\
-            .outerjoin(TiempoReal, FactProyecto.fecha_fin_real == TiempoReal.tiempo_id)\
-            .all()
-            
         on_time_count = 0
         acceptable_delay_count = 0
         
-        for p, d_plan, d_real in projects_dates:
-            if d_real and d_plan:
-                if d_real <= d_plan:
-                    on_time_count += 1
-                    acceptable_delay_count += 1
-                else:
-                    delay_days = (d_real - d_plan).days
-                    if delay_days <= 20:
-                        acceptable_delay_count += 1
+        for p in projects:
+            if p.on_time is None:
+                continue
+            if p.on_time:
+                on_time_count += 1
+                acceptable_delay_count += 1
+            elif (p.delay_days or 0) <= 20:
+                acceptable_delay_count += 1
         
         on_time_pct = (on_time_count / total_projects) * 100
         acceptable_delay_pct = (acceptable_delay_count / total_projects) * 100
         
+        # Defect counts in one round-trip: all defects, critical ones,
+        # and warehouse projects that have at least one critical defect
+        is_critical = FactDefecto.severidad.in_(CRITICAL_SEVERITIES)
+        defect_stats = db.query(
+            func.count(FactDefecto.defecto_id).label("total"),
+            func.sum(case((is_critical, 1), else_=0)).label("critical"),
+            func.count(func.distinct(case(
+                (and_(is_critical, FactProyecto.proyecto_id.isnot(None)), FactDefecto.proyecto_id)
+            ))).label("projects_with_critical")
+        ).select_from(FactDefecto)\
+            .outerjoin(FactProyecto, FactDefecto.proyecto_id == FactProyecto.proyecto_id)\
+            .one()
+
         # Defect Free (Critical)
-        project_ids = [p.proyecto_id for p in projects]
-        projects_with_crit_defects = db.query(FactDefecto.proyecto_id).distinct()\
-            .filter(FactDefecto.proyecto_id.in_(project_ids))\
-            .filter(FactDefecto.severidad.in_(['Critico', 'Alta'])).all()
-        projects_with_crit_defects_ids = {p[0] for p in projects_with_crit_defects}
-        
-        crit_defect_free_count = total_projects - len(projects_with_crit_defects_ids)
+        crit_defect_free_count = total_projects - (defect_stats.projects_with_critical or 0)
         crit_defect_free_pct = (crit_defect_free_count / total_projects) * 100
 
         # --- Internal Process ---
-        total_defects_count = db.query(func.count(FactDefecto.defecto_id)).scalar() or 0
+        total_defects_count = defect_stats.total or 0
         avg_defects = total_defects_count / total_projects
         
         total_tasks_plan = sum(p.tareas_planificadas or 0 for p in projects)
@@ -295,25 +474,17 @@ def get_okr_metrics(db: Session = Depends(get_db)):
         tasks_completed_pct = (total_tasks_done / total_tasks_plan * 100) if total_tasks_plan > 0 else 0
         
         # New Metric: Critical Defects % (Goal < 5%)
-        critical_defects_count = db.query(func.count(FactDefecto.defecto_id))\
-            .filter(FactDefecto.severidad.in_(['Critico', 'Alta'])).scalar() or 0
+        critical_defects_count = int(defect_stats.critical or 0)
         critical_defects_pct = (critical_defects_count / total_defects_count * 100) if total_defects_count > 0 else 0
 
         # --- Learning ---
-        total_ev_val = 0
+        total_ev_val = sum(float(p.ev or 0) for p in projects)
         total_ac_val = sum(float(p.monto_real or 0) for p in projects)
         
-        for p in projects:
-            pv = float(p.monto_planificado or 0)
-            t_tot = float(p.tareas_planificadas or 1)
-            t_done = float(p.tareas_completadas or 0)
-            prog = t_done / t_tot if t_tot > 0 else 0
-            total_ev_val += prog * pv
-            
         cpi_pct = (total_ev_val / total_ac_val * 100) if total_ac_val > 0 else 0
         model_usage_pct = 65 
 
-        return {
+        return kpi_cache.put(cache_key, {
             "financial": {
                 "roi": round(avg_roi, 1),
                 "cost_dev": round(avg_cost_dev, 1),
@@ -333,7 +504,7 @@ def get_okr_metrics(db: Session = Depends(get_db)):
                 "productivity_pct": round(cpi_pct, 1),
                 "model_usage_pct": model_usage_pct
             }
-        }
+        })
     except Exception as e:
         print(f"Error in get_okr_metrics: {str(e)}")
         return {}
@@ -343,7 +514,7 @@ def get_projects_list(skip: int = 0, limit: int = 100, db: Session = Depends(get
     """
     Get list of projects with key metrics.
     """
-    projects = db.query(FactProyecto).options(joinedload(FactProyecto.tipo_proyecto)).offset(skip).limit(limit).all()
+    projects = _project_query(db).offset(skip).limit(limit).all()
     return projects
 
 @router.get("/projects/{project_id}/quality")
@@ -351,6 +522,11 @@ def get_project_quality(project_id: int, db: Session = Depends(get_db)):
     """
     Get quality metrics: Defects by severity, phase, density.
     """
+    cache_key = kpi_cache.make_key("projects/quality", project_id=project_id)
+    cached = kpi_cache.get(db, cache_key)
+    if cached is not None:
+        return cached
+
     try:
         # Defects by Severity
         defects_severity = db.query(FactDefecto.severidad, func.count(FactDefecto.defecto_id))\
@@ -368,7 +544,7 @@ def get_project_quality(project_id: int, db: Session = Depends(get_db)):
         
         # Defect Density (Defects / KLOC or Defects / Function Points)
         # We don't have size metrics, so we'll use Defects / 100 Hours as proxy
-        proj = db.query(FactProyecto).filter(FactProyecto.proyecto_id == project_id).first()
+        proj = _project_query(db).filter(FactProyecto.proyecto_id == project_id).first()
         hours = proj.horas_trabajadas or 1
         density = (total_defects / hours) * 100
         
@@ -381,13 +557,13 @@ def get_project_quality(project_id: int, db: Session = Depends(get_db)):
             .group_by(func.week(DimTiempo.fecha))\
             .order_by(func.week(DimTiempo.fecha)).all()
 
-        return {
+        return kpi_cache.put(cache_key, {
             "total_defects": total_defects,
             "defect_density_per_100h": round(density, 2),
             "by_severity": {s: c for s, c in defects_severity},
             "by_phase": {p: c for p, c in defects_phase},
             "by_week": [{"week": w, "count": c} for w, c in defects_by_week]
-        }
+        })
     except Exception as e:
         print(f"ERROR IN GET_PROJECT_QUALITY: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
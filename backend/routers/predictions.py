@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from database import get_db
-from models import FactProyecto, FactDefecto, DimTipoProyecto
+from models import FactProyecto, FactDefecto, DimTipoProyecto, DimTipoDefecto
 from prediction_model import model
 from pydantic import BaseModel
 from typing import List, Dict, Any
@@ -17,6 +17,7 @@ class RayleighInput(BaseModel):
     horasEstimadas: int
     duracionSemanas: int
     complejidad: str  # 'baja', 'media', 'alta'
+    tipoProyecto: str = "Desarrollo Web"
 
 class MonteCarloInput(BaseModel):
     horasEstimadas: int
@@ -38,6 +39,7 @@ def predict_defects(input_data: RayleighInput, db: Session = Depends(get_db)):
     # - If still no data, fallback to complexity constants
     
     historical_rate = 0.0
+    data_source = "Historical Data"
     
     # Get Project Type ID if possible
     tipo_proj_id = db.query(DimTipoProyecto.tipo_proyecto_id)\
@@ -71,6 +73,7 @@ def predict_defects(input_data: RayleighInput, db: Session = Depends(get_db)):
             # Fallback: Complexity Constants
             rates = {"baja": 0.03, "media": 0.05, "alta": 0.08}
             historical_rate = rates.get(input_data.complejidad, 0.05)
+            data_source = "Fixed Constants"
             print(f"DEBUG: Using Fixed Rate (No History): {historical_rate}")
 
     # Apply Complexity Factor to the Historical Rate
@@ -85,7 +88,7 @@ def predict_defects(input_data: RayleighInput, db: Session = Depends(get_db)):
     
     # Inject the used rate into the result for transparency
     result["used_defect_rate"] = round(adjusted_rate, 5)
-    result["data_source"] = "Historical Data" if (result and result.total_hours) else "Fixed Constants"
+    result["data_source"] = data_source
     
     return result
 
@@ -155,10 +158,13 @@ def calculate_dynamic_adjustments(db: Session, project_id: int):
     # 2. Productivity (EV / Hours Real)
     # If productivity is low, project takes longer, defects might spread out.
     # Assume standard productivity is around 1.0 (if EV and Hours are comparable units, which depends on implementation)
-    # Let's use CPI instead as a proxy for efficiency: EV / AC
-    ev = float(project.tareas_completadas or 0) / float(project.tareas_planificadas or 1) * float(project.monto_planificado or 0)
-    ac = float(project.monto_real or 1)
-    cpi = ev / ac if ac > 0 else 0
+    # Let's use CPI instead as a proxy for efficiency: EV / AC (materialized by the ETL)
+    if project.cpi is not None:
+        cpi = float(project.cpi)
+    else:
+        ev = float(project.tareas_completadas or 0) / float(project.tareas_planificadas or 1) * float(project.monto_planificado or 0)
+        ac = float(project.monto_real or 1)
+        cpi = ev / ac if ac > 0 else 0
     
     if cpi < 0.85:
         sigma_multiplier += 0.15
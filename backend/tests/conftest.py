@@ -0,0 +1,103 @@
+"""
+Shared fixtures: a small warehouse built by the real pipeline (generator -> PMO -> ETL) in SQLite,
+and a TestClient whose get_db dependency points at it, guarded by a fixed SQL statement budget.
+"""
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+ETL_DIR = os.path.join(REPO_DIR, 'etl')
+sys.path[:0] = [BACKEND_DIR, ETL_DIR, os.path.join(ETL_DIR, 'ETL-Proyecto', 'ETL-Proyecto')]
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+SEED = 7
+N_PROJECTS = 200
+# Every dashboard/prediction request in the tests runs under this SQL statement budget (query_budget.py)
+STATEMENT_BUDGET = 6
+os.environ['SQL_STATEMENT_BUDGET'] = str(STATEMENT_BUDGET)
+
+def _iso_date(value):
+    return datetime.date.fromisoformat(str(value)[:10])
+
+def _register_mysql_functions(dbapi_conn, record):
+    # MySQL functions the routers call, for the SQLite test warehouse
+    dbapi_conn.create_function('datediff', 2, lambda a, b: None if a is None or b is None
+                               else (_iso_date(a) - _iso_date(b)).days)
+    dbapi_conn.create_function('week', 1, lambda a: None if a is None else int(_iso_date(a).strftime('%U')))
+
+def build_warehouse(workdir: str) -> str:
+    """
+    Generate a seeded PMO, create the SSD schema and run a full ETL into it. Returns the SSD path.
+    """
+    import etl
+    import generate_pmo_data as gen
+
+    pmo_path = os.path.join(workdir, 'pmo_db.sqlite')
+    ssd_path = os.path.join(workdir, 'ssd_db.sqlite')
+    random.seed(SEED)
+    gen.fake = gen.get_fake(seed=SEED)
+    gen.generar_instantanea(argparse.Namespace(projects=N_PROJECTS, seed=SEED, batch_size=80, workers=1,
+                                               output=workdir, format='csv', db='sqlite', db_path=pmo_path))
+
+    with open(os.path.join(REPO_DIR, 'database', 'create_ssd_db.sql'), encoding='utf-8') as f:
+        ssd = sqlite3.connect(ssd_path)
+        ssd.executescript(f.read())
+        ssd.close()
+
+    with pytest.MonkeyPatch.context() as mp:
+        for name, value in {'DB_TYPE': 'sqlite', 'ETL_MODE': 'full', 'PMO_DB_PATH': pmo_path,
+                            'SSD_DB_PATH': ssd_path, 'ETL_REPORT_DIR': '', 'ETL_STAGING_DIR': ''}.items():
+            mp.setattr(etl, name, value)
+        etl.main()
+    return ssd_path
+
+@pytest.fixture(scope='session')
+def warehouse(tmp_path_factory):
+    return build_warehouse(str(tmp_path_factory.mktemp('warehouse')))
+
+@pytest.fixture(scope='session')
+def engine(warehouse):
+    engine = create_engine(f'sqlite:///{warehouse}')
+    event.listen(engine, 'connect', _register_mysql_functions)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture(scope='session')
+def get_test_db(engine):
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    def get_test_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    return get_test_db
+
+@pytest.fixture(scope='session')
+def client(get_test_db):
+    from fastapi.testclient import TestClient
+    import database
+    import main
+
+    main.app.dependency_overrides[database.get_db] = get_test_db
+    with TestClient(main.app) as test_client:
+        yield test_client
+    main.app.dependency_overrides.clear()
+
+@pytest.fixture(autouse=True)
+def empty_kpi_cache():
+    from kpi_cache import kpi_cache
+    kpi_cache.clear()
+    yield
+    kpi_cache.clear()
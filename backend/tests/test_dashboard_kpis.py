@@ -0,0 +1,46 @@
+import pytest
+
+from kpi_cache import kpi_cache
+from routers import dashboard
+
+FILTERS = [
+    {},
+    {'project_type': 'Desarrollo Web'},
+    {'status': 'Completado'},
+    {'country': 'México'},
+    {'start_date': '2022-01-01'},
+    {'start_date': '2022-01-01', 'status': 'Cancelado', 'project_type': 'Aplicación Móvil'}
+]
+
+def general_kpis(client, monkeypatch, mode, params):
+    monkeypatch.setattr(dashboard, 'KPI_AGGREGATION', mode)
+    kpi_cache.clear()  # the cache key does not include the aggregation mode
+    response = client.get('/dashboard/kpis/general', params=params)
+    assert response.status_code == 200
+    return response.json()
+
+def assert_same_kpis(actual, expected):
+    assert actual.keys() == expected.keys()
+    for key, value in expected.items():
+        if isinstance(value, float):
+            # agg_kpi stores per-project ROI rounded to cents
+            assert actual[key] == pytest.approx(value, abs=0.011), key
+        else:
+            assert actual[key] == value, key
+
+@pytest.mark.parametrize('params', FILTERS)
+def test_sql_matches_python_loop(client, monkeypatch, params):
+    python = general_kpis(client, monkeypatch, 'python', params)
+    assert_same_kpis(general_kpis(client, monkeypatch, 'sql', params), python)
+
+@pytest.mark.parametrize('params', FILTERS)
+def test_summary_tables_match_python_loop(client, monkeypatch, params):
+    python = general_kpis(client, monkeypatch, 'python', params)
+    assert_same_kpis(general_kpis(client, monkeypatch, 'agg', params), python)
+
+def test_filters_select_a_subset(client, monkeypatch):
+    everything = general_kpis(client, monkeypatch, 'sql', {})
+    completed = general_kpis(client, monkeypatch, 'sql', {'status': 'Completado'})
+    assert 0 < completed['total_projects'] < everything['total_projects']
+    assert completed['projects_by_status'] == {'Completado': completed['total_projects']}
+    assert sum(everything['projects_by_status'].values()) == everything['total_projects']
@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import text
+
+from kpi_cache import KPICache, kpi_cache
+
+RAISE_PROFIT = ("UPDATE fact_proyecto SET ganancia_proyecto = ganancia_proyecto + :delta "
+                "WHERE proyecto_id = (SELECT MIN(proyecto_id) FROM fact_proyecto)")
+
+@pytest.fixture
+def raise_profit(engine):
+    """
+    Add 1000 to one project's profit without publishing a run; undone, with the test's runs, afterwards.
+    """
+    def raise_profit():
+        with engine.begin() as conn:
+            conn.execute(text(RAISE_PROFIT), {'delta': 1000})
+        raised.append(1000)
+
+    raised = []
+    yield raise_profit
+    with engine.begin() as conn:
+        for delta in raised:
+            conn.execute(text(RAISE_PROFIT), {'delta': -delta})
+        conn.execute(text("DELETE FROM etl_run WHERE modo = 'test'"))
+
+def total_profit(client):
+    response = client.get('/dashboard/kpis/general')
+    assert response.status_code == 200
+    return response.json()['total_profit']
+
+def record_run(engine, estado):
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO etl_run (inicio, fin, modo, estado) "
+                          "VALUES ('2026-01-01 00:00:00', '2026-01-01 00:01:00', 'test', :estado)"), {'estado': estado})
+
+def test_cache_is_dropped_on_new_published_run(client, engine, monkeypatch, raise_profit):
+    monkeypatch.setattr(kpi_cache, 'version_check', 0)
+    before = total_profit(client)
+
+    raise_profit()
+    assert total_profit(client) == before  # served from the cache
+
+    # Runs that did not publish are not a new warehouse version
+    record_run(engine, 'error')
+    record_run(engine, 'sin_cambios')
+    assert total_profit(client) == before
+
+    record_run(engine, 'publicado')
+    assert total_profit(client) == pytest.approx(before + 1000)
+
+def test_version_is_checked_at_most_every_interval(engine, get_test_db, raise_profit):
+    cache = KPICache(version_check=3600)
+    db = next(get_test_db())
+    try:
+        key = cache.make_key('kpis/general', status='all', country='')
+        assert key == cache.make_key('kpis/general', status=None, country=None)
+        assert cache.get(db, key) is None
+        cache.put(key, {'total_projects': 1})
+
+        record_run(engine, 'publicado')
+        assert cache.get(db, key) == {'total_projects': 1}  # version not re-read yet
+
+        cache.version_check = 0
+        assert cache.get(db, key) is None
+    finally:
+        db.close()
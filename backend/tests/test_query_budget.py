@@ -0,0 +1,42 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import database
+from kpi_cache import kpi_cache
+from query_budget import SQL_STATEMENT_BUDGET, install_query_budget
+from routers import dashboard
+
+RAYLEIGH = {'horasEstimadas': 1200, 'duracionSemanas': 12, 'complejidad': 'media', 'tipoProyecto': 'Desarrollo Web'}
+
+def endpoints(project_id):
+    return [
+        ('GET', '/dashboard/kpis/general', None),
+        ('GET', '/dashboard/kpis/general?status=Completado&country=México', None),
+        ('GET', '/dashboard/kpis/okrs', None),
+        ('GET', '/dashboard/projects?limit=50', None),
+        ('GET', f'/dashboard/projects/{project_id}/quality', None),
+        ('POST', '/predictions/rayleigh', RAYLEIGH),
+        ('POST', '/predictions/rayleigh/enhanced', dict(RAYLEIGH, proyectoId=project_id)),
+        ('POST', '/predictions/monte-carlo', {'horasEstimadas': 1200, 'complejidad': 'alta'})
+    ]
+
+def test_every_endpoint_stays_within_budget(client):
+    assert SQL_STATEMENT_BUDGET > 0  # set by conftest before main is imported
+    project_id = client.get('/dashboard/projects?limit=1').json()[0]['proyecto_id']
+    for method, url, body in endpoints(project_id):
+        response = client.request(method, url, json=body)
+        assert response.status_code == 200, (url, response.text)
+        assert 'budget exceeded' not in response.text
+
+def test_over_budget_request_is_not_cached(get_test_db):
+    app = FastAPI()
+    install_query_budget(app, budget=1)
+    app.include_router(dashboard.router)
+    app.dependency_overrides[database.get_db] = get_test_db
+
+    with TestClient(app) as client:
+        for _ in range(2):
+            response = client.get('/dashboard/kpis/general')
+            assert response.status_code == 500
+            assert 'SQL statement budget exceeded' in response.json()['detail']
+    assert not kpi_cache._entries
@@ -139,3 +139,51 @@ CREATE TABLE IF NOT EXISTS defecto (
     FOREIGN KEY (tipo_defecto_id) REFERENCES tipo_defecto(tipo_defecto_id),
     FOREIGN KEY (fase_id) REFERENCES fase_sdlc(fase_id)
 );
+
+-- 15. Extraction flag reset
+-- A change to any column of a flagged row sets metadata_extraccion back to 0, so the incremental
+-- ETL extracts its project again. Flag-only updates (the ETL marking rows) leave it as set.
+-- SQLite has no SET NEW: create_pmo_triggers_sqlite.sql holds the equivalent triggers.
+DROP TRIGGER IF EXISTS proyecto_reset_extraccion;
+CREATE TRIGGER proyecto_reset_extraccion BEFORE UPDATE ON proyecto FOR EACH ROW
+SET NEW.metadata_extraccion = IF(
+    NEW.proyecto_id <=> OLD.proyecto_id AND NEW.nombre <=> OLD.nombre AND NEW.descripcion <=> OLD.descripcion
+    AND NEW.fecha_inicio_plan <=> OLD.fecha_inicio_plan AND NEW.fecha_fin_plan <=> OLD.fecha_fin_plan
+    AND NEW.fecha_inicio_real <=> OLD.fecha_inicio_real AND NEW.fecha_fin_real <=> OLD.fecha_fin_real
+    AND NEW.horas_planificadas <=> OLD.horas_planificadas AND NEW.horas_trabajadas <=> OLD.horas_trabajadas
+    AND NEW.estado_id <=> OLD.estado_id AND NEW.tipo_proyecto_id <=> OLD.tipo_proyecto_id
+    AND NEW.cliente_id <=> OLD.cliente_id AND NEW.defectos_detectados <=> OLD.defectos_detectados
+    AND NEW.catalogo_id <=> OLD.catalogo_id,
+    NEW.metadata_extraccion, 0);
+
+DROP TRIGGER IF EXISTS tarea_reset_extraccion;
+CREATE TRIGGER tarea_reset_extraccion BEFORE UPDATE ON tarea FOR EACH ROW
+SET NEW.metadata_extraccion = IF(
+    NEW.tarea_id <=> OLD.tarea_id AND NEW.nombre_tarea <=> OLD.nombre_tarea AND NEW.tipo_tarea <=> OLD.tipo_tarea
+    AND NEW.prioridad <=> OLD.prioridad AND NEW.completada <=> OLD.completada
+    AND NEW.fecha_entrega <=> OLD.fecha_entrega AND NEW.fecha_completado <=> OLD.fecha_completado
+    AND NEW.catalogo_tareas_id <=> OLD.catalogo_tareas_id,
+    NEW.metadata_extraccion, 0);
+
+DROP TRIGGER IF EXISTS proyecto_empleado_reset_extraccion;
+CREATE TRIGGER proyecto_empleado_reset_extraccion BEFORE UPDATE ON proyecto_empleado FOR EACH ROW
+SET NEW.metadata_extraccion = IF(
+    NEW.proyecto_id <=> OLD.proyecto_id AND NEW.empleado_id <=> OLD.empleado_id,
+    NEW.metadata_extraccion, 0);
+
+DROP TRIGGER IF EXISTS finanzas_proyecto_reset_extraccion;
+CREATE TRIGGER finanzas_proyecto_reset_extraccion BEFORE UPDATE ON finanzas_proyecto FOR EACH ROW
+SET NEW.metadata_extraccion = IF(
+    NEW.id <=> OLD.id AND NEW.proyecto_id <=> OLD.proyecto_id
+    AND NEW.monto_presupuestado <=> OLD.monto_presupuestado AND NEW.monto_real_acumulado <=> OLD.monto_real_acumulado
+    AND NEW.ingreso_proyecto <=> OLD.ingreso_proyecto,
+    NEW.metadata_extraccion, 0);
+
+DROP TRIGGER IF EXISTS defecto_reset_extraccion;
+CREATE TRIGGER defecto_reset_extraccion BEFORE UPDATE ON defecto FOR EACH ROW
+SET NEW.metadata_extraccion = IF(
+    NEW.defecto_id <=> OLD.defecto_id AND NEW.proyecto_id <=> OLD.proyecto_id
+    AND NEW.tipo_defecto_id <=> OLD.tipo_defecto_id AND NEW.fase_id <=> OLD.fase_id
+    AND NEW.severidad <=> OLD.severidad AND NEW.descripcion <=> OLD.descripcion
+    AND NEW.fecha_registro <=> OLD.fecha_registro,
+    NEW.metadata_extraccion, 0);
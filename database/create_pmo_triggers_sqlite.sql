@@ -0,0 +1,52 @@
+-- SQLite version of the extraction flag reset triggers in create_pmo_db.sql (section 15).
+-- A change to any column of a flagged row sets metadata_extraccion back to 0, so the incremental
+-- ETL extracts its project again. Flag-only updates (the ETL marking rows) leave it as set.
+
+DROP TRIGGER IF EXISTS proyecto_reset_extraccion;
+CREATE TRIGGER proyecto_reset_extraccion AFTER UPDATE ON proyecto FOR EACH ROW
+WHEN NEW.proyecto_id IS NOT OLD.proyecto_id OR NEW.nombre IS NOT OLD.nombre OR NEW.descripcion IS NOT OLD.descripcion
+    OR NEW.fecha_inicio_plan IS NOT OLD.fecha_inicio_plan OR NEW.fecha_fin_plan IS NOT OLD.fecha_fin_plan
+    OR NEW.fecha_inicio_real IS NOT OLD.fecha_inicio_real OR NEW.fecha_fin_real IS NOT OLD.fecha_fin_real
+    OR NEW.horas_planificadas IS NOT OLD.horas_planificadas OR NEW.horas_trabajadas IS NOT OLD.horas_trabajadas
+    OR NEW.estado_id IS NOT OLD.estado_id OR NEW.tipo_proyecto_id IS NOT OLD.tipo_proyecto_id
+    OR NEW.cliente_id IS NOT OLD.cliente_id OR NEW.defectos_detectados IS NOT OLD.defectos_detectados
+    OR NEW.catalogo_id IS NOT OLD.catalogo_id
+BEGIN
+    UPDATE proyecto SET metadata_extraccion = 0 WHERE rowid = NEW.rowid;
+END;
+
+DROP TRIGGER IF EXISTS tarea_reset_extraccion;
+CREATE TRIGGER tarea_reset_extraccion AFTER UPDATE ON tarea FOR EACH ROW
+WHEN NEW.tarea_id IS NOT OLD.tarea_id OR NEW.nombre_tarea IS NOT OLD.nombre_tarea OR NEW.tipo_tarea IS NOT OLD.tipo_tarea
+    OR NEW.prioridad IS NOT OLD.prioridad OR NEW.completada IS NOT OLD.completada
+    OR NEW.fecha_entrega IS NOT OLD.fecha_entrega OR NEW.fecha_completado IS NOT OLD.fecha_completado
+    OR NEW.catalogo_tareas_id IS NOT OLD.catalogo_tareas_id
+BEGIN
+    UPDATE tarea SET metadata_extraccion = 0 WHERE rowid = NEW.rowid;
+END;
+
+DROP TRIGGER IF EXISTS proyecto_empleado_reset_extraccion;
+CREATE TRIGGER proyecto_empleado_reset_extraccion AFTER UPDATE ON proyecto_empleado FOR EACH ROW
+WHEN NEW.proyecto_id IS NOT OLD.proyecto_id OR NEW.empleado_id IS NOT OLD.empleado_id
+BEGIN
+    UPDATE proyecto_empleado SET metadata_extraccion = 0 WHERE rowid = NEW.rowid;
+END;
+
+DROP TRIGGER IF EXISTS finanzas_proyecto_reset_extraccion;
+CREATE TRIGGER finanzas_proyecto_reset_extraccion AFTER UPDATE ON finanzas_proyecto FOR EACH ROW
+WHEN NEW.id IS NOT OLD.id OR NEW.proyecto_id IS NOT OLD.proyecto_id
+    OR NEW.monto_presupuestado IS NOT OLD.monto_presupuestado OR NEW.monto_real_acumulado IS NOT OLD.monto_real_acumulado
+    OR NEW.ingreso_proyecto IS NOT OLD.ingreso_proyecto
+BEGIN
+    UPDATE finanzas_proyecto SET metadata_extraccion = 0 WHERE rowid = NEW.rowid;
+END;
+
+DROP TRIGGER IF EXISTS defecto_reset_extraccion;
+CREATE TRIGGER defecto_reset_extraccion AFTER UPDATE ON defecto FOR EACH ROW
+WHEN NEW.defecto_id IS NOT OLD.defecto_id OR NEW.proyecto_id IS NOT OLD.proyecto_id
+    OR NEW.tipo_defecto_id IS NOT OLD.tipo_defecto_id OR NEW.fase_id IS NOT OLD.fase_id
+    OR NEW.severidad IS NOT OLD.severidad OR NEW.descripcion IS NOT OLD.descripcion
+    OR NEW.fecha_registro IS NOT OLD.fecha_registro
+BEGIN
+    UPDATE defecto SET metadata_extraccion = 0 WHERE rowid = NEW.rowid;
+END;
@@ -89,6 +89,13 @@ CREATE TABLE IF NOT EXISTS fact_proyecto (
     roi DECIMAL(10,2),
     tuct DECIMAL(10,2),
 
+    /* === MÉTRICAS DERIVADAS (CALCULADAS EN EL ETL) === */
+    ev DOUBLE,
+    spi DOUBLE,
+    cpi DOUBLE,
+    delay_days INT,
+    on_time INT,
+
     fecha_inicio_plan INT,
     fecha_fin_plan INT,
     fecha_inicio_real INT,
@@ -129,5 +136,62 @@ CREATE TABLE IF NOT EXISTS fact_defecto (
     FOREIGN KEY (tiempo_id) REFERENCES dim_tiempo(tiempo_id)
 );
 
+/*=========================================
+   RESUMEN: KPIs PRE-AGREGADOS
+   → GRANO: TIPO PROYECTO × ESTADO × PAÍS × MES DE INICIO (REAL)
+   → SOLO MEDIDAS ADITIVAS; LO CONSTRUYE EL ETL
+=========================================*/
+CREATE TABLE IF NOT EXISTS agg_kpi (
+    agg_id INTEGER PRIMARY KEY AUTOINCREMENT, -- SQLite syntax
+    tipo_proyecto_id INT,
+    estado_id INT,
+    pais VARCHAR(255),
+    mes_inicio DATE,
+
+    n_proyectos INT,
+    ganancia_proyecto DECIMAL(15,2),
+    roi DECIMAL(15,2),
+    monto_planificado DECIMAL(15,2),
+    monto_real DECIMAL(15,2),
+    ev DOUBLE,
+    tareas_planificadas INT,
+    tareas_completadas INT,
+    tareas_retrasadas INT,
+    horas_planificadas DECIMAL(15,2),
+    horas_trabajadas DECIMAL(15,2),
+    empleados_asignados INT,
+    proyectos_a_tiempo INT,
+    dias_retraso INT
+);
 
+CREATE TABLE IF NOT EXISTS agg_kpi_defecto (
+    agg_id INTEGER PRIMARY KEY AUTOINCREMENT, -- SQLite syntax
+    tipo_proyecto_id INT,
+    estado_id INT,
+    pais VARCHAR(255),
+    mes_inicio DATE,
+    severidad VARCHAR(50),
+    fase_sdlc_id INT,
+    n_defectos INT,
+    con_tipo INT
+);
 
+/*=========================================
+   CONTROL: EJECUCIONES DEL ETL
+   → EL ETL INSERTA UNA FILA POR EJECUCIÓN CON SU REPORTE JSON
+     (TIEMPOS, FILAS Y MEMORIA POR CONSULTA, PASO Y TABLA)
+   → LA API INVALIDA SU CACHÉ DE KPIs CUANDO CAMBIA
+     LA ÚLTIMA EJECUCIÓN PUBLICADA
+=========================================*/
+CREATE TABLE IF NOT EXISTS etl_run (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT, -- SQLite syntax
+    inicio DATETIME,
+    fin DATETIME,
+    modo VARCHAR(20),
+    estado VARCHAR(20),
+    duracion_s DECIMAL(12, 3),
+    filas_cargadas INT,
+    filas_rechazadas INT, -- filas de cargas fallidas (revertidas)
+    pico_rss_mb DECIMAL(12, 1),
+    reporte LONGTEXT
+);
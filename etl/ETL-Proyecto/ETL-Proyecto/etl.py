@@ -1,6 +1,15 @@
+import argparse
+import hashlib
+import json
 import os
+import re
+import sys
+import tempfile
+import threading
 import warnings
-from typing import Dict, Tuple, Any
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, Iterable, Iterator, Tuple
 import time
 import pandas as pd
 import numpy as np
@@ -15,9 +24,22 @@ except ImportError:
 
 try:
     import mysql.connector
+    import mysql.connector.pooling
 except ModuleNotFoundError:
     mysql = None
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 import sqlite3
 from dotenv import load_dotenv
 
@@ -26,6 +48,10 @@ base_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.dirname(os.path.dirname(base_dir)) # Go up to root
 load_dotenv(os.path.join(root_dir, 'etl.env'))
 
+# Calendar helpers shared with the data generator (etl/calendario.py)
+sys.path.insert(0, root_dir)
+import calendario
+
 # Suppress warnings
 warnings.filterwarnings("ignore", category=UserWarning)
 
@@ -34,6 +60,30 @@ warnings.filterwarnings("ignore", category=UserWarning)
 # ==========================================================
 # Read from Environment Variables
 DB_TYPE = os.getenv('DB_TYPE', 'sqlite') # 'sqlite' or 'mysql'
+# 'full': reload everything through staging tables. 'incremental': only projects with unflagged
+# (metadata_extraccion = 0) rows in the PMO, upserted into the SSD.
+ETL_MODE = os.getenv('ETL_MODE', 'full')
+# SSD load path on MySQL: 'executemany' (row by row), 'multirow' (batched multi-row VALUES)
+# or 'infile' (CSV through LOAD DATA LOCAL INFILE). SQLite always uses executemany.
+ETL_LOADER = os.getenv('ETL_LOADER', 'executemany')
+ETL_BATCH_ROWS = int(os.getenv('ETL_BATCH_ROWS', '1000'))  # rows converted and sent per batch
+# Extraction queries run concurrently on this many pooled PMO connections (1 = sequential)
+ETL_EXTRACT_WORKERS = int(os.getenv('ETL_EXTRACT_WORKERS', '4'))
+# Stream per-project tables in proyecto_id ranges of this size (0 = everything in one pass)
+ETL_CHUNK_PROJECTS = int(os.getenv('ETL_CHUNK_PROJECTS', '0'))
+# Transform closed projects in this many parallel shards (worker processes); 1 = in-process
+ETL_TRANSFORM_WORKERS = int(os.getenv('ETL_TRANSFORM_WORKERS', '1'))
+# Local Parquet cache of the extracted tables (needs pyarrow; '' = off). ETL_STAGING='write'
+# refreshes it from the PMO on every run, 'replay' transforms and loads from it without
+# querying the PMO (rerun a failed load, benchmark the transform).
+ETL_STAGING_DIR = os.getenv('ETL_STAGING_DIR', '')
+ETL_STAGING = os.getenv('ETL_STAGING', 'write')
+# JSON run reports are written here as well as to the SSD's etl_run table ('' = SSD only)
+ETL_REPORT_DIR = os.getenv('ETL_REPORT_DIR', 'etl_reports')
+# Source-flag marking: 'join' bulk-loads the extracted keys into a temporary table and flags each
+# source table with one join UPDATE; 'in' sends UPDATE ... WHERE key IN (...) in chunks.
+ETL_MARK_MODE = os.getenv('ETL_MARK_MODE', 'join')
+MARK_KEY_BATCH = 10000  # keys per INSERT into the temporary table
 
 # SQLite Defaults
 PMO_DB_PATH = 'pmo_db.sqlite'
@@ -72,10 +122,57 @@ def load_sql_queries(file_path: str) -> Dict[str, str]:
             queries[current_name] = '\n'.join(buffer).strip()
     return queries
 
-def get_db_connection(config: Dict[str, str], db_type: str = 'mysql') -> Any:
+def peak_rss_mb() -> Dict[str, float]:
+    """
+    Peak resident set size so far of the ETL process and of its largest finished worker, in MB.
+    """
+    if resource is None:
+        return {}
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024  # ru_maxrss is bytes on macOS, KB on Linux
+    return {
+        'proceso': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1),
+        'workers': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale, 1)
+    }
+
+class RunReport:
+    """
+    Telemetry for one ETL run: wall time and rows per extraction query, transform step and
+    table load, stage totals and peak RSS. Saved as JSON locally and as a row of etl_run.
+    """
+    def __init__(self, mode: str, db_type: str):
+        self.started = time.time()
+        self.data: Dict[str, Any] = {
+            'run_id': None, 'inicio': time.strftime('%Y-%m-%d %H:%M:%S'), 'fin': None,
+            'modo': mode, 'db_type': db_type, 'loader': ETL_LOADER, 'estado': None,
+            'duracion_s': None, 'etapas': {}, 'pico_rss_mb': {},
+            'consultas': [], 'transformaciones': [], 'cargas': []
+        }
+
+    def add(self, section: str, **entry: Any) -> None:
+        self.data[section].append(entry)  # list.append is atomic: safe from the extraction threads
+
+    def finish(self, estado: str, stages: Dict[str, float]) -> Dict[str, Any]:
+        self.data.update({
+            'fin': time.strftime('%Y-%m-%d %H:%M:%S'), 'estado': estado,
+            'duracion_s': round(time.time() - self.started, 3),
+            'etapas': {name: round(seconds, 3) for name, seconds in stages.items()},
+            'pico_rss_mb': peak_rss_mb()
+        })
+        return self.data
+
+# SQLAlchemy engines of the run, by connection target and pool size: every get_connection_factory
+# call for the same PMO/SSD shares one pool. dispose_engines closes them at the end of main().
+_ENGINES: Dict[Tuple, Any] = {}
+_ENGINES_LOCK = threading.Lock()
+
+def get_connection_factory(config: Dict[str, str], db_type: str = 'mysql', pool_size: int = 1) -> Callable[[], Any]:
+    """
+    Return a callable that hands out connections from a pool of `pool_size`.
+    Closing a connection returns it to the pool. SQLite opens a new connection per call.
+    """
     if db_type == 'sqlite':
         db_path = config.get('database')
-        return sqlite3.connect(db_path)
+        return lambda: sqlite3.connect(db_path)
     
     if mysql is None and sqlalchemy is None:
         raise ImportError("MySQL drivers not installed.")
@@ -86,117 +183,310 @@ def get_db_connection(config: Dict[str, str], db_type: str = 'mysql') -> Any:
         host = config.get('host')
         port = config.get('port')
         database = config.get('database')
-        engine = create_engine(f"mysql+mysqlconnector://{user}:{password}@{host}:{port}/{database}")
-        return engine.raw_connection()
+        connect_args = {'allow_local_infile': True} if ETL_LOADER == 'infile' else {}
+        key = (user, host, port, database, pool_size, bool(connect_args))
+        with _ENGINES_LOCK:
+            if key not in _ENGINES:
+                _ENGINES[key] = create_engine(f"mysql+mysqlconnector://{user}:{password}@{host}:{port}/{database}",
+                                              connect_args=connect_args, pool_size=pool_size, max_overflow=0)
+            engine = _ENGINES[key]
+        return engine.raw_connection
     else:
-        return mysql.connector.connect(**config)
+        extra = {'allow_local_infile': True} if ETL_LOADER == 'infile' else {}
+        if pool_size <= 1:
+            return lambda: mysql.connector.connect(**config, **extra)
+        pool = mysql.connector.pooling.MySQLConnectionPool(pool_size=pool_size, **config, **extra)
+        return pool.get_connection
 
-def extract_data(config: Dict[str, str], queries: Dict[str, str], db_type: str = 'mysql') -> Dict[str, pd.DataFrame]:
-    conn = get_db_connection(config, db_type)
-    
-    mapping = {
-        'extract_projects': 'projects',
-        'extract_tasks': 'tasks',
-        'extract_project_employees': 'project_employees',
-        'extract_states': 'states',
-        'extract_types': 'types',
-        'extract_finances': 'finances',
-        'extract_catalogues': 'catalogues',
-        'extract_clients': 'clients',
-        'extract_defect_types': 'defect_types',
-        'extract_phases': 'phases',
-        'extract_defects': 'defects'
-    }
+def dispose_engines() -> None:
+    """
+    Close the pooled connections of every cached engine and forget the engines.
+    """
+    with _ENGINES_LOCK:
+        engines = list(_ENGINES.values())
+        _ENGINES.clear()
+    for engine in engines:
+        engine.dispose()
+
+def get_db_connection(config: Dict[str, str], db_type: str = 'mysql') -> Any:
+    """
+    One standalone connection, closed by the caller. On MySQL it bypasses the engine pools: a
+    one-connection pool would block a second connection to the same database.
+    """
+    if db_type == 'sqlite':
+        return sqlite3.connect(config.get('database'))
+    if mysql is None:
+        raise ImportError("MySQL drivers not installed.")
+    extra = {'allow_local_infile': True} if ETL_LOADER == 'infile' else {}
+    return mysql.connector.connect(**config, **extra)
 
-    tables: Dict[str, pd.DataFrame] = {}
+def _run_extraction(connect: Callable[[], Any], sql: str) -> Tuple[pd.DataFrame, float]:
+    start = time.time()
+    conn = connect()
     try:
-        for query_name, dest_key in mapping.items():
-            sql = queries.get(query_name)
-            if sql is None:
-                print(f"Warning: Query '{query_name}' not found.")
-                continue
-            tables[dest_key] = pd.read_sql(sql, conn)
+        return pd.read_sql(sql, conn), time.time() - start
     finally:
-        if hasattr(conn, 'close'):
-            conn.close()
-        elif hasattr(conn, 'dispose'):
-            conn.dispose()
-            
+        conn.close()
+
+EXTRACTION_MAPPING = {
+    'extract_projects': 'projects',
+    'extract_tasks': 'tasks',
+    'extract_project_employees': 'project_employees',
+    'extract_states': 'states',
+    'extract_types': 'types',
+    'extract_finances': 'finances',
+    'extract_catalogues': 'catalogues',
+    'extract_clients': 'clients',
+    'extract_defect_types': 'defect_types',
+    'extract_phases': 'phases',
+    'extract_defects': 'defects'
+}
+# Per-project tables (the large ones); everything else is a small lookup read in full
+PROJECT_QUERIES = ['extract_projects', 'extract_tasks', 'extract_project_employees', 'extract_finances', 'extract_defects']
+LOOKUP_QUERIES = [q for q in EXTRACTION_MAPPING if q not in PROJECT_QUERIES]
+
+def project_scope(queries: Dict[str, str], mode: str = 'full', project_range: Tuple[int, int] = None) -> str:
+    """
+    Subquery selecting the proyecto_id values a run (or one chunk of it) works on,
+    or None when every project is in scope.
+    """
+    scope = queries['changed_projects'] if mode == 'incremental' else None
+    if project_range is not None:
+        scope = queries['projects_in_range'].replace('{projects}', scope or queries['all_projects'])\
+            .replace('{range_start}', str(int(project_range[0])))\
+            .replace('{range_end}', str(int(project_range[1])))
+    return scope
+
+def extract_data(config: Dict[str, str], queries: Dict[str, str], db_type: str = 'mysql', mode: str = 'full',
+                 workers: int = ETL_EXTRACT_WORKERS, names: Iterable[str] = None,
+                 project_range: Tuple[int, int] = None, connect: Callable[[], Any] = None,
+                 report: RunReport = None) -> Dict[str, pd.DataFrame]:
+    """
+    Run the extraction queries (all of them, or just `names`) against the PMO database,
+    up to `workers` at a time, each on its own pooled connection (`connect`, if given, is reused).
+    Per-project queries use their `<query>_scoped` variant when the run is scoped: in
+    'incremental' mode to the projects returned by `changed_projects` (any of their rows still
+    unflagged), and/or to proyecto_id in [start, end) when `project_range` is given.
+    """
+    scope = project_scope(queries, mode, project_range)
+
+    statements: Dict[str, str] = {}
+    for query_name in (names or EXTRACTION_MAPPING):
+        sql = queries.get(query_name)
+        if scope is not None and f"{query_name}_scoped" in queries:
+            sql = queries[f"{query_name}_scoped"].replace('{project_scope}', scope)
+        if sql is None:
+            print(f"Warning: Query '{query_name}' not found.")
+            continue
+        statements[query_name] = sql
+
+    workers = max(1, min(workers, len(statements)))
+    if connect is None:
+        connect = get_connection_factory(config, db_type, pool_size=workers)
+    mapping = EXTRACTION_MAPPING
+
+    results: Dict[str, pd.DataFrame] = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_run_extraction, connect, sql): name for name, sql in statements.items()}
+        for future in as_completed(futures):
+            query_name = futures[future]
+            df, elapsed = future.result()
+            results[query_name] = df
+            print(f"  {query_name}: {len(df)} filas en {elapsed:.2f}s")
+            if report is not None:
+                report.add('consultas', consulta=query_name, rango=list(project_range) if project_range else None,
+                           filas=len(df), segundos=round(elapsed, 3))
+
+    return {mapping[query_name]: results[query_name] for query_name in statements}
+
+STAGING_MANIFEST = 'manifest.json'
+
+def _file_checksum(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def write_staging(staging_dir: str, part: str, tables: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, Any]]:
+    """
+    Persist one part of the extraction (the lookups or a chunk) as `<staging_dir>/<part>/<table>.parquet`.
+    Returns the manifest entries: file, row count and SHA-256 checksum per table.
+    """
+    os.makedirs(os.path.join(staging_dir, part), exist_ok=True)
+    entries = {}
+    for name, df in tables.items():
+        path = os.path.join(part, f"{name}.parquet")
+        full_path = os.path.join(staging_dir, path)
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), full_path + '.tmp')
+        os.replace(full_path + '.tmp', full_path)
+        entries[name] = {'file': path, 'rows': len(df), 'sha256': _file_checksum(full_path)}
+    return entries
+
+def read_staging(staging_dir: str, entries: Dict[str, Dict[str, Any]]) -> Dict[str, pd.DataFrame]:
+    """
+    Load one cached part, memory-mapping each file after checking it against its manifest checksum.
+    """
+    tables = {}
+    for name, entry in entries.items():
+        path = os.path.join(staging_dir, entry['file'])
+        if _file_checksum(path) != entry['sha256']:
+            raise ValueError(f"Cache de staging corrupta: {path} no coincide con su checksum")
+        tables[name] = pq.read_table(path, memory_map=True).to_pandas()
     return tables
 
-def _calculate_task_metrics(tasks: pd.DataFrame, project_row: pd.Series) -> Tuple[int, int, int]:
-    project_tasks = tasks.loc[tasks['catalogo_tareas_id'] == project_row['catalogo_id']]
-    total = len(project_tasks)
-    completed = int(project_tasks['completada'].sum())
-    delay_count = 0
+def write_staging_json(staging_dir: str, name: str, data: Dict[str, Any]) -> None:
+    path = os.path.join(staging_dir, name)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(path + '.tmp', path)
 
-    for _, t in project_tasks.iterrows():
-        entrega = t.get('fecha_entrega')
-        completado = t.get('fecha_completado')
-        finished = bool(t.get('completada'))
-        
-        if pd.notnull(entrega): entrega = pd.to_datetime(entrega)
-        if pd.notnull(completado): completado = pd.to_datetime(completado)
-        
-        if finished and pd.notnull(entrega) and pd.notnull(completado):
-            if completado > entrega:
-                delay_count += 1
-        elif not finished and pd.notnull(entrega) and pd.notnull(project_row.get('fecha_fin_real')):
-            fin_real = pd.to_datetime(project_row['fecha_fin_real'])
-            if entrega <= fin_real:
-                delay_count += 1
-                
-    return total, completed, delay_count
-
-def transform_data(tables: Dict[str, pd.DataFrame]) -> Tuple:
-    projects = tables['projects']
-    tasks = tables['tasks']
-    project_employees = tables['project_employees']
-    states = tables['states']
-    types = tables['types']
-    finances = tables['finances']
-    clients = tables['clients']
-    defect_types = tables['defect_types']
-    phases = tables['phases']
-    defects = tables['defects']
+def read_staging_manifest(staging_dir: str, mode: str, require_complete: bool = True) -> Dict[str, Any]:
+    """
+    Manifest of a cache (complete, unless `require_complete` is False) written by a run in the same ETL mode.
+    """
+    with open(os.path.join(staging_dir, STAGING_MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if require_complete and not manifest.get('complete'):
+        raise ValueError(f"Cache de staging incompleta en {staging_dir}")
+    if manifest['mode'] != mode:
+        raise ValueError(f"Cache de staging extraída en modo {manifest['mode']}, no {mode}")
+    return manifest
 
-    if projects.empty:
-        print("No hay proyectos nuevos para procesar.")
-        return (pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
+CHECKPOINT_FILE = 'checkpoint.json'
 
-    # --- FILTERING LOGIC (ONLY FACTS) ---
-    print("Filtrando proyectos activos (dejando solo Completado/Cancelado)...")
-    valid_statuses = ['Completado', 'Cancelado']
-    valid_status_ids = states[states['nombre_estado'].isin(valid_statuses)]['estado_id'].tolist()
-    
-    original_proj_count = len(projects)
-    projects = projects[projects['estado_id'].isin(valid_status_ids)]
-    print(f"Proyectos filtrados: {original_proj_count} -> {len(projects)}")
-    
-    valid_project_ids = projects['proyecto_id'].tolist()
-    
-    # Filter related tables
-    tasks = tasks[tasks['catalogo_tareas_id'].isin(valid_project_ids)]
-    project_employees = project_employees[project_employees['proyecto_id'].isin(valid_project_ids)]
-    finances = finances[finances['proyecto_id'].isin(valid_project_ids)]
-    defects = defects[defects['proyecto_id'].isin(valid_project_ids)]
-    # ------------------------------------
+def new_checkpoint(mode: str) -> Dict[str, Any]:
+    """
+    Progress of a run whose extraction is cached in the staging directory: SSD staging tables
+    created, tables loaded per part ('lookups', 'chunk_NNNN'), chunks fully loaded (with their
+    summary partials and extracted IDs saved under results/), publish and source marking done.
+    """
+    return {'mode': mode, 'inicio': time.strftime('%Y-%m-%d %H:%M:%S'), 'staging_creado': False,
+            'cargas': {}, 'bloques': {}, 'publicado': False, 'marcado': False}
+
+def read_checkpoint(staging_dir: str, mode: str) -> Dict[str, Any]:
+    """
+    Checkpoint left by the previous run in the same ETL mode, or None.
+    """
+    path = os.path.join(staging_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    return checkpoint if checkpoint.get('mode') == mode else None
+
+def _calculate_task_metrics(tasks: pd.DataFrame, projects: pd.DataFrame) -> pd.DataFrame:
+    """
+    Planned / completed / delayed task counts for every project in one pass over `tasks`.
+
+    A task is delayed when it was completed after its due date, or when it is still open
+    and its due date is on or before the project's fecha_fin_real.
+    Returns a frame aligned with `projects.index`.
+    """
+    columns = ['tareas_planificadas', 'tareas_completadas', 'tareas_retrasadas']
+
+    project_keys = projects[['catalogo_id', 'fecha_fin_real']].reset_index()
+    index_col = project_keys.columns[0]
+    project_tasks = project_keys.merge(
+        tasks[['catalogo_tareas_id', 'completada', 'fecha_entrega', 'fecha_completado']],
+        left_on='catalogo_id', right_on='catalogo_tareas_id', how='inner'
+    )
+    if project_tasks.empty:
+        return pd.DataFrame(0, index=projects.index, columns=columns)
+
+    entrega = pd.to_datetime(project_tasks['fecha_entrega'])
+    completado = pd.to_datetime(project_tasks['fecha_completado'])
+    fin_real = pd.to_datetime(project_tasks['fecha_fin_real'])
+    # A NULL flag was truthy in the old per-row check (bool(nan)), keep it that way
+    finished = project_tasks['completada'].astype(float).fillna(1) != 0
+
+    delayed_done = finished & (completado > entrega)
+    delayed_open = ~finished & (entrega <= fin_real)
+
+    project_tasks['tareas_planificadas'] = 1
+    project_tasks['tareas_completadas'] = project_tasks['completada'].astype(float).fillna(0)
+    project_tasks['tareas_retrasadas'] = (delayed_done | delayed_open).astype(int)
+
+    metrics = project_tasks.groupby(index_col)[columns].sum()
+    return metrics.reindex(projects.index, fill_value=0).astype(int)
+
+AGG_KEYS = ['tipo_proyecto_id', 'estado_id', 'pais', 'mes_inicio']
 
-    dim_estado_df = states.copy()
-    dim_tipo_proyecto_df = types.copy()
-    dim_cliente_df = clients.rename(columns={'nombre': 'nombre_cliente'})
-    dim_tipo_defecto_df = defect_types.copy()
+def build_agg_kpi(projects: pd.DataFrame, defects: pd.DataFrame, clients: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Pre-aggregate the additive KPI measures by tipo_proyecto × estado × país × mes de inicio (real).
+    `projects` must still carry calendar dates, i.e. be called before dates are mapped to tiempo_id.
+    Returns (agg_kpi, agg_kpi_defecto); the API sums a few hundred of these rows instead of scanning the facts.
+    """
+    p = projects.merge(clients[['cliente_id', 'pais']], on='cliente_id', how='left')
+    p['mes_inicio'] = pd.to_datetime(p['fecha_inicio_real']).dt.to_period('M').dt.to_timestamp()
+
+    # Same convention as the API: a project without planned tasks counts as one
+    t_plan = p['tareas_planificadas'].fillna(0)
+    t_plan = t_plan.where(t_plan != 0, 1)
+
+    measures = pd.DataFrame({
+        'n_proyectos': 1,
+        'ganancia_proyecto': p['ganancia_proyecto'].fillna(0).round(2),
+        'roi': p['roi'].fillna(0).round(2),
+        'monto_planificado': p['monto_planificado'].fillna(0),
+        'monto_real': p['monto_real'].fillna(0),
+        'ev': p['ev'].fillna(0),
+        'tareas_planificadas': t_plan,
+        'tareas_completadas': p['tareas_completadas'].fillna(0),
+        'tareas_retrasadas': p['tareas_retrasadas'].fillna(0),
+        'horas_planificadas': p['horas_planificadas'].fillna(0),
+        'horas_trabajadas': p['horas_trabajadas'].fillna(0),
+        'empleados_asignados': p['empleados_asignados'].fillna(0),
+        'proyectos_a_tiempo': p['on_time'].fillna(0),
+        'dias_retraso': p['delay_days'].fillna(0)
+    }, index=p.index)
+    agg_kpi_df = pd.concat([p[AGG_KEYS], measures], axis=1)\
+        .groupby(AGG_KEYS, dropna=False).sum().reset_index()
+
+    agg_defecto_df = pd.DataFrame(columns=AGG_KEYS + ['severidad', 'fase_id', 'n_defectos', 'con_tipo'])
+    if not defects.empty:
+        d = defects[['proyecto_id', 'severidad', 'fase_id', 'tipo_defecto_id']]\
+            .merge(p[['proyecto_id'] + AGG_KEYS], on='proyecto_id')
+        d['n_defectos'] = 1
+        # The severity breakdown only counts defects with a known defect type
+        d['con_tipo'] = d['tipo_defecto_id'].notna().astype(int)
+        agg_defecto_df = d.groupby(AGG_KEYS + ['severidad', 'fase_id'], dropna=False)[['n_defectos', 'con_tipo']]\
+            .sum().reset_index()
+
+    return agg_kpi_df, agg_defecto_df
+
+def transform_lookups(tables: Dict[str, pd.DataFrame]) -> Tuple:
+    """
+    Descriptive dimensions built straight from the PMO lookup tables:
+    (dim_estado, dim_tipo_proyecto, dim_cliente, dim_tipo_defecto, dim_fase_sdlc).
+    """
+    dim_estado_df = tables['states'].copy()
+    dim_tipo_proyecto_df = tables['types'].copy()
+    dim_cliente_df = tables['clients'].rename(columns={'nombre': 'nombre_cliente'})
+    dim_tipo_defecto_df = tables['defect_types'].copy()
     dim_tipo_defecto_df['nombre_tipo_defecto'] = dim_tipo_defecto_df['categoria'] + ' - ' + dim_tipo_defecto_df['subtipo']
-    dim_fase_sdlc_df = phases.copy()
+    dim_fase_sdlc_df = tables['phases'].copy()
+    return dim_estado_df, dim_tipo_proyecto_df, dim_cliente_df, dim_tipo_defecto_df, dim_fase_sdlc_df
+
+DATE_COLS_PROYECTO = ['fecha_inicio_plan', 'fecha_fin_plan', 'fecha_inicio_real', 'fecha_fin_real']
+
+def transform_project_shard(shard: Dict[str, pd.DataFrame]) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Fact rows for one shard of (closed) projects, together with their tasks, employees,
+    finances and defects. Returns (fact_proyecto, fact_defecto, agg_kpi, agg_kpi_defecto).
+    Top-level so it can run in a worker process.
+    """
+    projects = shard['projects']
+    tasks = shard['tasks']
+    project_employees = shard['project_employees']
+    finances = shard['finances']
+    defects = shard['defects']
+    clients = shard['clients']
 
     merged_projects = projects.merge(finances, on='proyecto_id', how='left')
     
-    metrics_list = []
-    for idx, row in merged_projects.iterrows():
-        t_plan, t_comp, t_delay = _calculate_task_metrics(tasks, row)
-        metrics_list.append((t_plan, t_comp, t_delay))
-    
-    metrics_df = pd.DataFrame(metrics_list, columns=['tareas_planificadas', 'tareas_completadas', 'tareas_retrasadas'], index=merged_projects.index)
+    metrics_df = _calculate_task_metrics(tasks, merged_projects)
     merged_projects = pd.concat([merged_projects, metrics_df], axis=1)
     
     emp_metrics = project_employees.groupby('proyecto_id').size().reset_index(name='empleados_asignados')
@@ -225,61 +515,36 @@ def transform_data(tables: Dict[str, pd.DataFrame]) -> Tuple:
         0.0
     )
 
-    def compute_tuct(row):
-        try:
-            start = pd.to_datetime(row['fecha_inicio_plan'])
-            end = pd.to_datetime(row['fecha_fin_real'])
-            if pd.isnull(start) or pd.isnull(end): return 0.0
-            days = (end - start).days
-            return float(days) if days >= 0 else 0.0
-        except: return 0.0
-    
-    merged_projects['tuct'] = merged_projects.apply(compute_tuct, axis=1)
+    # Earned value, SPI/CPI and schedule delay, materialized so the API reads them as columns
+    # (EV follows the API convention: a project without planned tasks counts as one)
+    tareas_ev = merged_projects['tareas_planificadas'].where(merged_projects['tareas_planificadas'] != 0, 1)
+    merged_projects['ev'] = merged_projects['tareas_completadas'] / tareas_ev * merged_projects['monto_planificado']
+    merged_projects['spi'] = np.where(
+        merged_projects['monto_planificado'] > 0,
+        merged_projects['ev'] / merged_projects['monto_planificado'].where(merged_projects['monto_planificado'] > 0),
+        0.0
+    )
+    merged_projects['cpi'] = np.where(
+        merged_projects['monto_real'] > 0,
+        merged_projects['ev'] / merged_projects['monto_real'].where(merged_projects['monto_real'] > 0),
+        0.0
+    )
 
-    date_cols_proj = ['fecha_inicio_plan', 'fecha_fin_plan', 'fecha_inicio_real', 'fecha_fin_real']
-    proj_dates = merged_projects[date_cols_proj].values.ravel('K')
-    defect_dates = defects['fecha_registro'].values if not defects.empty else []
-    all_dates = np.concatenate([proj_dates, defect_dates])
-    all_dates = pd.to_datetime([d for d in all_dates if pd.notnull(d)])
-    all_dates = pd.Index(all_dates).drop_duplicates().sort_values()
-
-    dias_esp = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
-    meses_esp = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
-
-    date_info = pd.DataFrame({
-        'fecha': all_dates,
-        'anio': all_dates.year,
-        'mes': all_dates.month,
-        'dia': all_dates.day,
-        'nombre_dia': [dias_esp[d] for d in all_dates.weekday],
-        'nombre_mes': [meses_esp[m - 1] for m in all_dates.month],
-        'trimestre': all_dates.quarter,
-    })
-
-    dim_anio_df = date_info[['anio']].drop_duplicates().sort_values('anio').reset_index(drop=True)
-    dim_anio_df['anio_id'] = range(1, len(dim_anio_df) + 1)
-    
-    dim_mes_df = date_info[['mes', 'nombre_mes', 'trimestre', 'anio']].drop_duplicates().sort_values(['anio', 'mes']).reset_index(drop=True)
-    dim_mes_df = dim_mes_df.merge(dim_anio_df, on='anio')
-    dim_mes_df['mes_id'] = range(1, len(dim_mes_df) + 1)
-    dim_mes_df.rename(columns={'mes': 'numero_mes'}, inplace=True)
-    
-    dim_dia_df = date_info[['dia', 'nombre_dia', 'mes', 'anio']].drop_duplicates().sort_values(['anio', 'mes', 'dia']).reset_index(drop=True)
-    dim_dia_df = dim_dia_df.merge(dim_anio_df, on='anio').merge(dim_mes_df, left_on=['mes', 'anio_id'], right_on=['numero_mes', 'anio_id'])
-    dim_dia_df['dia_id'] = range(1, len(dim_dia_df) + 1)
-    
-    dim_tiempo_df = date_info.copy()
-    dim_tiempo_df = dim_tiempo_df.merge(dim_anio_df, on='anio') \
-                                 .merge(dim_mes_df, left_on=['mes', 'anio_id'], right_on=['numero_mes', 'anio_id']) \
-                                 .merge(dim_dia_df, left_on=['dia', 'mes_id', 'anio_id'], right_on=['dia', 'mes_id', 'anio_id'])
-    dim_tiempo_df['tiempo_id'] = dim_tiempo_df['fecha'].dt.strftime('%Y%m%d').astype(int)
-
-    def get_time_id(dt):
-        if pd.isnull(dt): return None
-        return int(pd.to_datetime(dt).strftime('%Y%m%d'))
-
-    for col in date_cols_proj:
-        merged_projects[col] = merged_projects[col].apply(get_time_id)
+    fin_plan = pd.to_datetime(merged_projects['fecha_fin_plan'])
+    fin_real = pd.to_datetime(merged_projects['fecha_fin_real'])
+    delay = (fin_real - fin_plan).dt.days
+    has_dates = fin_plan.notna() & fin_real.notna()
+    merged_projects['delay_days'] = delay.clip(lower=0).where(has_dates).astype('Int64')
+    merged_projects['on_time'] = (delay <= 0).astype('Int64').where(has_dates)
+
+    # TUCT: days from planned start to actual end, 0 when unknown or negative
+    tuct_days = (fin_real - pd.to_datetime(merged_projects['fecha_inicio_plan'])).dt.days
+    merged_projects['tuct'] = tuct_days.where(tuct_days >= 0, 0.0).astype(float)
+
+    agg_kpi_df, agg_defecto_df = build_agg_kpi(merged_projects, defects, clients)
+
+    for col in DATE_COLS_PROYECTO:
+        merged_projects[col] = calendario.to_tiempo_id(merged_projects[col])
         
     merged_projects['fact_id'] = merged_projects['proyecto_id']
     fact_proyecto_df = merged_projects
@@ -287,58 +552,686 @@ def transform_data(tables: Dict[str, pd.DataFrame]) -> Tuple:
     fact_defecto_df = pd.DataFrame()
     if not defects.empty:
         fact_defecto_df = defects.copy()
-        fact_defecto_df['tiempo_id'] = fact_defecto_df['fecha_registro'].apply(get_time_id)
+        fact_defecto_df['tiempo_id'] = calendario.to_tiempo_id(fact_defecto_df['fecha_registro'])
+
+    return fact_proyecto_df, fact_defecto_df, agg_kpi_df, agg_defecto_df
+
+def transform_data(tables: Dict[str, pd.DataFrame], executor: Executor = None, shards: int = 1) -> Tuple:
+    """
+    Build the SSD dimensions and facts from the extracted PMO tables.
+    With an `executor` and `shards` > 1 the closed projects are split into contiguous shards
+    (each with its tasks, employees, finances and defects) transformed in parallel; the time
+    dimension is built once from every date in the run.
+    """
+    projects = tables['projects']
+    tasks = tables['tasks']
+    project_employees = tables['project_employees']
+    states = tables['states']
+    finances = tables['finances']
+    clients = tables['clients']
+    defects = tables['defects']
+
+    # --- FILTERING LOGIC (ONLY FACTS) ---
+    print("Filtrando proyectos activos (dejando solo Completado/Cancelado)...")
+    valid_statuses = ['Completado', 'Cancelado']
+    valid_status_ids = states[states['nombre_estado'].isin(valid_statuses)]['estado_id'].tolist()
+    
+    original_proj_count = len(projects)
+    projects = projects[projects['estado_id'].isin(valid_status_ids)]
+    print(f"Proyectos filtrados: {original_proj_count} -> {len(projects)}")
+
+    if projects.empty:
+        print("No hay proyectos nuevos para procesar.")
+        return (pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
+    
+    valid_project_ids = projects['proyecto_id'].tolist()
+    
+    # Filter related tables
+    tasks = tasks[tasks['catalogo_tareas_id'].isin(valid_project_ids)]
+    project_employees = project_employees[project_employees['proyecto_id'].isin(valid_project_ids)]
+    finances = finances[finances['proyecto_id'].isin(valid_project_ids)]
+    defects = defects[defects['proyecto_id'].isin(valid_project_ids)]
+    # ------------------------------------
+
+    dim_estado_df, dim_tipo_proyecto_df, dim_cliente_df, dim_tipo_defecto_df, dim_fase_sdlc_df = transform_lookups(tables)
+
+    defect_dates = defects['fecha_registro'].values if not defects.empty else []
+    # Dense calendar spanning the run's dates; keys derive from the date, so reloads never renumber
+    dim_tiempo_df, dim_dia_df, dim_mes_df, dim_anio_df = calendario.time_dimensions(calendario.calendar_for(
+        np.concatenate([projects[DATE_COLS_PROYECTO].values.ravel('K'), defect_dates])
+    ))
+
+    shard_tables = []
+    for rows in np.array_split(np.arange(len(projects)), max(1, min(shards, len(projects)))):
+        shard_projects = projects.iloc[rows]
+        shard_ids = shard_projects['proyecto_id']
+        shard_tables.append({
+            'projects': shard_projects,
+            'tasks': tasks[tasks['catalogo_tareas_id'].isin(shard_projects['catalogo_id'])],
+            'project_employees': project_employees[project_employees['proyecto_id'].isin(shard_ids)],
+            'finances': finances[finances['proyecto_id'].isin(shard_ids)],
+            'defects': defects[defects['proyecto_id'].isin(shard_ids)],
+            'clients': clients
+        })
+
+    if executor is not None and len(shard_tables) > 1:
+        shard_results = list(executor.map(transform_project_shard, shard_tables))
+    else:
+        shard_results = [transform_project_shard(shard) for shard in shard_tables]
+
+    fact_proyecto_df = pd.concat([r[0] for r in shard_results], ignore_index=True)
+    fact_defecto_df = pd.concat([r[1] for r in shard_results], ignore_index=True)
+    agg_kpi_df = combine_agg([r[2] for r in shard_results], AGG_KEYS)
+    agg_defecto_df = combine_agg([r[3] for r in shard_results], AGG_KEYS + ['severidad', 'fase_id'])
 
     return (
         fact_proyecto_df,
         dim_estado_df[['estado_id', 'nombre_estado']],
         dim_tipo_proyecto_df[['tipo_proyecto_id', 'nombre']],
-        dim_tiempo_df[['tiempo_id', 'fecha', 'dia_id']],
-        dim_dia_df[['dia_id', 'nombre_dia', 'dia', 'mes_id']],
-        dim_mes_df[['mes_id', 'nombre_mes', 'numero_mes', 'trimestre', 'anio_id']],
-        dim_anio_df[['anio_id', 'anio']],
+        dim_tiempo_df,
+        dim_dia_df,
+        dim_mes_df,
+        dim_anio_df,
         dim_cliente_df[['cliente_id', 'nombre_cliente', 'sector', 'pais']],
         dim_tipo_defecto_df[['tipo_defecto_id', 'nombre_tipo_defecto']],
         dim_fase_sdlc_df[['fase_id', 'nombre_fase']],
-        fact_defecto_df
+        fact_defecto_df,
+        agg_kpi_df,
+        agg_defecto_df
     )
 
-def insert_dataframe(conn: Any, df: pd.DataFrame, sql: str, db_type: str = 'mysql') -> None:
-    if df.empty: return
+def _split_insert(sql: str) -> Tuple[str, str, str]:
+    """
+    Split a single-row load query into (INSERT ... head, "(%s, ...)" row template, trailing clause).
+    """
+    match = re.search(r'\bVALUES\s*\(', sql)
+    depth = 0
+    for pos in range(match.end() - 1, len(sql)):
+        if sql[pos] == '(':
+            depth += 1
+        elif sql[pos] == ')':
+            depth -= 1
+            if depth == 0:
+                break
+    head = sql[:match.start()].rstrip()
+    row_template = sql[match.end() - 1:pos + 1]
+    tail = sql[pos + 1:].strip().rstrip(';').strip()
+    return head, row_template, tail
 
-    for col in df.columns:
-        if pd.api.types.is_datetime64_any_dtype(df[col]):
-            df[col] = df[col].dt.strftime('%Y-%m-%d')
-        elif pd.api.types.is_object_dtype(df[col]):
-             try:
-                 df[col] = df[col].apply(lambda x: x.strftime('%Y-%m-%d') if hasattr(x, 'strftime') else x)
-             except:
-                 pass
+def _column_converter(values: pd.Series) -> Callable[[int, int], list]:
+    """
+    Build a function returning rows [start, stop) of one column as DB-API values: dates as
+    'YYYY-MM-DD', missing values as None, numpy scalars as Python scalars. The column's type is
+    inspected once; every slice is then converted with whole-array numpy operations.
+    """
+    if pd.api.types.is_object_dtype(values) and pd.api.types.infer_dtype(values, skipna=True) in ('date', 'datetime'):
+        values = pd.to_datetime(values)
 
-    df = df.astype(object).where(pd.notnull(df), None)
-    
-    def to_python(x):
-        if hasattr(x, 'item'): return x.item()
-        return x
-        
-    data = [tuple(to_python(x) for x in row) for row in df.to_numpy()]
+    if pd.api.types.is_datetime64_any_dtype(values):
+        days = values.to_numpy(dtype='datetime64[ns]')
+        def convert(start: int, stop: int) -> list:
+            chunk = days[start:stop]
+            out = np.datetime_as_string(chunk, unit='D').astype(object)
+            out[np.isnat(chunk)] = None
+            return out.tolist()
+    elif isinstance(values.dtype, np.dtype) and values.dtype.kind == 'f':
+        floats = values.to_numpy()
+        def convert(start: int, stop: int) -> list:
+            chunk = floats[start:stop]
+            out = chunk.astype(object)
+            out[np.isnan(chunk)] = None
+            return out.tolist()
+    elif isinstance(values.dtype, np.dtype) and values.dtype.kind in 'iub':
+        numbers = values.to_numpy()
+        def convert(start: int, stop: int) -> list:
+            return numbers[start:stop].tolist()
+    else:
+        # strings, mixed objects and nullable extension types (Int64, ...)
+        objects = values.array
+        def convert(start: int, stop: int) -> list:
+            out = np.asarray(objects[start:stop], dtype=object).copy()
+            out[pd.isna(out)] = None
+            return out.tolist()
+    return convert
+
+def iter_row_batches(df: pd.DataFrame, batch_rows: int) -> Iterator[list]:
+    """
+    Yield `df` as lists of up to `batch_rows` row tuples. Columns are converted one slice at a
+    time, so memory stays bounded by the batch size. `df` is not modified.
+    """
+    converters = [_column_converter(df.iloc[:, i]) for i in range(df.shape[1])]
+    for start in range(0, len(df), batch_rows):
+        stop = start + batch_rows
+        yield list(zip(*(convert(start, stop) for convert in converters)))
+
+def _insert_multirow(cursor: Any, sql: str, batches: Iterable[list]) -> int:
+    """
+    Send each batch as one multi-row INSERT ... VALUES (...), (...) statement.
+    Returns the affected row count.
+    """
+    head, row_template, tail = _split_insert(sql)
+    written = 0
+    for batch in batches:
+        statement = f"{head} VALUES {', '.join([row_template] * len(batch))} {tail}"
+        cursor.execute(statement, [value for row in batch for value in row])
+        written += cursor.rowcount
+    return written
+
+def _csv_field(value: Any) -> str:
+    if value is None:
+        return '\\N'
+    if isinstance(value, str):
+        escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        return f'"{escaped}"'
+    return str(value)
+
+def _load_infile(cursor: Any, sql: str, batches: Iterable[list]) -> int:
+    """
+    Stream the row batches to a temporary CSV and bulk load it with LOAD DATA LOCAL INFILE.
+    INSERT IGNORE maps to IGNORE; constant values in the query's VALUES list become SET assignments.
+    Upserts (ON DUPLICATE KEY UPDATE) load into a temporary copy of the table and are applied with
+    INSERT ... SELECT and the query's own UPDATE clause: LOAD DATA's REPLACE would delete the old
+    row, cascading to its children and writing columns the UPDATE clause leaves alone.
+    Returns the affected row count.
+    """
+    head, row_template, tail = _split_insert(sql)
+    match = re.search(r'INTO\s+(\w+)\s*\((.*)\)', head, re.DOTALL)
+    table = match.group(1)
+    columns = [c.strip() for c in match.group(2).split(',')]
+    values = [v.strip() for v in row_template.strip('()').split(',')]
+
+    file_columns = [c for c, v in zip(columns, values) if v == '%s']
+    constants = [f"{c} = {v}" for c, v in zip(columns, values) if v != '%s']
+    upsert = tail.startswith('ON DUPLICATE KEY UPDATE')
+    # Repeated keys within the file: the temporary table keeps the last row, as sequential upserts would
+    duplicates = 'REPLACE' if upsert else 'IGNORE' if 'INSERT IGNORE' in head else ''
+    target = f"{table}_infile" if upsert else table
+
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8', newline='', delete=False) as f:
+        for batch in batches:
+            f.write(''.join(','.join(_csv_field(v) for v in row) + '\n' for row in batch))
+        path = f.name.replace('\\', '/')
+
+    try:
+        if upsert:
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {target}")
+            cursor.execute(f"CREATE TEMPORARY TABLE {target} LIKE {table}")
+        statement = (
+            f"LOAD DATA LOCAL INFILE '{path}' {duplicates} INTO TABLE {target} "
+            "CHARACTER SET utf8mb4 "
+            "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '\\\\' "
+            "LINES TERMINATED BY '\\n' "
+            f"({', '.join(file_columns)})"
+        )
+        if constants:
+            statement += f" SET {', '.join(constants)}"
+        cursor.execute(statement)
+        if not upsert:
+            return cursor.rowcount
+
+        column_list = ', '.join(columns)
+        cursor.execute(f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {target} {tail}")
+        return cursor.rowcount
+    finally:
+        if upsert:
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {target}")
+        os.remove(path)
+
+def insert_dataframe(conn: Any, df: pd.DataFrame, sql: str, db_type: str = 'mysql', loader: str = ETL_LOADER,
+                     report: RunReport = None) -> bool:
+    """
+    Insert `df` with the given load query. Returns False if the insert failed.
+    `loader` picks the MySQL load path (see ETL_LOADER); rows/sec are reported per table, and
+    rows, rows rejected by a failed load, duplicates skipped by INSERT IGNORE, time and errors go to `report`.
+    """
+    if df.empty: return True
+    start = time.time()
+    table = re.search(r'INTO\s+(\w+)', sql).group(1)
 
     cursor = conn.cursor()
     
     if db_type == 'sqlite':
+        loader = 'executemany'
         sql = sql.replace('INSERT IGNORE', 'INSERT OR IGNORE')
+        if 'ON DUPLICATE KEY UPDATE' in sql:
+            # Upserts always write every column, so SQLite's REPLACE is equivalent
+            sql = sql[:sql.index('ON DUPLICATE KEY UPDATE')].rstrip() + ';'
+            sql = sql.replace('INSERT INTO', 'INSERT OR REPLACE INTO', 1)
         sql = sql.replace('%s', '?')
         
+    written = 0
     try:
-        cursor.executemany(sql, data)
+        if loader == 'infile':
+            try:
+                written = _load_infile(cursor, sql, iter_row_batches(df, ETL_BATCH_ROWS))
+            except Exception as e:
+                # e.g. local_infile disabled on the server
+                print(f"LOAD DATA no disponible para {table} ({e}), usando multirow")
+                conn.rollback()
+                loader = 'multirow'
+        if loader == 'multirow':
+            written = _insert_multirow(cursor, sql, iter_row_batches(df, ETL_BATCH_ROWS))
+        elif loader == 'executemany':
+            for batch in iter_row_batches(df, ETL_BATCH_ROWS):
+                cursor.executemany(sql, batch)
+                written += cursor.rowcount
         conn.commit()
     except Exception as e:
         print(f"Error inserting data: {e}")
+        # Nothing of a failed load is kept, so every row counts as rejected
+        conn.rollback()
+        if report is not None:
+            report.add('cargas', tabla=table, filas=len(df), rechazadas=len(df), duplicados_omitidos=None,
+                       segundos=round(time.time() - start, 3), loader=loader, error=str(e))
+        return False
+
+    elapsed = time.time() - start
+    print(f"  {table}: {len(df)} filas en {elapsed:.2f}s ({len(df) / max(elapsed, 1e-6):,.0f} filas/s, {loader})")
+    if report is not None:
+        # Only INSERT IGNORE skips rows (keys already loaded, e.g. dimension rows shared by
+        # overlapping chunks); upserts count updated rows twice on MySQL
+        skipped = max(0, len(df) - written) if 'IGNORE' in sql else 0
+        report.add('cargas', tabla=table, filas=len(df), rechazadas=0, duplicados_omitidos=skipped,
+                   segundos=round(elapsed, 3), loader=loader, error=None)
+    return True
+
+# SSD tables written by a full load, parents first. AGG_TABLES are rebuilt on every run.
+SSD_TABLES = [
+    'dim_anio', 'dim_mes', 'dim_dia', 'dim_tiempo',
+    'dim_estado', 'dim_tipo_proyecto', 'dim_cliente', 'dim_tipo_defecto', 'dim_fase_sdlc',
+    'fact_proyecto', 'fact_defecto',
+    'agg_kpi', 'agg_kpi_defecto'
+]
+AGG_TABLES = ['agg_kpi', 'agg_kpi_defecto']
+STAGING_SUFFIX = '_staging'
+SSD_SCHEMA_FILE = os.path.join(os.path.dirname(root_dir), 'database', 'create_ssd_db.sql')
+
+def ssd_table_ddl(db_type: str = 'mysql', schema_file: str = SSD_SCHEMA_FILE) -> Dict[str, str]:
+    """
+    CREATE TABLE statement of every table in the SSD schema file, keyed by table name.
+    """
+    with open(schema_file, 'r', encoding='utf-8') as f:
+        sql = re.sub(r'/\*.*?\*/|--[^\n]*', '', f.read(), flags=re.DOTALL)
+    if db_type == 'mysql':
+        sql = sql.replace('AUTOINCREMENT', 'AUTO_INCREMENT')
+    ddl = {}
+    for stmt in sql.split(';'):
+        match = re.match(r'\s*CREATE TABLE\s+(?:IF NOT EXISTS\s+)?(\w+)', stmt, re.IGNORECASE)
+        if match:
+            ddl[match.group(1)] = stmt.strip()
+    return ddl
+
+def _ddl_clauses(ddl: str) -> list:
+    """
+    Top-level comma-separated clauses of a CREATE TABLE body, whitespace collapsed.
+    """
+    body = ddl[ddl.index('(') + 1:ddl.rindex(')')]
+    parts, depth, start = [], 0, 0
+    for pos, char in enumerate(body):
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        if char == ',' and depth == 0:
+            parts.append(body[start:pos])
+            start = pos + 1
+    parts.append(body[start:])
+    return [' '.join(part.split()) for part in parts if part.strip()]
+
+def column_definitions(ddl: str) -> Dict[str, str]:
+    """
+    Column name -> definition ("ev DOUBLE") of a CREATE TABLE statement; key and FK clauses are skipped.
+    """
+    columns = {}
+    for definition in _ddl_clauses(ddl):
+        if definition.split()[0].upper() not in ('FOREIGN', 'UNIQUE', 'PRIMARY', 'KEY', 'INDEX', 'CONSTRAINT'):
+            columns[definition.split()[0]] = definition
+    return columns
+
+def foreign_keys(ddl: str) -> list:
+    """
+    FOREIGN KEY clauses of a CREATE TABLE statement.
+    """
+    return [clause for clause in _ddl_clauses(ddl) if clause.upper().startswith('FOREIGN KEY')]
+
+def _table_columns(cursor: Any, table: str, db_type: str) -> list:
+    """
+    Column names of `table`, or None if it does not exist.
+    """
+    if db_type == 'sqlite':
+        cursor.execute(f"PRAGMA table_info({table})")
+        columns = [row[1] for row in cursor.fetchall()]
+    else:
+        cursor.execute("SELECT column_name FROM information_schema.columns "
+                       "WHERE table_schema = DATABASE() AND table_name = %s", (table,))
+        columns = [row[0] for row in cursor.fetchall()]
+    return columns or None
+
+def migrate_ssd_schema(conn: Any, db_type: str = 'mysql', schema_file: str = SSD_SCHEMA_FILE) -> list:
+    """
+    Bring an existing SSD up to the schema file before loading: create the tables it lacks
+    (agg_kpi, agg_kpi_defecto, etl_run) and add missing columns (fact_proyecto.ev ... on_time,
+    agg_kpi_defecto.con_tipo) with ALTER TABLE ... ADD COLUMN. Idempotent; returns what it changed.
+    """
+    cursor = conn.cursor()
+    changes = []
+    for table, ddl in ssd_table_ddl(db_type, schema_file).items():
+        existing = _table_columns(cursor, table, db_type)
+        if existing is None:
+            cursor.execute(ddl)
+            changes.append(f"CREATE TABLE {table}")
+            continue
+        for column, definition in column_definitions(ddl).items():
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {definition}")
+                changes.append(f"{table}.{column}")
+    conn.commit()
+    return changes
+
+def retarget_sql(sql: str, table: str, target: str) -> str:
+    """
+    Point a load query written for `table` at `target` (e.g. its staging copy).
+    """
+    if table == target:
+        return sql
+    return re.sub(rf'\bINTO\s+{table}\b', f'INTO {target}', sql, count=1)
+
+def _drop_tables(conn: Any, names: list, db_type: str = 'mysql') -> None:
+    """
+    Drop `names` in the given order. On MySQL FK checks are off meanwhile, so a table that
+    something outside `names` still references can go too.
+    """
+    cursor = conn.cursor()
+    if db_type == 'mysql':
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0;")
+    try:
+        for name in names:
+            cursor.execute(f"DROP TABLE IF EXISTS {name};")
+    finally:
+        if db_type == 'mysql':
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1;")
+    conn.commit()
+
+def drop_staging_tables(conn: Any, tables: list, db_type: str = 'mysql') -> None:
+    # Children first: staging copies reference their staging parents
+    _drop_tables(conn, [table + STAGING_SUFFIX for table in reversed(tables)], db_type)
+
+def staging_tables_exist(conn: Any, tables: list) -> bool:
+    cursor = conn.cursor()
+    for table in tables:
+        try:
+            cursor.execute(f"SELECT 1 FROM {table}{STAGING_SUFFIX} LIMIT 1;")
+            cursor.fetchall()
+        except Exception:
+            return False
+    return True
+
+def _reference_staging(fk: str, tables: list) -> str:
+    """
+    Point a FOREIGN KEY clause at the staging copy of its parent when the parent is staged too.
+    """
+    parent = re.search(r'\bREFERENCES\s+(\w+)', fk).group(1)
+    if parent not in tables:
+        return fk
+    return re.sub(rf'\bREFERENCES\s+{parent}\b', f'REFERENCES {parent}{STAGING_SUFFIX}', fk, count=1)
+
+def create_staging_tables(conn: Any, tables: list, db_type: str = 'mysql') -> None:
+    """
+    Create an empty `<table>_staging` copy of each table, dropping leftovers of a failed run.
+    MySQL copies columns and indexes with CREATE TABLE ... LIKE, which leaves out foreign keys:
+    those of the schema file are added back, pointing at the staging copy of every parent in
+    `tables`, so RENAME TABLE carries them over to the live names on the swap.
+    SQLite reuses the table's own DDL, foreign keys included.
+    """
+    drop_staging_tables(conn, tables, db_type)
+    cursor = conn.cursor()
+    ddl = ssd_table_ddl(db_type) if db_type == 'mysql' else {}
+    for table in tables:
+        staging = table + STAGING_SUFFIX
+        if db_type == 'mysql':
+            cursor.execute(f"CREATE TABLE {staging} LIKE {table};")
+            fks = [_reference_staging(fk, tables) for fk in foreign_keys(ddl[table])] if table in ddl else []
+            if fks:
+                cursor.execute(f"ALTER TABLE {staging} {', '.join('ADD ' + fk for fk in fks)};")
+        else:
+            cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+            table_ddl = cursor.fetchone()[0]
+            cursor.execute(re.sub(rf'^CREATE TABLE\s+(IF NOT EXISTS\s+)?"?{table}"?', f'CREATE TABLE {staging}', table_ddl, count=1))
+    conn.commit()
+
+def swap_staging_tables(conn: Any, tables: list, db_type: str = 'mysql') -> None:
+    """
+    Atomically replace each table with its staging copy; the previous data ends up in `<table>_old`
+    and is dropped afterwards.
+    """
+    # InnoDB foreign keys follow a renamed parent, so the *_old tables reference each other
+    # after a swap: drop them children first (`tables` is in load order, parents first)
+    old_tables = [f"{table}_old" for table in reversed(tables)]
+    _drop_tables(conn, old_tables, db_type)
+    cursor = conn.cursor()
+
+    if db_type == 'mysql':
+        # A single RENAME TABLE statement swaps every table at once
+        renames = []
+        for table in tables:
+            renames.append(f"{table} TO {table}_old")
+            renames.append(f"{table}{STAGING_SUFFIX} TO {table}")
+        cursor.execute(f"RENAME TABLE {', '.join(renames)};")
+    else:
+        # SQLite DDL is transactional; legacy_alter_table keeps other tables' foreign keys
+        # pointing at the table name instead of following the rename to *_old
+        conn.commit()
+        cursor.execute("PRAGMA legacy_alter_table = ON;")
+        cursor.execute("BEGIN;")
+        try:
+            for table in tables:
+                cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_old;")
+                cursor.execute(f"ALTER TABLE {table}{STAGING_SUFFIX} RENAME TO {table};")
+            cursor.execute("COMMIT;")
+        except Exception:
+            cursor.execute("ROLLBACK;")
+            raise
+        finally:
+            cursor.execute("PRAGMA legacy_alter_table = OFF;")
+
+    _drop_tables(conn, old_tables, db_type)
+
+def rebuild_agg_kpi(conn: Any, queries: Dict[str, str]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Rebuild the KPI summary tables from the facts already in the SSD.
+    Used by incremental runs, where the transform only sees the changed projects.
+    """
+    projects = pd.read_sql(queries['select_agg_projects'], conn)
+    defects = pd.read_sql(queries['select_agg_defects'], conn)
+    clients = pd.read_sql(queries['select_agg_clients'], conn)
+
+    # MySQL returns DECIMAL columns as Decimal objects
+    measures = projects.columns.drop(['proyecto_id', 'tipo_proyecto_id', 'estado_id', 'cliente_id', 'fecha_inicio_real'])
+    projects[measures] = projects[measures].astype(float)
+
+    return build_agg_kpi(projects, defects, clients)
+
+def record_etl_run(config: Dict[str, str], sql: str, report: Dict[str, Any], db_type: str = 'mysql') -> None:
+    """
+    Store the run report as a row of etl_run and fill in its run_id. A 'publicado' row is the
+    new warehouse version: the dashboard API drops its KPI cache when it changes.
+    """
+    if db_type == 'sqlite':
+        sql = sql.replace('%s', '?')
+
+    loads = [entry for entry in report['cargas'] if entry['error'] is None]
+    rejected = sum(entry['rechazadas'] for entry in report['cargas'])
+    conn = get_db_connection(config, db_type)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, (
+            report['inicio'], report['fin'], report['modo'], report['estado'], report['duracion_s'],
+            sum(entry['filas'] for entry in loads), rejected,
+            report['pico_rss_mb'].get('proceso'), json.dumps(report)
+        ))
+        conn.commit()
+        report['run_id'] = cursor.lastrowid
+    except Exception as e:
+        print(f"Error recording ETL run: {e}")
+    finally:
+        conn.close()
+
+def write_run_report(report_dir: str, report: Dict[str, Any]) -> None:
+    os.makedirs(report_dir, exist_ok=True)
+    path = os.path.join(report_dir, f"etl_run_{time.strftime('%Y%m%d_%H%M%S')}_{report['run_id'] or 'local'}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Reporte de ejecución: {path}")
+
+def combine_agg(parts: list, keys: list) -> pd.DataFrame:
+    """
+    Merge summary rows built from separate project chunks; every measure is additive.
+    """
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts, ignore_index=True).groupby(keys, dropna=False).sum().reset_index()
+
+# Source rows flagged after a successful load: key in `tables` -> (table, key columns).
+# Every extracted row is flagged, open projects included; the PMO's update triggers (create_pmo_db.sql)
+# reset the flag when a row changes.
+SOURCE_FLAGS = {
+    'projects': ('proyecto', ('proyecto_id',)),
+    'tasks': ('tarea', ('tarea_id',)),
+    'finances': ('finanzas_proyecto', ('id',)),
+    'project_employees': ('proyecto_empleado', ('proyecto_id', 'empleado_id')),
+    'defects': ('defecto', ('defecto_id',))
+}
+
+def collect_extracted_ids(tables: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """
+    Keys of every extracted row, per source table to flag.
+    """
+    extracted = {}
+    for key, (table_name, key_cols) in SOURCE_FLAGS.items():
+        if key in tables and not tables[key].empty:
+            extracted[table_name] = tables[key][list(key_cols)].drop_duplicates().reset_index(drop=True)
+    return extracted
+
+def _mark_in_lists(cursor: Any, table_name: str, key_cols: tuple, keys: list, db_type: str) -> int:
+    """
+    UPDATE ... WHERE key IN (...) per chunk of keys (row values for composite keys). Returns the statement count.
+    """
+    marker = '?' if db_type == 'sqlite' else '%s'
+    row = marker if len(key_cols) == 1 else f"({', '.join([marker] * len(key_cols))})"
+    target = key_cols[0] if len(key_cols) == 1 else f"({', '.join(key_cols)})"
+    # SQLite limit is usually 999 variables, so chunk it
+    chunk_size = 500 // len(key_cols)
+    statements = 0
+    for i in range(0, len(keys), chunk_size):
+        chunk = keys[i:i + chunk_size]
+        cursor.execute(f"UPDATE {table_name} SET metadata_extraccion = 1 WHERE {target} IN ({', '.join([row] * len(chunk))})",
+                       [value for key in chunk for value in key])
+        statements += 1
+    return statements
 
-def main():
+def _mark_join(cursor: Any, table_name: str, key_cols: tuple, keys: list, db_type: str) -> int:
+    """
+    Load the keys into a temporary table and flag the source rows with one join UPDATE.
+    Returns the statement count (the key load counts once per batch).
+    """
+    temp = f"tmp_marcar_{table_name}"
+    columns = ', '.join(key_cols)
+    cursor.execute(f"CREATE TEMPORARY TABLE {temp} ({', '.join(f'{c} BIGINT NOT NULL' for c in key_cols)}, "
+                   f"PRIMARY KEY ({columns}))")
+    marker = '?' if db_type == 'sqlite' else '%s'
+    insert = f"INSERT INTO {temp} ({columns}) VALUES ({', '.join([marker] * len(key_cols))})"
+    for i in range(0, len(keys), MARK_KEY_BATCH):
+        cursor.executemany(insert, keys[i:i + MARK_KEY_BATCH])
+    if db_type == 'sqlite':
+        target = key_cols[0] if len(key_cols) == 1 else f"({columns})"
+        cursor.execute(f"UPDATE {table_name} SET metadata_extraccion = 1 WHERE {target} IN (SELECT {columns} FROM {temp})")
+        cursor.execute(f"DROP TABLE temp.{temp}")
+    else:
+        on = ' AND '.join(f"t.{c} = k.{c}" for c in key_cols)
+        cursor.execute(f"UPDATE {table_name} AS t JOIN {temp} AS k ON {on} SET t.metadata_extraccion = 1")
+        cursor.execute(f"DROP TEMPORARY TABLE {temp}")
+    return 3 + (len(keys) + MARK_KEY_BATCH - 1) // MARK_KEY_BATCH
+
+def mark_source_rows(config: Dict[str, str], extracted_ids: Dict[str, list], db_type: str = 'mysql',
+                     mode: str = ETL_MARK_MODE) -> bool:
+    """
+    Set metadata_extraccion = 1 on the extracted source rows (`extracted_ids` maps each table
+    to the key frames collected chunk by chunk), in one transaction. `mode` is 'join' or 'in'
+    (see ETL_MARK_MODE). Returns False if the update failed.
+    """
+    key_columns = dict(SOURCE_FLAGS.values())
+    mark = _mark_join if mode == 'join' else _mark_in_lists
+
+    # Re-open connection to PMO for updates (or reuse if possible, but safe to new)
+    conn_pmo_update = get_db_connection(config, db_type=db_type)
+    cursor_pmo = conn_pmo_update.cursor()
+    
+    try:
+        statements = 0
+        for table_name, frames in extracted_ids.items():
+            keys = pd.concat(frames).drop_duplicates() if frames else None
+            if keys is None or keys.empty: continue
+            key_cols = key_columns[table_name]
+            rows = list(zip(*(keys[c].tolist() for c in key_cols)))
+            statements += mark(cursor_pmo, table_name, key_cols, rows, db_type)
+        
+        conn_pmo_update.commit()
+        print(f"  {statements} sentencias ({mode})")
+        return True
+    except Exception as e:
+        print(f"Error updating source metadata: {e}")
+        conn_pmo_update.rollback()
+        return False
+    finally:
+        conn_pmo_update.close()
+
+def project_chunks(config: Dict[str, str], queries: Dict[str, str], db_type: str, chunk_projects: int) -> list:
+    """
+    proyecto_id ranges [start, end) of `chunk_projects` ids each, or [None] (a single chunk
+    with every project) when streaming is off.
+    """
+    if chunk_projects <= 0:
+        return [None]
+    bounds, _ = _run_extraction(get_connection_factory(config, db_type), queries['project_id_bounds'])
+    min_id, max_id = bounds.iloc[0]['min_id'], bounds.iloc[0]['max_id']
+    if pd.isnull(min_id):
+        return []
+    return [(start, start + chunk_projects) for start in range(int(min_id), int(max_id) + 1, chunk_projects)]
+
+FACT_PROYECTO_COLUMNS = [
+    'fact_id', 'proyecto_id', 'nombre', 'descripcion', 'horas_planificadas', 'horas_trabajadas',
+    'monto_planificado', 'monto_real', 'ganancia_proyecto', 'tareas_planificadas',
+    'tareas_completadas', 'tareas_retrasadas', 'empleados_asignados', 'roi', 'tuct',
+    'ev', 'spi', 'cpi', 'delay_days', 'on_time',
+    'fecha_inicio_plan', 'fecha_fin_plan', 'fecha_inicio_real', 'fecha_fin_real',
+    'estado_id', 'tipo_proyecto_id', 'cliente_id'
+]
+AGG_KPI_COLUMNS = AGG_KEYS + [
+    'n_proyectos', 'ganancia_proyecto', 'roi', 'monto_planificado', 'monto_real', 'ev',
+    'tareas_planificadas', 'tareas_completadas', 'tareas_retrasadas',
+    'horas_planificadas', 'horas_trabajadas', 'empleados_asignados',
+    'proyectos_a_tiempo', 'dias_retraso'
+]
+AGG_KPI_DEFECTO_COLUMNS = AGG_KEYS + ['severidad', 'fase_id', 'n_defectos', 'con_tipo']
+
+def main(resume: bool = False, migrate_only: bool = False):
     """
     Función principal de orquestación del ETL.
+
+    The SSD schema is migrated first (see migrate_ssd_schema); `migrate_only` stops there.
+
+    With ETL_CHUNK_PROJECTS > 0 the per-project tables are streamed in proyecto_id ranges:
+    each chunk is extracted (the next one in the background), transformed and loaded before
+    moving on, so memory stays bounded by the chunk size.
+
+    With a staging cache (ETL_STAGING_DIR) every table load, chunk, the publish and the source
+    marking are checkpointed. `resume` continues a failed run: cached chunks are not
+    re-extracted, loaded chunks are not re-transformed and the SSD staging tables are kept.
     """
+    try:
+        _run_etl(resume, migrate_only)
+    finally:
+        dispose_engines()
+
+def _run_etl(resume: bool, migrate_only: bool):
     base_dir = os.path.dirname(os.path.abspath(__file__))
     extraction_file = os.path.join(base_dir, 'sql_queries', 'extraction_queries.sql')
     load_file = os.path.join(base_dir, 'sql_queries', 'load_queries.sql')
@@ -350,151 +1243,300 @@ def main():
     ssd_config = get_db_config('SSD')
     
     print(f"DEBUG CONFIG: PMO_PORT={pmo_config.get('port')}, SSD_PORT={ssd_config.get('port')}")
-    print(f"--- INICIO ETL ({DB_TYPE}) ---")
+    print(f"--- INICIO ETL ({DB_TYPE}, {ETL_MODE}) ---")
     total_start_time = time.time()
+    ext_time = trans_time = load_time = update_time = 0.0
+    report = RunReport(ETL_MODE, DB_TYPE)
+
+    # 0. ESQUEMA: tables and columns added to the SSD since it was created
+    ssd_conn = get_db_connection(ssd_config, db_type=DB_TYPE)
+    try:
+        changes = migrate_ssd_schema(ssd_conn, DB_TYPE)
+    finally:
+        ssd_conn.close()
+    print(f"Esquema SSD actualizado: {', '.join(changes)}" if changes else "Esquema SSD al día.")
+    if migrate_only:
+        return
+
+    # 1. EXTRACCIÓN (tablas de referencia)
+    staging_dir = ETL_STAGING_DIR
+    if staging_dir and pa is None:
+        if ETL_STAGING == 'replay':
+            print("Error: ETL_STAGING=replay requiere pyarrow.")
+            return
+        print("Warning: pyarrow no está instalado, cache de staging desactivada.")
+        staging_dir = ''
+    replay = bool(staging_dir) and ETL_STAGING == 'replay'
+
+    checkpoint = None
+    if resume:
+        if not staging_dir:
+            print("Error: --resume requiere la cache de staging (ETL_STAGING_DIR y pyarrow).")
+            return
+        checkpoint = read_checkpoint(staging_dir, ETL_MODE)
+        if checkpoint is None:
+            print("Sin checkpoint que reanudar: ejecución completa.")
+        elif checkpoint['marcado']:
+            print("La última ejecución terminó correctamente, no hay nada que reanudar.")
+            return
+        else:
+            print(f"Reanudando la ejecución iniciada el {checkpoint['inicio']}...")
+    resumed = checkpoint is not None
+    already_published = resumed and checkpoint['publicado']
+    report.data['reanudada'] = resumed
 
-    # 1. EXTRACCIÓN
     start_ext = time.time()
-    print("Extrayendo datos...")
-    tables = extract_data(pmo_config, extraction_queries, db_type=DB_TYPE)
-    ext_time = time.time() - start_ext
-    print(f"Extracción completada en {ext_time:.2f}s")
-
-    # 2. TRANSFORMACIÓN
-    start_trans = time.time()
-    print("Transformando datos...")
-    (fact_df, dim_estado, dim_tipo, dim_tiempo, dim_dia, dim_mes, dim_anio, 
-     dim_cliente, dim_tipo_defecto, dim_fase, fact_defecto) = transform_data(tables)
-    trans_time = time.time() - start_trans
-    print(f"Transformación completada en {trans_time:.2f}s")
-
-    # 3. CARGA
-    start_load = time.time()
-    print("Cargando datos...")
+    if replay or resumed:
+        print(f"Extrayendo datos de la cache de staging ({staging_dir})...")
+        manifest = read_staging_manifest(staging_dir, ETL_MODE, require_complete=replay)
+        lookups = read_staging(staging_dir, manifest['parts']['lookups'])
+        chunks = [tuple(r) if r is not None else None for r in manifest['chunks']]
+    else:
+        print("Extrayendo datos...")
+        lookups = extract_data(pmo_config, extraction_queries, db_type=DB_TYPE, names=LOOKUP_QUERIES, report=report)
+        chunks = project_chunks(pmo_config, extraction_queries, DB_TYPE, ETL_CHUNK_PROJECTS)
+        if staging_dir:
+            # Each chunk is added to the manifest as it is extracted; replay needs all of them
+            manifest = {'mode': ETL_MODE, 'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                        'chunks': chunks, 'complete': not chunks,
+                        'parts': {'lookups': write_staging(staging_dir, 'lookups', lookups)}}
+            write_staging_json(staging_dir, STAGING_MANIFEST, manifest)
+            checkpoint = new_checkpoint(ETL_MODE)
+            write_staging_json(staging_dir, CHECKPOINT_FILE, checkpoint)
+    ext_time += time.time() - start_ext
+    if ETL_CHUNK_PROJECTS > 0:
+        print(f"Modo streaming: {len(chunks)} bloques de {ETL_CHUNK_PROJECTS} proyecto_id")
+
     ssd_conn = get_db_connection(ssd_config, db_type=DB_TYPE)
-    
-    # --- TRUNCATE TABLES ---
-    print("Vaciando tablas destino (Clean Load)...")
-    cursor = ssd_conn.cursor()
+
+    # Full loads go to shadow tables swapped in at the end; incremental runs upsert the live
+    # tables and only stage the summaries they rebuild. Readers never see a half-loaded table.
+    staged_tables = SSD_TABLES if ETL_MODE == 'full' else AGG_TABLES
+    published = failed = keep_staging = False
+    loaded_projects = 0
+    extracted_ids: Dict[str, list] = {}
+
+    def save_checkpoint(**changes: Any) -> None:
+        if checkpoint is not None:
+            checkpoint.update(changes)
+            write_staging_json(staging_dir, CHECKPOINT_FILE, checkpoint)
+
+    def load(part: str, table: str, df: pd.DataFrame, columns: list, query_name: str) -> bool:
+        """
+        Load one table of a part ('lookups', 'chunk_NNNN'; None = not checkpointed), skipping it
+        if the checkpoint already has it.
+        """
+        checkpointed = checkpoint is not None and part is not None
+        if df.empty or (checkpointed and table in checkpoint['cargas'].get(part, [])):
+            return True
+        target = table + STAGING_SUFFIX if table in staged_tables else table
+        loaded = insert_dataframe(ssd_conn, df[columns], retarget_sql(load_queries[query_name], table, target), DB_TYPE,
+                                  report=report)
+        if loaded and checkpointed:
+            checkpoint['cargas'].setdefault(part, []).append(table)
+            save_checkpoint()
+        return loaded
+
+    def extract_chunk(i: int) -> Tuple[Dict[str, pd.DataFrame], float]:
+        start = time.time()
+        part = f"chunk_{i:04d}"
+        if checkpoint is not None and part in checkpoint['bloques']:
+            return None, 0.0  # transformed and loaded before the failure
+        if replay or (resumed and part in manifest['parts']):
+            return read_staging(staging_dir, manifest['parts'][part]), time.time() - start
+        chunk_tables = extract_data(pmo_config, extraction_queries, db_type=DB_TYPE, mode=ETL_MODE,
+                                    names=PROJECT_QUERIES, project_range=chunks[i], connect=connect, report=report)
+        if staging_dir:
+            manifest['parts'][part] = write_staging(staging_dir, part, chunk_tables)
+            manifest['complete'] = len(manifest['parts']) == len(chunks) + 1
+            write_staging_json(staging_dir, STAGING_MANIFEST, manifest)
+        return chunk_tables, time.time() - start
+
+    workers = max(1, min(ETL_EXTRACT_WORKERS, len(PROJECT_QUERIES)))
+    cached = replay or (resumed and manifest['complete'])
+    connect = None if cached else get_connection_factory(pmo_config, DB_TYPE, pool_size=workers)
+
     try:
-        if DB_TYPE == 'mysql':
-            cursor.execute("SET FOREIGN_KEY_CHECKS = 0;")
-        
-        tables_to_truncate = [
-            'fact_defecto', 'fact_proyecto', 
-            'dim_fase_sdlc', 'dim_tipo_defecto', 'dim_cliente', 
-            'dim_tipo_proyecto', 'dim_estado', 'dim_tiempo', 
-            'dim_dia', 'dim_mes', 'dim_anio'
+        if ETL_MODE == 'full' and not already_published:
+            if resumed and checkpoint['staging_creado'] and staging_tables_exist(ssd_conn, staged_tables):
+                print("Reanudando sobre las tablas de staging existentes...")
+            else:
+                print("Preparando tablas de staging...")
+                create_staging_tables(ssd_conn, staged_tables, DB_TYPE)
+                save_checkpoint(staging_creado=True, cargas={}, bloques={})
+
+        # Load descriptive dimensions once
+        start_load = time.time()
+        print("Cargando dimensiones...")
+        dim_estado, dim_tipo, dim_cliente, dim_tipo_defecto, dim_fase = transform_lookups(lookups)
+        dim_tipo_load = dim_tipo.rename(columns={'nombre_tipo': 'nombre'})
+        dim_fase_load = dim_fase.rename(columns={'fase_id': 'fase_sdlc_id'})
+        results = [
+            load('lookups', 'dim_estado', dim_estado, ['estado_id', 'nombre_estado'], 'load_dim_estado'),
+            load('lookups', 'dim_tipo_proyecto', dim_tipo_load, ['tipo_proyecto_id', 'nombre'], 'load_dim_tipo_proyecto'),
+            load('lookups', 'dim_cliente', dim_cliente, ['cliente_id', 'nombre_cliente', 'sector', 'pais'], 'load_dim_cliente'),
+            load('lookups', 'dim_tipo_defecto', dim_tipo_defecto, ['tipo_defecto_id', 'nombre_tipo_defecto'], 'load_dim_tipo_defecto'),
+            load('lookups', 'dim_fase_sdlc', dim_fase_load, ['fase_sdlc_id', 'nombre_fase'], 'load_dim_fase_sdlc')
         ]
-        
-        for table in tables_to_truncate:
-            try:
-                if DB_TYPE == 'mysql':
-                    cursor.execute(f"TRUNCATE TABLE {table};")
+        load_time += time.time() - start_load
+
+        agg_parts, agg_defecto_parts = [], []
+        transform_pool = ProcessPoolExecutor(max_workers=ETL_TRANSFORM_WORKERS) if ETL_TRANSFORM_WORKERS > 1 else nullcontext()
+        with ThreadPoolExecutor(max_workers=1) as prefetch, transform_pool:
+            pending = prefetch.submit(extract_chunk, 0) if chunks else None
+            for i, project_range in enumerate(chunks):
+                # 1. EXTRACCIÓN (the next chunk is read while this one is transformed and loaded)
+                tables, chunk_ext_time = pending.result()
+                ext_time += chunk_ext_time
+                pending = prefetch.submit(extract_chunk, i + 1) if i + 1 < len(chunks) else None
+                part = f"chunk_{i:04d}"
+                if tables is None:
+                    # Done before the failure: reuse its saved summary partials and extracted IDs
+                    done = checkpoint['bloques'][part]
+                    saved = read_staging(staging_dir, done['resultados'])
+                    agg_parts.append(saved.pop('agg_kpi'))
+                    agg_defecto_parts.append(saved.pop('agg_kpi_defecto'))
+                    loaded_projects += done['proyectos']
+                    for name, keys in saved.items():
+                        extracted_ids.setdefault(name[len('ids_'):], []).append(keys)
+                    print(f"Bloque {i + 1}/{len(chunks)} ya cargado, se omite")
+                    continue
+                tables.update(lookups)
+                if project_range is not None:
+                    print(f"Bloque {i + 1}/{len(chunks)}: proyecto_id [{project_range[0]}, {project_range[1]})")
                 else:
-                    cursor.execute(f"DELETE FROM {table};")
-            except Exception as e:
-                print(f"Error truncating {table}: {e}")
-                
-        if DB_TYPE == 'mysql':
-            cursor.execute("SET FOREIGN_KEY_CHECKS = 1;")
-        ssd_conn.commit()
-        print("Tablas vaciadas correctamente.")
-    except Exception as e:
-        print(f"Error durante vaciado: {e}")
-    # -----------------------
-    
-    try:
-        # Load Dimensions
-        insert_dataframe(ssd_conn, dim_anio[['anio_id', 'anio']], load_queries['load_dim_anio'], DB_TYPE)
-        insert_dataframe(ssd_conn, dim_mes[['mes_id', 'nombre_mes', 'numero_mes', 'trimestre', 'anio_id']], load_queries['load_dim_mes'], DB_TYPE)
-        
-        dim_dia_load = dim_dia.rename(columns={'dia': 'numero_dia'})
-        insert_dataframe(ssd_conn, dim_dia_load[['dia_id', 'nombre_dia', 'numero_dia', 'mes_id']], load_queries['load_dim_dia'], DB_TYPE)
-        
-        insert_dataframe(ssd_conn, dim_tiempo[['tiempo_id', 'fecha', 'dia_id']], load_queries['load_dim_tiempo'], DB_TYPE)
-        insert_dataframe(ssd_conn, dim_estado[['estado_id', 'nombre_estado']], load_queries['load_dim_estado'], DB_TYPE)
-        
-        dim_tipo_load = dim_tipo.rename(columns={'nombre_tipo': 'nombre'})
-        insert_dataframe(ssd_conn, dim_tipo_load[['tipo_proyecto_id', 'nombre']], load_queries['load_dim_tipo_proyecto'], DB_TYPE)
+                    print(f"Extracción completada en {chunk_ext_time:.2f}s")
 
-        insert_dataframe(ssd_conn, dim_cliente[['cliente_id', 'nombre_cliente', 'sector', 'pais']], load_queries['load_dim_cliente'], DB_TYPE)
-        insert_dataframe(ssd_conn, dim_tipo_defecto[['tipo_defecto_id', 'nombre_tipo_defecto']], load_queries['load_dim_tipo_defecto'], DB_TYPE)
-        
-        dim_fase_load = dim_fase.rename(columns={'fase_id': 'fase_sdlc_id'})
-        insert_dataframe(ssd_conn, dim_fase_load[['fase_sdlc_id', 'nombre_fase']], load_queries['load_dim_fase_sdlc'], DB_TYPE)
-
-        # Load Fact Proyecto
-        if not fact_df.empty:
-            insert_dataframe(ssd_conn, fact_df[[
-                'fact_id', 'proyecto_id', 'nombre', 'descripcion', 'horas_planificadas', 'horas_trabajadas',
-                'monto_planificado', 'monto_real', 'ganancia_proyecto', 'tareas_planificadas',
-                'tareas_completadas', 'tareas_retrasadas', 'empleados_asignados', 'roi', 'tuct',
-                'fecha_inicio_plan', 'fecha_fin_plan', 'fecha_inicio_real', 'fecha_fin_real',
-                'estado_id', 'tipo_proyecto_id', 'cliente_id'
-            ]], load_queries['load_fact_proyecto'], DB_TYPE)
-
-        # Load Fact Defecto
-        if not fact_defecto.empty:
-            insert_dataframe(ssd_conn, fact_defecto[[
-                'proyecto_id', 'tipo_defecto_id', 'fase_id', 'severidad', 'tiempo_id'
-            ]], load_queries['load_fact_defecto'], DB_TYPE)
-        
+                # 2. TRANSFORMACIÓN
+                start_trans = time.time()
+                print("Transformando datos...")
+                (fact_df, _, _, dim_tiempo, dim_dia, dim_mes, dim_anio,
+                 _, _, _, fact_defecto, agg_kpi, agg_kpi_defecto) = transform_data(
+                    tables, executor=transform_pool if ETL_TRANSFORM_WORKERS > 1 else None, shards=ETL_TRANSFORM_WORKERS)
+                trans_time += time.time() - start_trans
+                print(f"Transformación completada en {time.time() - start_trans:.2f}s")
+                report.add('transformaciones', paso='proyectos', rango=list(project_range) if project_range else None,
+                           filas_entrada={name: len(tables[name]) for name in EXTRACTION_MAPPING.values()},
+                           filas_salida={'fact_proyecto': len(fact_df), 'fact_defecto': len(fact_defecto),
+                                         'dim_tiempo': len(dim_tiempo), 'agg_kpi': len(agg_kpi),
+                                         'agg_kpi_defecto': len(agg_kpi_defecto)},
+                           segundos=round(time.time() - start_trans, 3))
+
+                # 3. CARGA (parents first)
+                start_load = time.time()
+                print("Cargando datos...")
+                dim_dia_load = dim_dia.rename(columns={'dia': 'numero_dia'})
+                chunk_results = [
+                    load(part, 'dim_anio', dim_anio, ['anio_id', 'anio'], 'load_dim_anio'),
+                    load(part, 'dim_mes', dim_mes, ['mes_id', 'nombre_mes', 'numero_mes', 'trimestre', 'anio_id'], 'load_dim_mes'),
+                    load(part, 'dim_dia', dim_dia_load, ['dia_id', 'nombre_dia', 'numero_dia', 'mes_id'], 'load_dim_dia'),
+                    load(part, 'dim_tiempo', dim_tiempo, ['tiempo_id', 'fecha', 'dia_id'], 'load_dim_tiempo'),
+                    load(part, 'fact_proyecto', fact_df, FACT_PROYECTO_COLUMNS, 'load_fact_proyecto'),
+                    load(part, 'fact_defecto', fact_defecto,
+                         ['defecto_id', 'proyecto_id', 'tipo_defecto_id', 'fase_id', 'severidad', 'tiempo_id'], 'load_fact_defecto')
+                ]
+                results += chunk_results
+                load_time += time.time() - start_load
+
+                chunk_ids = collect_extracted_ids(tables)
+                agg_parts.append(agg_kpi)
+                agg_defecto_parts.append(agg_kpi_defecto)
+                loaded_projects += len(fact_df)
+                for table_name, keys in chunk_ids.items():
+                    extracted_ids.setdefault(table_name, []).append(keys)
+                if checkpoint is not None and all(chunk_results):
+                    saved = {'agg_kpi': agg_kpi, 'agg_kpi_defecto': agg_kpi_defecto}
+                    saved.update({f"ids_{name}": keys for name, keys in chunk_ids.items()})
+                    checkpoint['bloques'][part] = {'proyectos': len(fact_df),
+                                                   'resultados': write_staging(staging_dir, f"results/{part}", saved)}
+                    save_checkpoint()
+                del tables, fact_df, fact_defecto
+
+        print(f"Extracción: {ext_time:.2f}s, Transformación: {trans_time:.2f}s")
+
+        if already_published:
+            print("La carga ya estaba publicada, solo queda marcar la fuente.")
+            published = True
+        elif ETL_MODE == 'incremental' and loaded_projects == 0:
+            print("Sin cambios en proyectos cerrados, no hay nada que cargar.")
+        else:
+            start_load = time.time()
+            # Summary measures are additive: chunk partials are merged. Incremental runs only
+            # transformed the changed projects, so they rebuild the summaries from the SSD facts.
+            if ETL_MODE == 'incremental':
+                agg_kpi, agg_kpi_defecto = rebuild_agg_kpi(ssd_conn, load_queries)
+                create_staging_tables(ssd_conn, staged_tables, DB_TYPE)
+            else:
+                agg_kpi = combine_agg(agg_parts, AGG_KEYS)
+                agg_kpi_defecto = combine_agg(agg_defecto_parts, AGG_KEYS + ['severidad', 'fase_id'])
+                if resumed:
+                    # The failed run may have loaded its summaries into the kept staging tables
+                    cursor = ssd_conn.cursor()
+                    for table in AGG_TABLES:
+                        cursor.execute(f"DELETE FROM {table}{STAGING_SUFFIX};")
+                    ssd_conn.commit()
+            report.add('transformaciones', paso='agregados', rango=None,
+                       filas_entrada={'agg_kpi': sum(len(part) for part in agg_parts),
+                                      'agg_kpi_defecto': sum(len(part) for part in agg_defecto_parts)},
+                       filas_salida={'agg_kpi': len(agg_kpi), 'agg_kpi_defecto': len(agg_kpi_defecto)},
+                       segundos=round(time.time() - start_load, 3))
+
+            # Load KPI summary tables (rebuilt from the chunk partials, so never checkpointed)
+            results += [
+                load(None, 'agg_kpi', agg_kpi, AGG_KPI_COLUMNS, 'load_agg_kpi'),
+                load(None, 'agg_kpi_defecto', agg_kpi_defecto, AGG_KPI_DEFECTO_COLUMNS, 'load_agg_kpi_defecto')
+            ]
+
+            if all(results):
+                swap_staging_tables(ssd_conn, staged_tables, DB_TYPE)
+                published = True
+                save_checkpoint(publicado=True)
+            elif checkpoint is not None:
+                print("Carga incompleta: se mantienen las tablas publicadas, staging conservado para --resume.")
+                keep_staging = True
+            else:
+                print("Carga incompleta: se mantienen las tablas publicadas, staging descartado.")
+            load_time += time.time() - start_load
+        if not keep_staging:
+            drop_staging_tables(ssd_conn, staged_tables, DB_TYPE)
+    except Exception as e:
+        print(f"Error durante la carga: {e}")
+        failed = True
     finally:
         ssd_conn.close()
         
-    load_time = time.time() - start_load
     print(f"Carga completada en {load_time:.2f}s")
 
-    # --- 4. Update Source (Incremental Logic) ---
-    print("Actualizando fuente (marcando registros extraídos)...")
-    start_update = time.time()
-    
-    # Define which tables need updating and their ID columns
-    update_map = {
-        'projects': ('proyecto', 'proyecto_id'),
-        'tasks': ('tarea', 'tarea_id'),
-        'finances': ('finanzas_proyecto', 'id'),
-        'defects': ('defecto', 'defecto_id')
-        # 'project_employees': ('proyecto_empleado', ['proyecto_id', 'empleado_id']) # Composite key handling is complex, skipping for simplicity or need custom logic
-    }
-    
-    # Re-open connection to PMO for updates (or reuse if possible, but safe to new)
-    conn_pmo_update = get_db_connection(pmo_config, db_type=DB_TYPE)
-    cursor_pmo = conn_pmo_update.cursor()
-    
-    try:
-        for key, (table_name, id_col) in update_map.items():
-            if key in tables and not tables[key].empty:
-                ids = tables[key][id_col].tolist()
-                if not ids: continue
-                
-                # Batch update for efficiency
-                # SQLite limit is usually 999 variables, so chunk it
-                chunk_size = 500
-                for i in range(0, len(ids), chunk_size):
-                    chunk = ids[i:i+chunk_size]
-                    placeholders = ','.join(['%s'] * len(chunk)) # MySQL uses %s
-                    if DB_TYPE == 'sqlite':
-                        placeholders = ','.join(['?'] * len(chunk))
-                        
-                    sql_update = f"UPDATE {table_name} SET metadata_extraccion = 1 WHERE {id_col} IN ({placeholders})"
-                    cursor_pmo.execute(sql_update, chunk)
-        
-        # Handle composite key for project_employees separately if needed, 
-        # or just assume if project is extracted, assignments are too.
-        # For this demo, we'll skip complex composite updates to avoid errors unless critical.
-        
-        conn_pmo_update.commit()
-        print(f"Actualización fuente completada en {time.time() - start_update:.2f}s")
-    except Exception as e:
-        print(f"Error updating source metadata: {e}")
-        conn_pmo_update.rollback()
-    finally:
-        conn_pmo_update.close()
+    up_to_date = not failed and ETL_MODE == 'incremental' and loaded_projects == 0
+    # An incremental run that only saw open projects has nothing to load, but its rows were extracted
+    if published or up_to_date:
+        # --- 4. Update Source (Incremental Logic) ---
+        print("Actualizando fuente (marcando registros extraídos)...")
+        start_update = time.time()
+        # Publish and marking are one unit: if marking fails, --resume only redoes the marking
+        if mark_source_rows(pmo_config, extracted_ids, DB_TYPE):
+            save_checkpoint(marcado=True)
+        elif checkpoint is not None:
+            print("Marcado de la fuente incompleto: ejecutar con --resume para completarlo.")
+        update_time = time.time() - start_update
+        print(f"Actualización fuente completada en {update_time:.2f}s")
+
+    # Run report; a published run is the new warehouse version the dashboard cache keys off
+    estado = 'publicado' if published else 'sin_cambios' if up_to_date else 'error' if failed else 'sin_publicar'
+    run = report.finish(estado, {'extraccion': ext_time, 'transformacion': trans_time,
+                                 'carga': load_time, 'marcado_fuente': update_time})
+    record_etl_run(ssd_config, load_queries['record_etl_run'], run, DB_TYPE)
+    if ETL_REPORT_DIR:
+        write_run_report(ETL_REPORT_DIR, run)
 
     print(f"Tiempo Total: {time.time() - total_start_time:.2f}s")
-    print("--- FIN ETL ---")
+    print("--- FIN ETL ---" if published or up_to_date else "--- FIN ETL (sin publicar) ---")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="ETL PMO -> SSD")
+    parser.add_argument('--resume', action='store_true',
+                        help="reanudar la última ejecución fallida desde su checkpoint (requiere ETL_STAGING_DIR)")
+    parser.add_argument('--migrate', action='store_true',
+                        help="solo crear las tablas y columnas que le faltan al SSD, sin cargar datos")
+    args = parser.parse_args()
+    main(resume=args.resume, migrate_only=args.migrate)
\ No newline at end of file
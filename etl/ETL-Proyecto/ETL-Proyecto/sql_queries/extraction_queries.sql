@@ -83,4 +83,104 @@ SELECT d.defecto_id,
        d.severidad,
        d.fecha_registro
 FROM defecto AS d
-;
\ No newline at end of file
+;
+
+-- changed_projects
+SELECT p.proyecto_id
+FROM proyecto AS p
+WHERE p.metadata_extraccion = 0
+UNION
+SELECT p.proyecto_id
+FROM proyecto AS p
+JOIN tarea AS t ON t.catalogo_tareas_id = p.catalogo_id
+WHERE t.metadata_extraccion = 0
+UNION
+SELECT f.proyecto_id
+FROM finanzas_proyecto AS f
+WHERE f.metadata_extraccion = 0
+UNION
+SELECT pe.proyecto_id
+FROM proyecto_empleado AS pe
+WHERE pe.metadata_extraccion = 0
+UNION
+SELECT d.proyecto_id
+FROM defecto AS d
+WHERE d.metadata_extraccion = 0
+
+-- extract_projects_scoped
+SELECT p.proyecto_id,
+       p.nombre,
+       p.descripcion,
+       p.fecha_inicio_plan,
+       p.fecha_fin_plan,
+       p.fecha_inicio_real,
+       p.fecha_fin_real,
+       p.horas_planificadas,
+       p.horas_trabajadas,
+       p.estado_id,
+       p.tipo_proyecto_id,
+       p.cliente_id,
+       p.catalogo_id
+FROM proyecto AS p
+WHERE p.proyecto_id IN ({project_scope})
+;
+
+-- extract_tasks_scoped
+SELECT t.tarea_id,
+       t.nombre_tarea,
+       t.tipo_tarea,
+       t.prioridad,
+       t.completada,
+       t.fecha_entrega,
+       t.fecha_completado,
+       t.catalogo_tareas_id
+FROM tarea AS t
+WHERE t.catalogo_tareas_id IN (
+    SELECT p.catalogo_id
+    FROM proyecto AS p
+    WHERE p.proyecto_id IN ({project_scope})
+)
+;
+
+-- extract_project_employees_scoped
+SELECT pe.proyecto_id,
+       pe.empleado_id
+FROM proyecto_empleado AS pe
+WHERE pe.proyecto_id IN ({project_scope})
+;
+
+-- extract_finances_scoped
+SELECT f.id,
+       f.proyecto_id,
+       f.monto_presupuestado,
+       f.monto_real_acumulado,
+       f.ingreso_proyecto
+FROM finanzas_proyecto AS f
+WHERE f.proyecto_id IN ({project_scope})
+;
+
+-- extract_defects_scoped
+SELECT d.defecto_id,
+       d.proyecto_id,
+       d.tipo_defecto_id,
+       d.fase_id,
+       d.severidad,
+       d.fecha_registro
+FROM defecto AS d
+WHERE d.proyecto_id IN ({project_scope})
+;
+
+-- all_projects
+SELECT p.proyecto_id
+FROM proyecto AS p
+
+-- projects_in_range
+SELECT s.proyecto_id
+FROM ({projects}) AS s
+WHERE s.proyecto_id >= {range_start}
+  AND s.proyecto_id < {range_end}
+
+-- project_id_bounds
+SELECT MIN(p.proyecto_id) AS min_id,
+       MAX(p.proyecto_id) AS max_id
+FROM proyecto AS p;
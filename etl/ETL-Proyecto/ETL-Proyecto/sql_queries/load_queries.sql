@@ -15,15 +15,17 @@ INSERT IGNORE INTO dim_tiempo (tiempo_id, fecha, dia_id)
 VALUES (%s, %s, %s);
 
 -- load_dim_estado
-INSERT IGNORE INTO dim_estado (estado_id, nombre_estado)
-VALUES (%s, %s);
+INSERT INTO dim_estado (estado_id, nombre_estado)
+VALUES (%s, %s)
+ON DUPLICATE KEY UPDATE nombre_estado = VALUES(nombre_estado);
 
 -- load_dim_tipo_proyecto
-INSERT IGNORE INTO dim_tipo_proyecto (tipo_proyecto_id, nombre)
-VALUES (%s, %s);
+INSERT INTO dim_tipo_proyecto (tipo_proyecto_id, nombre)
+VALUES (%s, %s)
+ON DUPLICATE KEY UPDATE nombre = VALUES(nombre);
 
 -- load_fact_proyecto
-INSERT IGNORE INTO fact_proyecto (
+INSERT INTO fact_proyecto (
     fact_id,
     proyecto_id,
     nombre,
@@ -39,6 +41,11 @@ INSERT IGNORE INTO fact_proyecto (
     empleados_asignados,
     roi,
     tuct,
+    ev,
+    spi,
+    cpi,
+    delay_days,
+    on_time,
     fecha_inicio_plan,
     fecha_fin_plan,
     fecha_inicio_real,
@@ -50,23 +57,57 @@ INSERT IGNORE INTO fact_proyecto (
 VALUES (
     %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
     %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-    %s, %s
-);
+    %s, %s, %s, %s, %s, %s, %s
+)
+ON DUPLICATE KEY UPDATE
+    proyecto_id = VALUES(proyecto_id),
+    nombre = VALUES(nombre),
+    descripcion = VALUES(descripcion),
+    horas_planificadas = VALUES(horas_planificadas),
+    horas_trabajadas = VALUES(horas_trabajadas),
+    monto_planificado = VALUES(monto_planificado),
+    monto_real = VALUES(monto_real),
+    ganancia_proyecto = VALUES(ganancia_proyecto),
+    tareas_planificadas = VALUES(tareas_planificadas),
+    tareas_completadas = VALUES(tareas_completadas),
+    tareas_retrasadas = VALUES(tareas_retrasadas),
+    empleados_asignados = VALUES(empleados_asignados),
+    roi = VALUES(roi),
+    tuct = VALUES(tuct),
+    ev = VALUES(ev),
+    spi = VALUES(spi),
+    cpi = VALUES(cpi),
+    delay_days = VALUES(delay_days),
+    on_time = VALUES(on_time),
+    fecha_inicio_plan = VALUES(fecha_inicio_plan),
+    fecha_fin_plan = VALUES(fecha_fin_plan),
+    fecha_inicio_real = VALUES(fecha_inicio_real),
+    fecha_fin_real = VALUES(fecha_fin_real),
+    estado_id = VALUES(estado_id),
+    tipo_proyecto_id = VALUES(tipo_proyecto_id),
+    cliente_id = VALUES(cliente_id);
 
 -- load_dim_cliente
-INSERT IGNORE INTO dim_cliente (cliente_id, nombre_cliente, sector, pais)
-VALUES (%s, %s, %s, %s);
+INSERT INTO dim_cliente (cliente_id, nombre_cliente, sector, pais)
+VALUES (%s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    nombre_cliente = VALUES(nombre_cliente),
+    sector = VALUES(sector),
+    pais = VALUES(pais);
 
 -- load_dim_tipo_defecto
-INSERT IGNORE INTO dim_tipo_defecto (tipo_defecto_id, nombre_tipo_defecto)
-VALUES (%s, %s);
+INSERT INTO dim_tipo_defecto (tipo_defecto_id, nombre_tipo_defecto)
+VALUES (%s, %s)
+ON DUPLICATE KEY UPDATE nombre_tipo_defecto = VALUES(nombre_tipo_defecto);
 
 -- load_dim_fase_sdlc
-INSERT IGNORE INTO dim_fase_sdlc (fase_sdlc_id, nombre_fase)
-VALUES (%s, %s);
+INSERT INTO dim_fase_sdlc (fase_sdlc_id, nombre_fase)
+VALUES (%s, %s)
+ON DUPLICATE KEY UPDATE nombre_fase = VALUES(nombre_fase);
 
 -- load_fact_defecto
-INSERT IGNORE INTO fact_defecto (
+INSERT INTO fact_defecto (
+    defecto_id,
     proyecto_id,
     tipo_defecto_id,
     fase_sdlc_id,
@@ -74,4 +115,88 @@ INSERT IGNORE INTO fact_defecto (
     tiempo_id,
     count_defecto
 )
-VALUES (%s, %s, %s, %s, %s, 1);
+VALUES (%s, %s, %s, %s, %s, %s, 1)
+ON DUPLICATE KEY UPDATE
+    proyecto_id = VALUES(proyecto_id),
+    tipo_defecto_id = VALUES(tipo_defecto_id),
+    fase_sdlc_id = VALUES(fase_sdlc_id),
+    severidad = VALUES(severidad),
+    tiempo_id = VALUES(tiempo_id);
+
+-- load_agg_kpi
+INSERT INTO agg_kpi (
+    tipo_proyecto_id,
+    estado_id,
+    pais,
+    mes_inicio,
+    n_proyectos,
+    ganancia_proyecto,
+    roi,
+    monto_planificado,
+    monto_real,
+    ev,
+    tareas_planificadas,
+    tareas_completadas,
+    tareas_retrasadas,
+    horas_planificadas,
+    horas_trabajadas,
+    empleados_asignados,
+    proyectos_a_tiempo,
+    dias_retraso
+)
+VALUES (
+    %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+    %s, %s, %s, %s, %s, %s, %s, %s
+);
+
+-- load_agg_kpi_defecto
+INSERT INTO agg_kpi_defecto (
+    tipo_proyecto_id,
+    estado_id,
+    pais,
+    mes_inicio,
+    severidad,
+    fase_sdlc_id,
+    n_defectos,
+    con_tipo
+)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
+
+-- record_etl_run
+INSERT INTO etl_run (inicio, fin, modo, estado, duracion_s, filas_cargadas, filas_rechazadas, pico_rss_mb, reporte)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s);
+
+-- select_agg_projects
+SELECT fp.proyecto_id,
+       fp.tipo_proyecto_id,
+       fp.estado_id,
+       fp.cliente_id,
+       t.fecha AS fecha_inicio_real,
+       fp.ganancia_proyecto,
+       fp.roi,
+       fp.monto_planificado,
+       fp.monto_real,
+       fp.ev,
+       fp.tareas_planificadas,
+       fp.tareas_completadas,
+       fp.tareas_retrasadas,
+       fp.horas_planificadas,
+       fp.horas_trabajadas,
+       fp.empleados_asignados,
+       fp.on_time,
+       fp.delay_days
+FROM fact_proyecto AS fp
+LEFT JOIN dim_tiempo AS t ON t.tiempo_id = fp.fecha_inicio_real;
+
+-- select_agg_defects
+SELECT fd.proyecto_id,
+       fd.severidad,
+       fd.fase_sdlc_id AS fase_id,
+       td.tipo_defecto_id
+FROM fact_defecto AS fd
+LEFT JOIN dim_tipo_defecto AS td ON td.tipo_defecto_id = fd.tipo_defecto_id;
+
+-- select_agg_clients
+SELECT c.cliente_id,
+       c.pais
+FROM dim_cliente AS c;
@@ -0,0 +1,101 @@
+"""
+Calendar helpers shared by the data generator and the ETL.
+
+Everything works on whole numpy datetime64[D] arrays: the date-dimension hierarchy for a range is
+built in one pass and dates map to tiempo_id (YYYYMMDD) with integer arithmetic.
+"""
+from typing import Iterable, Tuple
+import numpy as np
+import pandas as pd
+
+DIAS_ES = np.array(['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo'], dtype=object)
+MESES_ES = np.array(['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto',
+                     'septiembre', 'octubre', 'noviembre', 'diciembre'], dtype=object)
+
+def to_days(values) -> np.ndarray:
+    """
+    Convert dates (a scalar or a sequence of strings, date objects, timestamps or datetime64) to a
+    datetime64[D] array; missing values become NaT.
+    """
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[D]')
+    if not isinstance(values, (pd.Series, pd.Index, np.ndarray, list, tuple)):
+        values = [values]
+    if not isinstance(values, pd.Series):
+        values = pd.Series(values, dtype=object)
+    return np.asarray(pd.to_datetime(values), dtype='datetime64[D]')
+
+def _parts(days: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    months = days.astype('datetime64[M]')
+    anio = months.astype('datetime64[Y]').astype(np.int64) + 1970
+    mes = months.astype(np.int64) % 12 + 1
+    dia = (days - months).astype(np.int64) + 1
+    return anio, mes, dia
+
+def to_tiempo_id(values):
+    """
+    Map dates to dim_tiempo keys (YYYYMMDD) as a nullable Int64 column; a Series keeps its index.
+    """
+    days = to_days(values)
+    anio, mes, dia = _parts(days)
+    ids = pd.array(anio * 10000 + mes * 100 + dia, dtype='Int64')
+    ids[np.isnat(days)] = pd.NA
+    if isinstance(values, pd.Series):
+        return pd.Series(ids, index=values.index)
+    return ids
+
+def build_calendar(start, end) -> pd.DataFrame:
+    """
+    One row per day in [start, end] with the full hierarchy: tiempo_id / dia_id (YYYYMMDD),
+    mes_id (YYYYMM), anio_id (YYYY), Spanish day and month names and quarter.
+    """
+    days = np.arange(np.datetime64(pd.Timestamp(start).date(), 'D'),
+                     np.datetime64(pd.Timestamp(end).date(), 'D') + 1, dtype='datetime64[D]')
+    anio, mes, dia = _parts(days)
+    weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday; Monday = 0
+
+    return pd.DataFrame({
+        'tiempo_id': anio * 10000 + mes * 100 + dia,
+        'fecha': days.astype('datetime64[ns]'),
+        'dia_id': anio * 10000 + mes * 100 + dia,
+        'dia': dia,
+        'nombre_dia': DIAS_ES[weekday],
+        'mes_id': anio * 100 + mes,
+        'numero_mes': mes,
+        'nombre_mes': MESES_ES[mes - 1],
+        'trimestre': (mes - 1) // 3 + 1,
+        'anio_id': anio,
+        'anio': anio
+    })
+
+def calendar_for(dates: Iterable) -> pd.DataFrame:
+    """
+    Calendar covering every day between the earliest and latest non-null date in `dates`.
+    """
+    days = to_days(dates)
+    days = days[~np.isnat(days)]
+    if len(days) == 0:
+        return build_calendar('2000-01-01', '1999-12-31')
+    return build_calendar(days.min(), days.max())
+
+def time_dimensions(calendar: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """
+    Split a calendar into (dim_tiempo, dim_dia, dim_mes, dim_anio) as the SSD stores them.
+    """
+    dim_tiempo = calendar[['tiempo_id', 'fecha', 'dia_id']]
+    dim_dia = calendar[['dia_id', 'nombre_dia', 'dia', 'mes_id']]
+    dim_mes = calendar[['mes_id', 'nombre_mes', 'numero_mes', 'trimestre', 'anio_id']]\
+        .drop_duplicates('mes_id').reset_index(drop=True)
+    dim_anio = calendar[['anio_id', 'anio']].drop_duplicates('anio_id').reset_index(drop=True)
+    return dim_tiempo, dim_dia, dim_mes, dim_anio
+
+def random_dates(start, end, size: int = None, rng=np.random) -> np.ndarray:
+    """
+    Dates drawn uniformly from [start, end] (just `start` when end <= start), as datetime64[D].
+    `start`/`end` are dates or equal-length arrays of dates (one draw per pair when `size` is None).
+    `rng` is a numpy Generator or RandomState (default: the global numpy random state).
+    """
+    start, end = to_days(start), to_days(end)
+    span = np.maximum(0, (end - start).astype(np.int64))
+    offsets = np.floor(rng.random(size if size is not None else len(start)) * (span + 1)).astype(np.int64)
+    return start + offsets.astype('timedelta64[D]')
@@ -1,16 +1,52 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 import os
 import random
+import shutil
+import sqlite3
+from collections import deque
 from datetime import datetime, timedelta, date
 from typing import Dict, List
 import numpy as np
 import pandas as pd
 from scipy.stats import truncnorm
+import calendario
 
 # ==== Configuration ====
 OUTPUT_DIR = "./synthetic_output"
 NUM_PROYECTOS = 4000
-random.seed(42)
-np.random.seed(42)
+SEMILLA = 42
+LOTE_PROYECTOS = 50_000  # projects per shard (bounds memory per worker; part of the seed)
+NUM_WORKERS = os.cpu_count() or 1  # generator processes
+# Direct database output (--db): SQLite file, schema and rows per executemany batch
+PMO_DB_PATH = "pmo_db.sqlite"
+SQL_ESQUEMA_PMO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database", "create_pmo_db.sql")
+# SQLite version of the schema's triggers (they are MySQL-only in SQL_ESQUEMA_PMO)
+SQL_TRIGGERS_SQLITE = os.path.join(os.path.dirname(SQL_ESQUEMA_PMO), "create_pmo_triggers_sqlite.sql")
+FILAS_INSERT = 5000
+
+HOY = np.datetime64(date.today(), 'D')
+PLAN_START_MIN = np.datetime64('2020-01-01T00:00:00', 's')
+PLAN_END_CAP   = np.datetime64('2025-12-31T00:00:00', 's')
+
+try:
+    import mysql.connector
+except ImportError:
+    mysql = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), "etl.env"))
+except ImportError:
+    pass
 
 # Try to import Faker, else use SimpleFake
 try:
@@ -19,17 +55,19 @@ try:
 except ImportError:
     _FAKER_AVAILABLE = False
 
+PALABRAS = ["sistema","plataforma","proyecto","aplicación","módulo","servicio","solución","proceso","interfaz","usuario","cliente","calidad","rendimiento","automatización","optimización","diseño"]
+
 class SimpleFake:
     def __init__(self):
         self.first_names = ["Juan","María","Luis","Ana","Carlos","Lucía","Miguel","Sofía","José","Carmen","Pedro","Laura","Jorge","Paula","Ricardo","Isabel","Fernando","Patricia"]
         self.last_names  = ["García","Martínez","Rodríguez","López","Hernández","Pérez","Gómez","Sánchez","Díaz","Morales","Vargas","Jiménez","Castillo","Romero","Ruiz","Navarro","Torres","Flores"]
-        self.words = ["sistema","plataforma","proyecto","aplicación","módulo","servicio","solución","proceso","interfaz","usuario","cliente","calidad","rendimiento","automatización","optimización","diseño"]
+        self.words = PALABRAS
         self.company_adjectives = ["Soluciones","Tecnologías","Servicios","Desarrollos","Sistemas","Innovaciones","Consultoría","Proyectos"]
         self.company_nouns      = ["Global","Digital","Avanzados","Inteligentes","Integrales","Profesionales","Creativos","Expertos"]
     def first_name(self): return random.choice(self.first_names)
     def last_name(self):  return random.choice(self.last_names)
     def company(self):    return f"{random.choice(self.company_adjectives)} {random.choice(self.company_nouns)}"
-    def sentence(self, nb_words=8): 
+    def sentence(self, nb_words=8):
         s = " ".join(random.choices(self.words, k=nb_words))
         return s.capitalize()+"."
     def date_time_between_dates(self, datetime_start: datetime, datetime_end: datetime) -> datetime:
@@ -41,35 +79,104 @@ class SimpleFake:
     def lexify(self, text="??", letters="ABCDEFGHIJKLMNOPQRSTUVWXYZ"):
         return "".join(random.choice(letters) if ch=="?" else ch for ch in text)
 
-def get_fake(locale="es_MX"):
+def get_fake(locale="es_MX", seed=SEMILLA):
     if _FAKER_AVAILABLE:
         fk = Faker(locale)
-        fk.seed_instance(42)
+        fk.seed_instance(seed)
         return fk
     return SimpleFake()
 
 fake = get_fake()
 
+# ==== Distributions ====
+TIPOS_PROYECTO = ["Desarrollo Web","Aplicación Móvil","Software Empresarial","Infraestructura Cloud","Consultoría Técnica"]
+ESTADOS = ["Planificado","En ejecución","En revisión","Completado","Cancelado"]
+RANGO_HORAS = {
+    "Desarrollo Web": (600, 2000), "Aplicación Móvil": (800, 3000), "Software Empresarial": (2000, 4000),
+    "Infraestructura Cloud": (1000, 3500), "Consultoría Técnica": (400, 1500)
+}
+RANGO_MONTOS = {
+    "Desarrollo Web": (25_000, 90_000), "Aplicación Móvil": (40_000, 180_000), "Software Empresarial": (100_000, 250_000),
+    "Infraestructura Cloud": (50_000, 150_000), "Consultoría Técnica": (20_000, 70_000)
+}
+# Estado probabilities (ESTADOS order) for <= 1000, <= 3000 and more planned hours
+PESOS_ESTADO = np.array([
+    [0.05, 0.15, 0.10, 0.65, 0.05],
+    [0.05, 0.40, 0.15, 0.35, 0.05],
+    [0.05, 0.55, 0.20, 0.15, 0.05]
+])
+# Progress ~ Beta(a, b) per estado (ESTADOS order); cancelled projects get Beta(2, 2) * 0.6
+PROGRESO_BETA = np.array([[0.8, 5], [2.5, 1.5], [3, 2], [4, 1.2], [2, 2]])
+NOMBRES_PROYECTO = [
+    "Sistema ERP Alpha","Plataforma Reservas","App Inventarios","Portal Clientes",
+    "Gestión Documental","Aplicación CRM","Sistema RRHH","Plataforma E-Commerce",
+    "App de Tareas","Sistema Flotas"
+]
+LETRAS = np.array(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"), dtype=object)
+
+NOMBRES_TAREA = [
+    "Diseño de interfaz","Desarrollo backend","Desarrollo frontend","Integración BD","Pruebas unitarias",
+    "Pruebas funcionales","Revisión de código","Despliegue QA","Documentación técnica","Config. infraestructura",
+    "Soporte post-implementación","Análisis de requisitos","Optimización de consultas","Seguridad","CI/CD",
+    "Revisión de sprint","Implementación API","Validación QA","Mantenimiento","Control de calidad",
+    "Pruebas de rendimiento","Automatización de pruebas","Migración de datos","Ajustes post-despliegue"
+]
+TIPOS_TAREA = ["Desarrollo","Testing","Documentación","Soporte","Diseño","Implementación","Mantenimiento"]
+PRIORIDADES = ["Alta","Media","Baja"]
+# Tasks per project ~ LogNormal(log(media), sigma), clipped to [5, 200]
+DISTRIB_TAREAS = {
+    "Consultoría Técnica": (12, 0.6), "Desarrollo Web": (22, 0.8), "Aplicación Móvil": (35, 1.0),
+    "Software Empresarial": (60, 1.1), "Infraestructura Cloud": (45, 0.9)
+}
+# P(task completed) per estado (ESTADOS order)
+PROB_COMPLETADA = np.array([0.15, 0.65, 0.40, 0.95, 0.05])
+
+SEVERIDADES = ["Baja","Media","Alta"]
+MODULOS = ["usuario","datos","autenticación","API","UI","reportes","catálogo","pago"]
+
 # ==== Helper Functions ====
-def retraso_random(media=5, sd=4, min_=0, max_=30):
+def _categorica(rng: np.random.Generator, p: np.ndarray) -> np.ndarray:
+    """
+    One draw per row of the probability matrix `p` (n x k): the index of the chosen column.
+    """
+    cum = np.cumsum(p, axis=1)
+    u = rng.random(len(p))[:, None] * cum[:, -1:]
+    return np.minimum((u >= cum).sum(axis=1), p.shape[1] - 1)
+
+def _indice(ids: pd.Series, df: pd.DataFrame, id_col: str, name_col: str, nombres: List[str]) -> np.ndarray:
+    """
+    Position in `nombres` of the catalogue row each id points to.
+    """
+    orden = df.set_index(id_col)[name_col].map(nombres.index)
+    return ids.map(orden).to_numpy()
+
+def _dias(n) -> np.ndarray:
+    return np.asarray(n).astype(np.int64).astype('timedelta64[D]')
+
+def retraso_random(size, rng: np.random.Generator, media=5, sd=4, min_=0, max_=30) -> np.ndarray:
     a, b = (min_ - media)/sd, (max_ - media)/sd
-    return int(truncnorm.rvs(a, b, loc=media, scale=sd))
-
-def seleccionar_estado_realista(horas_plan: int) -> str:
-    if horas_plan <= 1000:
-        pesos = {"Planificado":0.05,"En ejecución":0.15,"En revisión":0.10,"Completado":0.65,"Cancelado":0.05}
-    elif horas_plan <= 3000:
-        pesos = {"Planificado":0.05,"En ejecución":0.40,"En revisión":0.15,"Completado":0.35,"Cancelado":0.05}
-    else:
-        pesos = {"Planificado":0.05,"En ejecución":0.55,"En revisión":0.20,"Completado":0.15,"Cancelado":0.05}
-    return np.random.choice(list(pesos.keys()), p=list(pesos.values()))
-
-def defects_poisson(horas_plan: int) -> int:
-    lam = max(1, horas_plan/300) * random.uniform(0.8, 1.2)
-    return int(np.random.poisson(lam))
+    return truncnorm.rvs(a, b, loc=media, scale=sd, size=size, random_state=rng).astype(np.int64)
+
+def seleccionar_estado_realista(horas_plan: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Estado (index into ESTADOS) per project; bigger projects are more often still running.
+    """
+    tramo = np.where(horas_plan <= 1000, 0, np.where(horas_plan <= 3000, 1, 2))
+    return _categorica(rng, PESOS_ESTADO[tramo])
+
+def defects_poisson(horas_plan: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    lam = np.maximum(1, horas_plan/300) * rng.uniform(0.8, 1.2, len(horas_plan))
+    return rng.poisson(lam)
+
+def frases(n: int, rng: np.random.Generator, nb_words: int = 8) -> np.ndarray:
+    palabras = np.array(PALABRAS, dtype=object)[rng.integers(0, len(PALABRAS), (n, nb_words))]
+    texto = palabras[:, 0]
+    for j in range(1, nb_words):
+        texto = texto + " " + palabras[:, j]
+    return (pd.Series(texto, dtype=object).str.capitalize() + ".").to_numpy()
 
 # ==== Data Generation Functions ====
-def generar_tablas_base():
+def generar_tablas_base(n_proyectos: int, rng: np.random.Generator):
     departamentos = ["Desarrollo","QA","Finanzas","Soporte Técnico","Gestión de Proyectos"]
     roles = ["Project Manager","Desarrollador Backend","Desarrollador Frontend","Diseñador UI/UX","QA Tester","Arquitecto de Software","Analista de Negocio","DevOps Engineer"]
     rol_to_depto = {
@@ -78,196 +185,164 @@ def generar_tablas_base():
     }
     sectores = ["Automotriz","Tecnología","Construcción","Ingeniería","Salud","Manufactura","Servicios"]
     paises   = ["México","Chile","Colombia","Argentina","España","Estados Unidos"]
-    tipos_proyecto = ["Desarrollo Web","Aplicación Móvil","Software Empresarial","Infraestructura Cloud","Consultoría Técnica"]
-    estados = ["Planificado","En ejecución","En revisión","Completado","Cancelado"]
 
     df_departamento = pd.DataFrame({"departamento_id": range(1,len(departamentos)+1), "nombre_departamento": departamentos})
     df_rol = pd.DataFrame({"rol_id": range(1,len(roles)+1), "nombre_rol": roles})
 
     # Empleados
-    n_emp = random.randint(80,100)
-    empleados = []
-    for eid in range(1, n_emp+1):
-        rol = random.choice(roles)
-        depto = rol_to_depto[rol]
-        empleados.append({
-            "empleado_id": eid,
-            "nombre": f"{fake.first_name()} {fake.last_name()}",
-            "rol_id": int(df_rol.loc[df_rol.nombre_rol==rol,"rol_id"].iat[0]),
-            "departamento_id": int(df_departamento.loc[df_departamento.nombre_departamento==depto,"departamento_id"].iat[0]),
-        })
-    df_empleado = pd.DataFrame(empleados)
-
-    # Clientes
+    n_emp = int(rng.integers(80, 101))
+    rol_idx = rng.integers(0, len(roles), n_emp)
+    depto_de_rol = np.array([departamentos.index(rol_to_depto[r]) for r in roles])
+    df_empleado = pd.DataFrame({
+        "empleado_id": np.arange(1, n_emp+1),
+        "nombre": [f"{fake.first_name()} {fake.last_name()}" for _ in range(n_emp)],
+        "rol_id": df_rol["rol_id"].to_numpy()[rol_idx],
+        "departamento_id": df_departamento["departamento_id"].to_numpy()[depto_de_rol[rol_idx]],
+    })
+
+    # Clientes: per (país, sector) quotas, then padded/trimmed to the target
     factor = 15
-    num_clientes_target = int(max(200, min(np.sqrt(NUM_PROYECTOS)*factor*random.uniform(0.9,1.1), 3000)))
+    num_clientes_target = int(max(200, min(np.sqrt(n_proyectos)*factor*rng.uniform(0.9,1.1), 3000)))
     base_paises  = np.array([0.35,0.10,0.15,0.10,0.15,0.15]); base_paises = base_paises/np.sum(base_paises)
     base_sect    = np.array([0.10,0.25,0.15,0.15,0.10,0.15,0.10]); base_sect = base_sect/np.sum(base_sect)
 
-    clientes = []; cid=1
-    for pais, wp in zip(paises, base_paises):
-        n_pais = int(num_clientes_target*wp)
-        for sect, ws in zip(sectores, base_sect):
-            n = int(n_pais*ws)
-            for _ in range(n):
-                clientes.append({"cliente_id": cid, "nombre": fake.company(), "sector": sect, "pais": pais})
-                cid += 1
-    df_cliente = pd.DataFrame(clientes)
+    cupos = np.array([[int(int(num_clientes_target*wp)*ws) for ws in base_sect] for wp in base_paises])
+    df_cliente = pd.DataFrame({
+        "sector": np.repeat(np.tile(sectores, len(paises)), cupos.ravel()),
+        "pais": np.repeat(np.repeat(paises, len(sectores)), cupos.ravel()),
+    })
+    df_cliente.insert(0, "nombre", [fake.company() for _ in range(len(df_cliente))])
     if len(df_cliente) < num_clientes_target:
-        extra = df_cliente.sample(num_clientes_target-len(df_cliente), replace=True)
+        extra = df_cliente.iloc[rng.integers(0, len(df_cliente), num_clientes_target-len(df_cliente))]
         df_cliente = pd.concat([df_cliente, extra], ignore_index=True)
     elif len(df_cliente) > num_clientes_target:
-        df_cliente = df_cliente.sample(num_clientes_target).reset_index(drop=True)
-    df_cliente["cliente_id"] = df_cliente.index+1
+        df_cliente = df_cliente.iloc[rng.permutation(len(df_cliente))[:num_clientes_target]].reset_index(drop=True)
+    df_cliente.insert(0, "cliente_id", df_cliente.index+1)
 
-    df_tipo_proyecto = pd.DataFrame({"tipo_proyecto_id": range(1,len(tipos_proyecto)+1), "nombre": tipos_proyecto})
-    df_estado = pd.DataFrame({"estado_id": range(1,len(estados)+1), "nombre_estado": estados})
+    df_tipo_proyecto = pd.DataFrame({"tipo_proyecto_id": range(1,len(TIPOS_PROYECTO)+1), "nombre": TIPOS_PROYECTO})
+    df_estado = pd.DataFrame({"estado_id": range(1,len(ESTADOS)+1), "nombre_estado": ESTADOS})
 
     return df_departamento, df_rol, df_empleado, df_cliente, df_tipo_proyecto, df_estado
 
-def generar_proyectos_finanzas_catalogos(df_cliente, df_tipo_proyecto, df_estado):
-    RANGO_HORAS = {
-        "Desarrollo Web": (600, 2000), "Aplicación Móvil": (800, 3000), "Software Empresarial": (2000, 4000),
-        "Infraestructura Cloud": (1000, 3500), "Consultoría Técnica": (400, 1500)
-    }
-    RANGO_MONTOS = {
-        "Desarrollo Web": (25_000, 90_000), "Aplicación Móvil": (40_000, 180_000), "Software Empresarial": (100_000, 250_000),
-        "Infraestructura Cloud": (50_000, 150_000), "Consultoría Técnica": (20_000, 70_000)
-    }
-    
-    proyectos, catalogos, finanzas = [], [], []
-    HOY = datetime.today().date()
-    PLAN_START_MIN = datetime(2020,1,1)
-    PLAN_END_CAP   = datetime(2025,12,31)
-    nombres_generados = set()
-
-    for pid in range(1, NUM_PROYECTOS+1):
-        cliente_id = random.choice(df_cliente["cliente_id"].tolist())
-        tipo_id    = random.choice(df_tipo_proyecto["tipo_proyecto_id"].tolist())
-        tipo_nom   = df_tipo_proyecto.loc[df_tipo_proyecto.tipo_proyecto_id==tipo_id,"nombre"].iat[0]
-
-        horas_plan = random.randint(*RANGO_HORAS[tipo_nom])
-        estado_nom = seleccionar_estado_realista(horas_plan)
-        estado_id  = int(df_estado.loc[df_estado.nombre_estado==estado_nom,"estado_id"].iat[0])
-
-        while True:
-            nombre_proyecto = random.choice([
-                "Sistema ERP Alpha","Plataforma Reservas","App Inventarios","Portal Clientes",
-                "Gestión Documental","Aplicación CRM","Sistema RRHH","Plataforma E-Commerce",
-                "App de Tareas","Sistema Flotas"
-            ]) + f" {fake.lexify('??').upper()}"
-            if nombre_proyecto not in nombres_generados:
-                nombres_generados.add(nombre_proyecto)
-                break
-        descripcion = fake.sentence(8)
-
-        fecha_inicio_plan = fake.date_time_between_dates(PLAN_START_MIN, PLAN_END_CAP)
-        duracion_dias     = int(np.random.triangular(90, 400, 1080))
-        fecha_fin_plan    = min(fecha_inicio_plan + timedelta(days=duracion_dias), PLAN_END_CAP)
-
-        fecha_inicio_real, fecha_fin_real = None, None
-        if estado_nom in ("En ejecución","En revisión","Completado","Cancelado"):
-            fecha_inicio_real = min((fecha_inicio_plan + timedelta(days=random.randint(-10,15))).date(), HOY)
-        if estado_nom == "Completado":
-            fecha_fin_real = min((fecha_fin_plan + timedelta(days=retraso_random())).date(), HOY)
-        elif estado_nom == "Cancelado":
-            fecha_fin_real = min((fecha_inicio_plan.date() + timedelta(days=random.randint(10, duracion_dias))), HOY)
-
-        progreso = np.random.beta(2,2)
-        if estado_nom == "Completado": progreso = np.random.beta(4,1.2)
-        elif estado_nom == "En ejecución": progreso = np.random.beta(2.5,1.5)
-        elif estado_nom == "En revisión":   progreso = np.random.beta(3,2)
-        elif estado_nom == "Planificado":   progreso = np.random.beta(0.8,5)
-        elif estado_nom == "Cancelado":     progreso *= 0.6
-
-        monto_pres = random.randint(*RANGO_MONTOS[tipo_nom])
-        monto_real = int(monto_pres * min(1.2, max(0.2, progreso + np.random.normal(0,0.05))))
-        ingreso    = int(monto_real * (random.uniform(1.1,1.5) if estado_nom=="Completado" else random.uniform(0.8,1.3)))
-
-        defectos_detectados = defects_poisson(horas_plan) if estado_nom in ("Completado","Cancelado") else 0
-        
-        proyectos.append({
-            "proyecto_id": pid,
-            "nombre": nombre_proyecto,
-            "descripcion": descripcion,
-            "fecha_inicio_plan": fecha_inicio_plan.date(),
-            "fecha_fin_plan":   fecha_fin_plan.date(),
-            "fecha_inicio_real": fecha_inicio_real,
-            "fecha_fin_real":    fecha_fin_real,
-            "horas_totales":     horas_plan,
-            "horas_trabajadas":  int(horas_plan * progreso),
-            "estado_id":         estado_id,
-            "tipo_proyecto_id":  tipo_id,
-            "cliente_id":        cliente_id,
-            "defectos_detectados": defectos_detectados,
-            "metadata_extraccion": 0
-        })
-        catalogos.append({"catalogo_id": pid, "nombre_catalogo": f"Catálogo Proyecto {pid}"})
-        finanzas.append({
-            "id": pid, "proyecto_id": pid,
-            "monto_presupuestado": monto_pres,
-            "monto_real_acumulado": monto_real,
-            "ingreso_proyecto": ingreso,
-            "metadata_extraccion": 0
-        })
-
-    df_proyecto = pd.DataFrame(proyectos)
+def generar_nombres_proyecto(n_proyectos: int, rng: np.random.Generator, espacio: int = None) -> np.ndarray:
+    """
+    Unique "<base> <letters>" project names; the suffix grows past two letters only when the
+    name space (10 bases x 26^k) would hold fewer than `espacio` (default `n_proyectos`) names.
+    """
+    k = 2
+    while len(NOMBRES_PROYECTO) * 26**k < max(n_proyectos, espacio or 0):
+        k += 1
+    codigos = rng.choice(len(NOMBRES_PROYECTO) * 26**k, size=n_proyectos, replace=False)
+    nombres = np.array(NOMBRES_PROYECTO, dtype=object)[codigos // 26**k] + " "
+    for j in reversed(range(k)):
+        nombres = nombres + LETRAS[(codigos // 26**j) % 26]
+    return nombres
+
+def generar_proyectos_finanzas_catalogos(df_cliente, df_tipo_proyecto, df_estado, pids: np.ndarray,
+                                         nombres: np.ndarray, rng: np.random.Generator):
+    """
+    Projects `pids` (named `nombres`) with their task catalogue and finances, drawn column-wise.
+    """
+    n = len(pids)
+    cliente_id = rng.choice(df_cliente["cliente_id"].to_numpy(), n)
+    tipo_idx   = rng.integers(0, len(df_tipo_proyecto), n)
+    tipo_id    = df_tipo_proyecto["tipo_proyecto_id"].to_numpy()[tipo_idx]
+    tipo_nom   = df_tipo_proyecto["nombre"].to_numpy()[tipo_idx]
+
+    horas_min, horas_max = (np.array([RANGO_HORAS[t][i] for t in tipo_nom]) for i in (0, 1))
+    horas_plan = rng.integers(horas_min, horas_max + 1)
+    estado     = seleccionar_estado_realista(horas_plan, rng)
+    estado_id  = df_estado.set_index("nombre_estado").loc[np.array(ESTADOS)[estado], "estado_id"].to_numpy()
+
+    inicio_plan_dt = PLAN_START_MIN + rng.integers(0, int((PLAN_END_CAP - PLAN_START_MIN).astype(np.int64)) + 1, n).astype('timedelta64[s]')
+    duracion_dias  = rng.triangular(90, 400, 1080, n).astype(np.int64)
+    fin_plan_dt    = np.minimum(inicio_plan_dt + _dias(duracion_dias), PLAN_END_CAP)
+    inicio_plan, fin_plan = inicio_plan_dt.astype('datetime64[D]'), fin_plan_dt.astype('datetime64[D]')
+
+    iniciado   = estado != ESTADOS.index("Planificado")
+    completado = estado == ESTADOS.index("Completado")
+    cancelado  = estado == ESTADOS.index("Cancelado")
+    inicio_real = np.where(iniciado, np.minimum(inicio_plan + _dias(rng.integers(-10, 16, n)), HOY), np.datetime64('NaT'))
+    fin_real = np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+    fin_real[completado] = np.minimum(fin_plan[completado] + _dias(retraso_random(int(completado.sum()), rng)), HOY)
+    fin_real[cancelado]  = np.minimum(inicio_plan[cancelado] + _dias(rng.integers(10, duracion_dias[cancelado] + 1)), HOY)
+
+    beta = PROGRESO_BETA[estado]
+    progreso = rng.beta(beta[:, 0], beta[:, 1]) * np.where(cancelado, 0.6, 1.0)
+
+    montos = np.array([RANGO_MONTOS[t] for t in tipo_nom])
+    monto_pres = rng.integers(montos[:, 0], montos[:, 1] + 1)
+    monto_real = (monto_pres * np.clip(progreso + rng.normal(0, 0.05, n), 0.2, 1.2)).astype(np.int64)
+    ingreso    = (monto_real * np.where(completado, rng.uniform(1.1, 1.5, n), rng.uniform(0.8, 1.3, n))).astype(np.int64)
+
+    defectos_detectados = np.where(completado | cancelado, defects_poisson(horas_plan, rng), 0)
+
+    df_proyecto = pd.DataFrame({
+        "proyecto_id": pids,
+        "nombre": nombres,
+        "descripcion": frases(n, rng),
+        "fecha_inicio_plan": inicio_plan,
+        "fecha_fin_plan":   fin_plan,
+        "fecha_inicio_real": inicio_real,
+        "fecha_fin_real":    fin_real,
+        "horas_totales":     horas_plan,
+        "horas_trabajadas":  (horas_plan * progreso).astype(np.int64),
+        "estado_id":         estado_id,
+        "tipo_proyecto_id":  tipo_id,
+        "cliente_id":        cliente_id,
+        "defectos_detectados": defectos_detectados,
+        "metadata_extraccion": 0
+    })
     df_proyecto["catalogo_id"] = df_proyecto["proyecto_id"]
-    df_catalogo_tareas = pd.DataFrame(catalogos)
-    df_finanzas_proyecto = pd.DataFrame(finanzas)
+    df_catalogo_tareas = pd.DataFrame({"catalogo_id": pids, "nombre_catalogo": [f"Catálogo Proyecto {pid}" for pid in pids]})
+    df_finanzas_proyecto = pd.DataFrame({
+        "id": pids, "proyecto_id": pids,
+        "monto_presupuestado": monto_pres,
+        "monto_real_acumulado": monto_real,
+        "ingreso_proyecto": ingreso,
+        "metadata_extraccion": 0
+    })
     return df_proyecto, df_catalogo_tareas, df_finanzas_proyecto
 
-def generar_tareas(df_proyecto, df_tipo_proyecto, df_estado):
-    nombres_tarea = [
-        "Diseño de interfaz","Desarrollo backend","Desarrollo frontend","Integración BD","Pruebas unitarias",
-        "Pruebas funcionales","Revisión de código","Despliegue QA","Documentación técnica","Config. infraestructura",
-        "Soporte post-implementación","Análisis de requisitos","Optimización de consultas","Seguridad","CI/CD",
-        "Revisión de sprint","Implementación API","Validación QA","Mantenimiento","Control de calidad",
-        "Pruebas de rendimiento","Automatización de pruebas","Migración de datos","Ajustes post-despliegue"
-    ]
-    tipos_tarea = ["Desarrollo","Testing","Documentación","Soporte","Diseño","Implementación","Mantenimiento"]
-    prioridades = ["Alta","Media","Baja"]
-    distrib_tareas = {
-        "Consultoría Técnica": (12, 0.6), "Desarrollo Web": (22, 0.8), "Aplicación Móvil": (35, 1.0),
-        "Software Empresarial": (60, 1.1), "Infraestructura Cloud": (45, 0.9)
-    }
-
-    tareas=[]; tid=1
-    for _, p in df_proyecto.iterrows():
-        tipo_nom = df_tipo_proyecto.loc[df_tipo_proyecto.tipo_proyecto_id==p.tipo_proyecto_id,"nombre"].iat[0]
-        estado_nom = df_estado.loc[df_estado.estado_id==p.estado_id,"nombre_estado"].iat[0]
-        media, sigma = distrib_tareas[tipo_nom]
-        n_tareas = int(max(5, min(np.random.lognormal(mean=np.log(media), sigma=sigma), 200)))
-        fi, ff = p["fecha_inicio_plan"], p["fecha_fin_plan"]; dur = max(1, (ff - fi).days)
-
-        for _ in range(n_tareas):
-            completada = np.random.choice([1,0], p=[0.95,0.05]) if estado_nom=="Completado" else \
-                         np.random.choice([1,0], p=[0.65,0.35]) if estado_nom=="En ejecución" else \
-                         np.random.choice([1,0], p=[0.40,0.60]) if estado_nom=="En revisión" else \
-                         np.random.choice([1,0], p=[0.15,0.85]) if estado_nom=="Planificado" else \
-                         np.random.choice([1,0], p=[0.05,0.95])
-            avance_rel = np.random.beta(2,2)
-            fecha_entrega = fi + timedelta(days=int(avance_rel*dur))
-            fecha_completado = None
-            if completada:
-                retraso = max(0, int(np.random.normal(5,4)))
-                fecha_completado = fecha_entrega + timedelta(days=retraso)
-                if isinstance(p["fecha_fin_real"], (datetime,date)) and fecha_completado > p["fecha_fin_real"]:
-                    fecha_completado = p["fecha_fin_real"]
-            ref_fecha = fecha_completado if completada else fecha_entrega
-            tareas.append({
-                "tarea_id": tid,
-                "nombre_tarea": random.choice(nombres_tarea),
-                "tipo_tarea": random.choice(tipos_tarea),
-                "prioridad": np.random.choice(prioridades, p=[0.25,0.5,0.25]),
-                "completada": int(completada),
-                "fecha_entrega": fecha_entrega,
-                "fecha_completado": fecha_completado,
-                "catalogo_tareas_id": p["proyecto_id"],
-                "metadata_extraccion": 0
-            })
-            tid+=1
-    return pd.DataFrame(tareas)
+def tareas_por_proyecto(df_proyecto, df_tipo_proyecto, rng: np.random.Generator) -> np.ndarray:
+    tipo_nom = df_proyecto["tipo_proyecto_id"].map(df_tipo_proyecto.set_index("tipo_proyecto_id")["nombre"])
+    media = tipo_nom.map(lambda t: DISTRIB_TAREAS[t][0]).to_numpy(dtype=float)
+    sigma = tipo_nom.map(lambda t: DISTRIB_TAREAS[t][1]).to_numpy(dtype=float)
+    return np.clip(rng.lognormal(mean=np.log(media), sigma=sigma), 5, 200).astype(np.int64)
+
+def generar_tareas(df_proyecto, df_tipo_proyecto, df_estado, rng: np.random.Generator, primer_id: int = 1):
+    """
+    All tasks of the projects in `df_proyecto` at once, numbered from `primer_id`. The per-project
+    counts are the first draw from `rng`, so `tareas_por_proyecto` on a fresh copy predicts them.
+    """
+    n_tareas = tareas_por_proyecto(df_proyecto, df_tipo_proyecto, rng)
+    estado = _indice(df_proyecto["estado_id"], df_estado, "estado_id", "nombre_estado", ESTADOS)
+
+    proyecto = np.repeat(np.arange(len(df_proyecto)), n_tareas)
+    n = len(proyecto)
+    fi = df_proyecto["fecha_inicio_plan"].to_numpy(dtype='datetime64[D]')
+    ff = df_proyecto["fecha_fin_plan"].to_numpy(dtype='datetime64[D]')
+    fin_real = df_proyecto["fecha_fin_real"].to_numpy(dtype='datetime64[D]')[proyecto]
+    dur = np.maximum(1, (ff - fi).astype(np.int64))[proyecto]
+
+    completada = rng.random(n) < PROB_COMPLETADA[estado][proyecto]
+    fecha_entrega = fi[proyecto] + _dias(rng.beta(2, 2, n) * dur)
+    fecha_completado = fecha_entrega + _dias(np.maximum(0, np.trunc(rng.normal(5, 4, n))))
+    tope = ~np.isnat(fin_real) & (fecha_completado > fin_real)
+    fecha_completado = np.where(tope, fin_real, fecha_completado)
+    fecha_completado = np.where(completada, fecha_completado, np.datetime64('NaT'))
+
+    return pd.DataFrame({
+        "tarea_id": np.arange(primer_id, primer_id + n),
+        "nombre_tarea": np.array(NOMBRES_TAREA, dtype=object)[rng.integers(0, len(NOMBRES_TAREA), n)],
+        "tipo_tarea": np.array(TIPOS_TAREA, dtype=object)[rng.integers(0, len(TIPOS_TAREA), n)],
+        "prioridad": np.array(PRIORIDADES, dtype=object)[rng.choice(len(PRIORIDADES), n, p=[0.25,0.5,0.25])],
+        "completada": completada.astype(np.int64),
+        "fecha_entrega": fecha_entrega,
+        "fecha_completado": fecha_completado,
+        "catalogo_tareas_id": df_proyecto["proyecto_id"].to_numpy()[proyecto],
+        "metadata_extraccion": 0
+    })
 
 def generar_tipo_fase_defectos():
     tipos = [
@@ -326,111 +401,537 @@ def _normaliza(pesos: List[float]) -> np.ndarray:
     arr = np.array(pesos, dtype=float); s = arr.sum()
     return arr/ s if s>0 else np.ones_like(arr)/len(arr)
 
-def generar_defectos(df_proyecto, df_tipo_defecto, df_fase, tipo_priors, fase_pesos, severidad_pr):
-    severidades = ["Baja","Media","Alta"]
-    defectos=[]; did=1
+def generar_defectos(df_proyecto, df_tipo_defecto, df_fase, tipo_priors, fase_pesos, severidad_pr,
+                     rng: np.random.Generator, primer_id: int = 1):
+    """
+    All defects of the projects in `df_proyecto` at once, numbered from `primer_id`: category by
+    prior, then subtype, SDLC phase and severity conditional on it, registered between the
+    project's (real, else planned) start and end.
+    """
     categorias = sorted(set(df_tipo_defecto["categoria"]))
-    cat_prior = np.array([tipo_priors[c] for c in categorias], dtype=float); cat_prior /= cat_prior.sum()
-    cat_to_sub = {c: df_tipo_defecto[df_tipo_defecto["categoria"]==c] for c in categorias}
-
-    for _, p in df_proyecto.iterrows():
-        total = int(p.get("defectos_detectados", 0))
-        if total <= 0: continue
-
-        mix = np.random.multinomial(total, cat_prior)
-        inicio = p["fecha_inicio_real"] or p["fecha_inicio_plan"]
-        fin    = p["fecha_fin_real"]    or p["fecha_fin_plan"]
-        if isinstance(inicio, datetime): inicio = inicio.date()
-        if isinstance(fin, datetime):    fin = fin.date()
-
-        for c_idx, cat in enumerate(categorias):
-            n_cat = mix[c_idx]
-            if n_cat == 0: continue
-            f_pesos = _normaliza(fase_pesos[cat])
-            sever_p = severidad_pr[cat]
-            sub_df = cat_to_sub[cat]
-            sub_ids = sub_df["tipo_defecto_id"].tolist()
-
-            for _ in range(n_cat):
-                tipo_defecto_id = random.choice(sub_ids)
-                fase_id = int(np.random.choice(df_fase["fase_id"], p=f_pesos))
-                severidad = str(np.random.choice(severidades, p=sever_p))
-                base_alvo = random.choice(["usuario","datos","autenticación","API","UI","reportes","catálogo","pago"])
-                cat_sub = sub_df.loc[sub_df.tipo_defecto_id==tipo_defecto_id, "subtipo"].iat[0]
-                descripcion = f"{cat}: {cat_sub} en módulo de {base_alvo}."
-                fecha_registro = fake.date_between_dates(inicio, fin) if inicio!=fin else inicio
-                
-                defectos.append({
-                    "defecto_id": did,
-                    "proyecto_id": int(p["proyecto_id"]),
-                    "tipo_defecto_id": int(tipo_defecto_id),
-                    "fase_id": int(fase_id),
-                    "severidad": severidad,
-                    "descripcion": descripcion,
-                    "fecha_registro": fecha_registro,
-                    "metadata_extraccion": 0
-                })
-                did+=1
-    return pd.DataFrame(defectos)
-
-def generar_asignaciones(df_proyecto, df_empleado):
-    from numpy.random import poisson
-    asignaciones=[]
-    for _, p in df_proyecto.iterrows():
-        base_media = p["horas_totales"]/400
-        media = max(3, base_media * random.uniform(0.9,1.3))
-        n = int(max(3, min(poisson(media), 30)))
-        seleccionados = random.sample(df_empleado["empleado_id"].tolist(), k=min(n, len(df_empleado)))
-        for e in seleccionados:
-            asignaciones.append({
-                "proyecto_id": int(p["proyecto_id"]), 
-                "empleado_id": int(e),
-                "metadata_extraccion": 0
-            })
-    return pd.DataFrame(asignaciones)
-
-def exportar_csvs(dfs: Dict[str, pd.DataFrame], out_dir: str):
+    cat_prior = _normaliza([tipo_priors[c] for c in categorias])
+    fase_p = np.array([_normaliza(fase_pesos[c]) for c in categorias])
+    sever_p = np.array([severidad_pr[c] for c in categorias])
+    sub_ids = [df_tipo_defecto.loc[df_tipo_defecto["categoria"]==c, "tipo_defecto_id"].to_numpy() for c in categorias]
+    n_sub = np.array([len(ids) for ids in sub_ids])
+    sub_tabla = np.zeros((len(categorias), n_sub.max()), dtype=np.int64)
+    for i, ids in enumerate(sub_ids):
+        sub_tabla[i, :len(ids)] = ids
+
+    proyecto = np.repeat(np.arange(len(df_proyecto)), df_proyecto["defectos_detectados"].to_numpy())
+    n = len(proyecto)
+    cat = rng.choice(len(categorias), n, p=cat_prior)
+    tipo_defecto_id = sub_tabla[cat, (rng.random(n) * n_sub[cat]).astype(np.int64)]
+    fase_id = df_fase["fase_id"].to_numpy()[_categorica(rng, fase_p[cat])]
+    severidad = np.array(SEVERIDADES, dtype=object)[_categorica(rng, sever_p[cat])]
+    modulo = np.array(MODULOS, dtype=object)[rng.integers(0, len(MODULOS), n)]
+    subtipo = df_tipo_defecto.set_index("tipo_defecto_id")["subtipo"].loc[tipo_defecto_id].to_numpy()
+    descripcion = np.array(categorias, dtype=object)[cat] + ": " + subtipo + " en módulo de " + modulo + "."
+
+    inicio = df_proyecto["fecha_inicio_real"].fillna(df_proyecto["fecha_inicio_plan"]).to_numpy(dtype='datetime64[D]')
+    fin    = df_proyecto["fecha_fin_real"].fillna(df_proyecto["fecha_fin_plan"]).to_numpy(dtype='datetime64[D]')
+
+    return pd.DataFrame({
+        "defecto_id": np.arange(primer_id, primer_id + n),
+        "proyecto_id": df_proyecto["proyecto_id"].to_numpy()[proyecto],
+        "tipo_defecto_id": tipo_defecto_id,
+        "fase_id": fase_id,
+        "severidad": severidad,
+        "descripcion": descripcion,
+        "fecha_registro": calendario.random_dates(inicio[proyecto], fin[proyecto], rng=rng),
+        "metadata_extraccion": 0
+    })
+
+def generar_asignaciones(df_proyecto, df_empleado, rng: np.random.Generator):
+    """
+    3-30 distinct employees per project (Poisson around planned hours / 400), sampled without
+    replacement by ranking one random key per (project, employee).
+    """
+    empleados = df_empleado["empleado_id"].to_numpy()
+    horas = df_proyecto["horas_totales"].to_numpy()
+    media = np.maximum(3, horas/400 * rng.uniform(0.9, 1.3, len(horas)))
+    k = np.minimum(np.clip(rng.poisson(media), 3, 30), len(empleados))
+
+    elegidos = np.argsort(rng.random((len(horas), len(empleados))), axis=1)[:, :k.max(initial=0)]
+    mascara = np.arange(elegidos.shape[1]) < k[:, None]
+    return pd.DataFrame({
+        "proyecto_id": np.repeat(df_proyecto["proyecto_id"].to_numpy(), k),
+        "empleado_id": empleados[elegidos[mascara]],
+        "metadata_extraccion": 0
+    })
+
+
+# ==== Sharded generation ====
+# Projects are generated in shards of consecutive proyecto_id ranges. Every shard draws from its own
+# SeedSequence-spawned streams and writes its own part files, so the output only depends on the seed
+# and the shard size, never on the number of worker processes or the order shards finish in.
+ARCHIVOS_LOTE = ["catalogo_tareas.csv", "proyecto.csv", "tarea.csv", "proyecto_empleado.csv",
+                 "finanzas_proyecto.csv", "defecto.csv"]  # parents first (database load order)
+ORDEN_CARGA = ["departamento.csv", "rol.csv", "empleado.csv", "cliente.csv", "tipo_proyecto.csv", "estado.csv",
+               "tipo_defecto.csv", "fase_sdlc.csv"] + ARCHIVOS_LOTE
+CLAVE_BASE, CLAVE_NOMBRES, CLAVE_LOTES, CLAVE_DELTA = 0, 1, 2, 3
+# Parquet output: columns stored as dictionaries over a fixed vocabulary, and 0/1 flags
+CATEGORIAS_PARQUET = {"nombre_tarea": NOMBRES_TAREA, "tipo_tarea": TIPOS_TAREA, "prioridad": PRIORIDADES,
+                      "severidad": SEVERIDADES}
+FLAGS_PARQUET = {"completada", "metadata_extraccion"}
+DIR_PARTES = ".lotes"
+
+_contexto: dict = {}
+
+def generador(semilla: int, *clave: int) -> np.random.Generator:
+    return np.random.default_rng(np.random.SeedSequence(semilla, spawn_key=clave))
+
+def generadores_lote(semilla: int, lote: int) -> List[np.random.Generator]:
+    """
+    Independent (proyectos, tareas, defectos, asignaciones) streams of shard `lote`.
+    """
+    ss = np.random.SeedSequence(semilla, spawn_key=(CLAVE_LOTES, lote))
+    return [np.random.default_rng(s) for s in ss.spawn(4)]
+
+def _iniciar_contexto(base: Dict[str, pd.DataFrame], defectos_cfg: tuple, semilla: int, out_dir: str, formato: str):
+    _contexto.update(base=base, defectos_cfg=defectos_cfg, semilla=semilla, out_dir=out_dir, formato=formato)
+
+def _proyectos_lote(lote: int, pids: np.ndarray, nombres: np.ndarray):
+    base = _contexto["base"]
+    rngs = generadores_lote(_contexto["semilla"], lote)
+    tablas = generar_proyectos_finanzas_catalogos(
+        base["cliente.csv"], base["tipo_proyecto.csv"], base["estado.csv"], pids, nombres, rngs[0]
+    )
+    return tablas, rngs
+
+def contar_lote(tarea: tuple) -> tuple:
+    """
+    (tasks, defects) shard `lote` will produce; only its projects are generated.
+    """
+    lote, pids, nombres = tarea
+    (df_proyecto, _, _), rngs = _proyectos_lote(lote, pids, nombres)
+    n_tareas = tareas_por_proyecto(df_proyecto, _contexto["base"]["tipo_proyecto.csv"], rngs[1])
+    return int(n_tareas.sum()), int(df_proyecto["defectos_detectados"].sum())
+
+def construir_lote(tarea: tuple) -> Dict[str, pd.DataFrame]:
+    """
+    Shard `lote`: projects `pids` with their catalogue, finances, tasks, defects and assignments,
+    keyed by output file in load order.
+    """
+    lote, pids, nombres, primer_tarea_id, primer_defecto_id = tarea
+    base = _contexto["base"]
+    (df_proyecto, df_catalogo_tareas, df_finanzas_proyecto), rngs = _proyectos_lote(lote, pids, nombres)
+    return {
+        "catalogo_tareas.csv": df_catalogo_tareas,
+        "proyecto.csv": df_proyecto,
+        "tarea.csv": generar_tareas(df_proyecto, base["tipo_proyecto.csv"], base["estado.csv"], rngs[1], primer_tarea_id),
+        "proyecto_empleado.csv": generar_asignaciones(df_proyecto, base["empleado.csv"], rngs[3]),
+        "finanzas_proyecto.csv": df_finanzas_proyecto,
+        "defecto.csv": generar_defectos(df_proyecto, base["tipo_defecto.csv"], base["fase_sdlc.csv"],
+                                        *_contexto["defectos_cfg"], rngs[2], primer_defecto_id)
+    }
+
+def generar_lote(tarea: tuple) -> Dict[str, int]:
+    """
+    Generate shard `lote` and write it to its part files; returns the rows written per file.
+    """
+    lote = tarea[0]
+    dfs = construir_lote(tarea)
+    partes = os.path.join(_contexto["out_dir"], DIR_PARTES)
+    for fname, df in dfs.items():
+        parte = os.path.join(partes, f"{fname}.{lote:06d}")
+        if _contexto["formato"] == "parquet":
+            pq.write_table(tabla_parquet(df), parte)
+        else:
+            df.to_csv(parte, index=False, encoding="utf-8", header=lote == 0)
+    return {fname: len(df) for fname, df in dfs.items()}
+
+def en_orden(pool, fn, tareas: List[tuple], en_vuelo: int):
+    """
+    Like pool.map, but with at most `en_vuelo` shards submitted ahead of the consumer, so finished
+    shards never pile up in memory while the main process writes the previous ones.
+    """
+    pendientes = deque()
+    for tarea in tareas:
+        pendientes.append(pool.submit(fn, tarea))
+        if len(pendientes) >= en_vuelo:
+            yield pendientes.popleft().result()
+    while pendientes:
+        yield pendientes.popleft().result()
+
+def unir_partes(out_dir: str, n_lotes: int, formato: str = "csv"):
+    """
+    Concatenate the shards' part files, in shard order, into the final files (a Parquet file
+    gets one row group per shard).
+    """
+    partes = os.path.join(out_dir, DIR_PARTES)
+    for fname in ARCHIVOS_LOTE:
+        if formato == "parquet":
+            escritor = None
+            for lote in range(n_lotes):
+                tabla = pq.read_table(os.path.join(partes, f"{fname}.{lote:06d}"), memory_map=True)
+                escritor = escritor or pq.ParquetWriter(os.path.join(out_dir, nombre_archivo(fname, formato)), tabla.schema)
+                escritor.write_table(tabla)
+            escritor.close()
+            continue
+        with open(os.path.join(out_dir, fname), "wb") as destino:
+            for lote in range(n_lotes):
+                with open(os.path.join(partes, f"{fname}.{lote:06d}"), "rb") as parte:
+                    shutil.copyfileobj(parte, destino, 1 << 20)
+    shutil.rmtree(partes)
+
+def nombre_archivo(fname: str, formato: str) -> str:
+    return fname[:-len(".csv")] + ".parquet" if formato == "parquet" else fname
+
+def tabla_parquet(df: pd.DataFrame) -> "pa.Table":
+    """
+    Arrow table with compact types: fixed-vocabulary text as int8 dictionaries, dates as date32,
+    ids and amounts as int32 and 0/1 flags as int8 (the same schema for every shard).
+    """
+    df = df.assign(**{col: pd.Categorical(df[col], categories=categorias)
+                      for col, categorias in CATEGORIAS_PARQUET.items() if col in df})
+    tabla = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+    campos = []
+    for campo in tabla.schema:
+        if pa.types.is_timestamp(campo.type):
+            campo = campo.with_type(pa.date32())
+        elif campo.name in FLAGS_PARQUET:
+            campo = campo.with_type(pa.int8())
+        elif pa.types.is_integer(campo.type):
+            campo = campo.with_type(pa.int32())
+        elif pa.types.is_dictionary(campo.type):
+            campo = campo.with_type(pa.dictionary(pa.int8(), pa.string()))
+        elif pa.types.is_large_string(campo.type):
+            campo = campo.with_type(pa.string())
+        campos.append(campo)
+    return tabla.cast(pa.schema(campos))
+
+def exportar_csvs(dfs: Dict[str, pd.DataFrame], out_dir: str, formato: str = "csv"):
     os.makedirs(out_dir, exist_ok=True)
     for fname, df in dfs.items():
-        path = os.path.join(out_dir, fname)
-        df.to_csv(path, index=False, encoding="utf-8")
-        print(f"✅ {fname} → {len(df):,} registros")
-
-# ==== Main Pipeline ====
-if __name__ == "__main__":
-    print("🔧 Generando Tablas base...")
-    df_departamento, df_rol, df_empleado, df_cliente, df_tipo_proyecto, df_estado = generar_tablas_base()
+        path = os.path.join(out_dir, nombre_archivo(fname, formato))
+        if formato == "parquet":
+            pq.write_table(tabla_parquet(df), path)
+        else:
+            df.to_csv(path, index=False, encoding="utf-8")
+        print(f"✅ {nombre_archivo(fname, formato)} → {len(df):,} registros")
+
+# ==== Direct database output ====
+def conectar_pmo(db_type: str, db_path: str):
+    """
+    Connection to the PMO database: the SQLite file `db_path`, or MySQL from the PMO_* variables
+    (etl.env).
+    """
+    if db_type == "sqlite":
+        return sqlite3.connect(db_path)
+    if mysql is None:
+        raise ImportError("mysql-connector-python no está instalado.")
+    return mysql.connector.connect(
+        host=os.getenv("PMO_HOST"), port=int(os.getenv("PMO_PORT", 3306)), user=os.getenv("PMO_USER"),
+        password=os.getenv("PMO_PASSWORD"), database=os.getenv("PMO_DB")
+    )
 
-    print("🔧 Generando Proyectos, catálogos y finanzas...")
+def preparar_pmo(conn, db_type: str):
+    """
+    Create the PMO tables and triggers if missing and empty the tables the generator fills.
+    """
+    with open(SQL_ESQUEMA_PMO, "r", encoding="utf-8") as f:
+        sql = "\n".join(l for l in f if not l.strip().startswith("--"))
+    omitir = ("CREATE DATABASE", "USE") + (("DROP TRIGGER", "CREATE TRIGGER") if db_type == "sqlite" else ())
+    cursor = conn.cursor()
+    for stmt in sql.split(";"):
+        stmt = stmt.strip()
+        if stmt and not stmt.upper().startswith(omitir):
+            cursor.execute(stmt)
+    if db_type == "sqlite":
+        with open(SQL_TRIGGERS_SQLITE, "r", encoding="utf-8") as f:
+            conn.executescript(f.read())
+    if db_type == "mysql":
+        # InnoDB refuses TRUNCATE on a referenced table; checks are back on before any insert
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    try:
+        for fname in reversed(ORDEN_CARGA):
+            cursor.execute(f"{'TRUNCATE TABLE' if db_type == 'mysql' else 'DELETE FROM'} {fname[:-4]}")
+    finally:
+        if db_type == "mysql":
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+    conn.commit()
+
+def insertar_tablas(conn, db_type: str, dfs: Dict[str, pd.DataFrame]):
+    """
+    Bulk-insert generated tables (keyed by CSV name, in load order) with executemany in batches
+    of FILAS_INSERT rows, and commit.
+    """
+    marcador = "?" if db_type == "sqlite" else "%s"
+    cursor = conn.cursor()
+    for fname, df in dfs.items():
+        if fname == "proyecto.csv":
+            df = df.rename(columns={"horas_totales": "horas_planificadas"})
+        sql = f"INSERT INTO {fname[:-4]} ({', '.join(df.columns)}) VALUES ({', '.join([marcador] * len(df.columns))})"
+        for inicio in range(0, len(df), FILAS_INSERT):
+            lote = df.iloc[inicio:inicio + FILAS_INSERT].copy()
+            for col in lote.select_dtypes("datetime").columns:
+                lote[col] = lote[col].dt.strftime("%Y-%m-%d")
+            lote = lote.astype(object).where(lote.notna(), None)
+            cursor.executemany(sql, list(lote.itertuples(index=False, name=None)))
+    conn.commit()
+
+# ==== Daily delta ====
+# Daily transition probabilities (ESTADOS order) of a touched active project, by current estado
+TRANSICIONES_DIA = {
+    "Planificado":  [0.60, 0.38, 0.00, 0.00, 0.02],
+    "En ejecución": [0.00, 0.70, 0.15, 0.12, 0.03],
+    "En revisión":  [0.00, 0.10, 0.50, 0.40, 0.00]
+}
+PROB_TAREA_DIA = 0.10            # P(an open task of a touched project is completed that day)
+TASA_DELTA = 0.02               # default --rate: fraction of active projects touched per day
+PROYECTOS_NUEVOS_POR_TOCADO = 0.2  # new projects per touched project (Poisson mean)
+IDS_POR_CONSULTA = 500           # ids per IN (...) when reading the touched projects' tasks
+
+def _filas_update(df: pd.DataFrame) -> List[tuple]:
+    df = df.copy()
+    for col in df.select_dtypes("datetime").columns:
+        df[col] = df[col].dt.strftime("%Y-%m-%d")
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+def generar_proyectos_nuevos(base: Dict[str, pd.DataFrame], primer_pid: int, n: int, existentes: set,
+                             fecha: np.datetime64, rng: np.random.Generator, primer_tarea_id: int) -> Dict[str, pd.DataFrame]:
+    """
+    `n` projects registered on `fecha`: planned to start within a month, no progress, no completed
+    tasks, with their catalogue, finances and assignments.
+    """
+    pids = np.arange(primer_pid, primer_pid + n)
+    nombres = []
+    while len(nombres) < n:
+        candidatos = generar_nombres_proyecto(n, rng, espacio=len(existentes) + n)
+        nombres += [c for c in dict.fromkeys(candidatos) if c not in existentes][:n - len(nombres)]
     df_proyecto, df_catalogo_tareas, df_finanzas_proyecto = generar_proyectos_finanzas_catalogos(
-        df_cliente, df_tipo_proyecto, df_estado
+        base["cliente"], base["tipo_proyecto"], base["estado"], pids, np.array(nombres, dtype=object), rng
+    )
+    duracion = df_proyecto["fecha_fin_plan"].to_numpy(dtype='datetime64[D]') - df_proyecto["fecha_inicio_plan"].to_numpy(dtype='datetime64[D]')
+    inicio_plan = fecha + _dias(rng.integers(0, 31, n))
+    df_proyecto = df_proyecto.assign(
+        estado_id=int(base["estado"].set_index("nombre_estado").at["Planificado", "estado_id"]),
+        fecha_inicio_plan=inicio_plan, fecha_fin_plan=inicio_plan + duracion,
+        fecha_inicio_real=pd.NaT, fecha_fin_real=pd.NaT, horas_trabajadas=0, defectos_detectados=0
     )
+    df_finanzas_proyecto = df_finanzas_proyecto.assign(monto_real_acumulado=0, ingreso_proyecto=0)
+    df_tarea = generar_tareas(df_proyecto, base["tipo_proyecto"], base["estado"], rng, primer_tarea_id)\
+        .assign(completada=0, fecha_completado=pd.NaT)
+    return {
+        "catalogo_tareas.csv": df_catalogo_tareas,
+        "proyecto.csv": df_proyecto,
+        "tarea.csv": df_tarea,
+        "proyecto_empleado.csv": generar_asignaciones(df_proyecto, base["empleado"], rng),
+        "finanzas_proyecto.csv": df_finanzas_proyecto
+    }
 
-    print("🔧 Generando Tareas...")
-    df_tarea = generar_tareas(df_proyecto, df_tipo_proyecto, df_estado)
+def generar_delta(conn, db_type: str, fecha: np.datetime64, rate: float, rng: np.random.Generator) -> Dict[str, int]:
+    """
+    Apply one day of activity to an existing PMO: a `rate` fraction of the active projects is
+    touched (state transitions such as En ejecución → Completado, task completions, progress and
+    finance updates, defects for the projects that close) and new projects are registered.
+    Every inserted or changed row gets metadata_extraccion = 0 so an incremental ETL picks it up.
+    """
+    marcador = "?" if db_type == "sqlite" else "%s"
+    base = {t: pd.read_sql(f"SELECT * FROM {t}", conn) for t in ("cliente", "tipo_proyecto", "estado", "empleado", "tipo_defecto", "fase_sdlc")}
+    proyectos = pd.read_sql("SELECT proyecto_id, nombre, fecha_inicio_plan, fecha_fin_plan, fecha_inicio_real, fecha_fin_real, "
+                            "horas_planificadas, horas_trabajadas, estado_id, defectos_detectados, catalogo_id FROM proyecto",
+                            conn, parse_dates=["fecha_inicio_plan", "fecha_fin_plan", "fecha_inicio_real", "fecha_fin_real"])
+    if proyectos.empty:
+        raise ValueError("La PMO no tiene proyectos: genere primero una carga completa.")
+    finanzas = pd.read_sql("SELECT proyecto_id, monto_presupuestado FROM finanzas_proyecto", conn)
+    ultimo = pd.read_sql("SELECT (SELECT MAX(tarea_id) FROM tarea) AS tarea, (SELECT MAX(defecto_id) FROM defecto) AS defecto", conn)\
+        .iloc[0].fillna(0).astype(int)
+    nombre_estado = base["estado"].set_index("estado_id")["nombre_estado"]
+    id_estado = base["estado"].set_index("nombre_estado")["estado_id"]
+
+    # 1. Touched projects and their state transitions
+    estado_nom = proyectos["estado_id"].map(nombre_estado)
+    activos = proyectos[estado_nom.isin(list(TRANSICIONES_DIA))]
+    n_tocados = min(len(activos), int(rng.binomial(len(activos), rate))) if len(activos) else 0
+    tocados = activos.iloc[np.sort(rng.choice(len(activos), n_tocados, replace=False))].copy()
+    antes = tocados["estado_id"].map(nombre_estado).to_numpy()
+    despues = np.array(ESTADOS)[_categorica(rng, np.array([TRANSICIONES_DIA[e] for e in antes]).reshape(-1, len(ESTADOS)))]
+    tocados["estado_id"] = id_estado.loc[despues].to_numpy()
+    cierra = np.isin(despues, ["Completado", "Cancelado"]) & (despues != antes)
+    inicia = (antes == "Planificado") & (despues != "Planificado")
+    tocados.loc[inicia | cierra, "fecha_inicio_real"] = tocados.loc[inicia | cierra, "fecha_inicio_real"]\
+        .fillna(pd.Timestamp(fecha))
+    tocados.loc[cierra, "fecha_fin_real"] = pd.Timestamp(fecha)
+
+    # Progress: a few days of work, or the final effort when the project is completed
+    plan = tocados["horas_planificadas"].to_numpy()
+    horas = np.minimum(plan, tocados["horas_trabajadas"].to_numpy() + (plan * rng.uniform(0.005, 0.03, len(tocados))).astype(np.int64))
+    completa = despues == "Completado"
+    horas[completa] = np.maximum(horas[completa], (plan[completa] * rng.beta(4, 1.2, completa.sum())).astype(np.int64))
+    tocados["horas_trabajadas"] = np.where(despues == "Planificado", tocados["horas_trabajadas"], horas)
+    tocados.loc[cierra, "defectos_detectados"] = defects_poisson(plan[cierra], rng)
+
+    # 2. Finances follow the new progress
+    fin = tocados[["proyecto_id"]].merge(finanzas, on="proyecto_id", how="left")
+    progreso = tocados["horas_trabajadas"].to_numpy() / np.maximum(1, plan)
+    fin["monto_real_acumulado"] = (fin["monto_presupuestado"].to_numpy(dtype=float) * np.clip(progreso + rng.normal(0, 0.05, len(fin)), 0.2, 1.2)).astype(np.int64)
+    fin["ingreso_proyecto"] = (fin["monto_real_acumulado"] * np.where(completa, rng.uniform(1.1, 1.5, len(fin)), rng.uniform(0.8, 1.3, len(fin)))).astype(np.int64)
+
+    # 3. Open tasks of touched projects: completed today (almost all of them when the project completes)
+    tareas = []
+    catalogos = tocados["catalogo_id"].astype(int).tolist()
+    for i in range(0, len(catalogos), IDS_POR_CONSULTA):
+        ids = ", ".join(map(str, catalogos[i:i + IDS_POR_CONSULTA]))
+        tareas.append(pd.read_sql(f"SELECT tarea_id, catalogo_tareas_id FROM tarea WHERE completada = 0 AND catalogo_tareas_id IN ({ids})", conn))
+    tareas = pd.concat(tareas, ignore_index=True) if tareas else pd.DataFrame(columns=["tarea_id", "catalogo_tareas_id"])
+    p_tarea = tareas["catalogo_tareas_id"].map(pd.Series(np.select([completa, despues == "Cancelado"], [PROB_COMPLETADA[ESTADOS.index("Completado")], 0.0], PROB_TAREA_DIA),
+                                                         index=tocados["catalogo_id"].to_numpy())).to_numpy(dtype=float)
+    tareas = tareas[rng.random(len(tareas)) < p_tarea].assign(fecha_completado=pd.Timestamp(fecha))
+
+    # 4. Defects found in the projects that closed today
+    _, _, tipo_priors, fase_pesos, severidad_pr = generar_tipo_fase_defectos()
+    defectos = generar_defectos(tocados[cierra], base["tipo_defecto"], base["fase_sdlc"], tipo_priors, fase_pesos,
+                                severidad_pr, rng, int(ultimo["defecto"]) + 1)
+
+    # 5. New projects
+    n_nuevos = int(rng.poisson(PROYECTOS_NUEVOS_POR_TOCADO * n_tocados))
+    nuevos = generar_proyectos_nuevos(base, int(proyectos["proyecto_id"].max()) + 1, n_nuevos, set(proyectos["nombre"]),
+                                      fecha, rng, int(ultimo["tarea"]) + 1)
+
+    cursor = conn.cursor()
+    cursor.executemany(
+        f"UPDATE proyecto SET estado_id = {marcador}, fecha_inicio_real = {marcador}, fecha_fin_real = {marcador}, "
+        f"horas_trabajadas = {marcador}, defectos_detectados = {marcador}, metadata_extraccion = 0 WHERE proyecto_id = {marcador}",
+        _filas_update(tocados[["estado_id", "fecha_inicio_real", "fecha_fin_real", "horas_trabajadas", "defectos_detectados", "proyecto_id"]]))
+    cursor.executemany(
+        f"UPDATE finanzas_proyecto SET monto_real_acumulado = {marcador}, ingreso_proyecto = {marcador}, "
+        f"metadata_extraccion = 0 WHERE proyecto_id = {marcador}",
+        _filas_update(fin[["monto_real_acumulado", "ingreso_proyecto", "proyecto_id"]]))
+    cursor.executemany(
+        f"UPDATE tarea SET completada = 1, fecha_completado = {marcador}, metadata_extraccion = 0 WHERE tarea_id = {marcador}",
+        _filas_update(tareas[["fecha_completado", "tarea_id"]]))
+    insertar_tablas(conn, db_type, {**nuevos, "defecto.csv": defectos})
+
+    return {
+        "proyectos tocados": n_tocados,
+        "transiciones de estado": int((despues != antes).sum()),
+        "proyectos cerrados": int(cierra.sum()),
+        "tareas completadas": len(tareas),
+        "defectos nuevos": len(defectos),
+        "finanzas actualizadas": len(fin),
+        "proyectos nuevos": n_nuevos,
+        "tareas nuevas": len(nuevos["tarea.csv"])
+    }
 
-    print("🔧 Generando Defectos...")
+# ==== Main Pipeline ====
+def generar_instantanea(args: argparse.Namespace):
+    """
+    Full snapshot of --projects projects, to CSV files or straight into the PMO (--db).
+    """
+    print("🔧 Generando Tablas base...")
+    df_departamento, df_rol, df_empleado, df_cliente, df_tipo_proyecto, df_estado = generar_tablas_base(
+        args.projects, generador(args.seed, CLAVE_BASE))
     df_tipo_defecto, df_fase_sdlc, tipo_priors, fase_pesos, severidad_pr = generar_tipo_fase_defectos()
-    df_defecto = generar_defectos(df_proyecto, df_tipo_defecto, df_fase_sdlc, tipo_priors, fase_pesos, severidad_pr)
-
-    print("🔧 Generando Asignaciones...")
-    df_proyecto_empleado = generar_asignaciones(df_proyecto, df_empleado)
-
-    print("💾 Exportando CSVs...")
-    exportar_csvs({
+    base = {
         "departamento.csv": df_departamento,
         "rol.csv": df_rol,
         "empleado.csv": df_empleado,
         "cliente.csv": df_cliente,
         "tipo_proyecto.csv": df_tipo_proyecto,
         "estado.csv": df_estado,
-        "proyecto.csv": df_proyecto,
-        "catalogo_tareas.csv": df_catalogo_tareas,
-        "tarea.csv": df_tarea,
-        "proyecto_empleado.csv": df_proyecto_empleado,
-        "finanzas_proyecto.csv": df_finanzas_proyecto,
         "tipo_defecto.csv": df_tipo_defecto,
-        "fase_sdlc.csv": df_fase_sdlc,
-        "defecto.csv": df_defecto
-    }, OUTPUT_DIR)
+        "fase_sdlc.csv": df_fase_sdlc
+    }
+
+    conn = None
+    if args.db:
+        print(f"💾 Insertando tablas base en la PMO ({args.db})...")
+        conn = conectar_pmo(args.db, args.db_path)
+        preparar_pmo(conn, args.db)
+        insertar_tablas(conn, args.db, base)
+    else:
+        print(f"💾 Exportando {args.format.upper()}s...")
+        exportar_csvs(base, args.output, args.format)
+        os.makedirs(os.path.join(args.output, DIR_PARTES), exist_ok=True)
+
+    nombres = generar_nombres_proyecto(args.projects, generador(args.seed, CLAVE_NOMBRES))
+    inicios = range(0, args.projects, args.batch_size)
+    lotes = [(lote, np.arange(inicio + 1, min(inicio + args.batch_size, args.projects) + 1),
+              nombres[inicio:inicio + args.batch_size]) for lote, inicio in enumerate(inicios)]
+    print(f"🔧 Generando {args.projects:,} proyectos en {len(lotes)} lotes con {args.workers} procesos...")
+
+    contexto = (base, (tipo_priors, fase_pesos, severidad_pr), args.seed, args.output, args.format)
+    pool = ProcessPoolExecutor(max_workers=args.workers, initializer=_iniciar_contexto, initargs=contexto) \
+        if args.workers > 1 else nullcontext()
+    try:
+        with pool:
+            if args.workers > 1:
+                mapear = lambda fn, tareas: en_orden(pool, fn, tareas, 2 * args.workers)
+            else:
+                mapear = map
+                _iniciar_contexto(*contexto)
+
+            # First pass: per-shard row counts, so every shard knows where its task and defect ids start
+            conteos = list(mapear(contar_lote, lotes))
+            primeras_tareas = np.cumsum([1] + [n_tareas for n_tareas, _ in conteos])
+            primeros_defectos = np.cumsum([1] + [n_defectos for _, n_defectos in conteos])
+
+            totales: Dict[str, int] = dict.fromkeys(ARCHIVOS_LOTE, 0)
+            tareas = [(lote, pids, nombres_lote, int(primeras_tareas[lote]), int(primeros_defectos[lote]))
+                      for lote, pids, nombres_lote in lotes]
+            # Workers write their own CSV parts; in database mode the main process inserts each
+            # shard as it arrives, so at most a few shards are ever held in memory
+            for (lote, pids, _), resultado in zip(lotes, mapear(construir_lote if args.db else generar_lote, tareas)):
+                if args.db:
+                    insertar_tablas(conn, args.db, resultado)
+                    resultado = {fname: len(df) for fname, df in resultado.items()}
+                for fname, n in resultado.items():
+                    totales[fname] += n
+                print(f"  lote {lote + 1}/{len(lotes)} (proyectos {pids[0]:,}-{pids[-1]:,}): "
+                      f"{resultado['tarea.csv']:,} tareas, {resultado['defecto.csv']:,} defectos")
+    finally:
+        if conn:
+            conn.close()
+
+    if not args.db:
+        unir_partes(args.output, len(lotes), args.format)
+    for fname, total in totales.items():
+        print(f"✅ {fname[:-4] if args.db else nombre_archivo(fname, args.format)} → {total:,} registros")
+
+def aplicar_delta(args: argparse.Namespace):
+    """
+    One day (--date) of changes applied to the existing PMO (--db). The random stream depends on
+    the seed and the date, so replaying a day reproduces it.
+    """
+    fecha = np.datetime64(args.date, "D")
+    print(f"🔧 Generando delta del {fecha} en la PMO ({args.db}, rate {args.rate})...")
+    conn = conectar_pmo(args.db, args.db_path)
+    try:
+        resumen = generar_delta(conn, args.db, fecha, args.rate, generador(args.seed, CLAVE_DELTA, int(fecha.astype(np.int64))))
+    finally:
+        conn.close()
+    for nombre, n in resumen.items():
+        print(f"✅ {nombre} → {n:,}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generador de datos sintéticos para la PMO")
+    parser.add_argument("--projects", type=int, default=NUM_PROYECTOS, help="número de proyectos a generar")
+    parser.add_argument("--seed", type=int, default=SEMILLA, help="semilla aleatoria")
+    parser.add_argument("--batch-size", type=int, default=LOTE_PROYECTOS,
+                        help="proyectos por lote (forma parte de la semilla: cambiarlo cambia los datos)")
+    parser.add_argument("--workers", type=int, default=NUM_WORKERS, help="procesos generadores (1 = en el proceso principal)")
+    parser.add_argument("--output", default=OUTPUT_DIR, help="directorio de salida de los archivos")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv",
+                        help="formato de salida: CSV o Parquet con tipos compactos (requiere pyarrow)")
+    parser.add_argument("--db", choices=["sqlite", "mysql"],
+                        help="insertar directamente en la PMO (vacía sus tablas) en lugar de escribir CSV")
+    parser.add_argument("--db-path", default=PMO_DB_PATH, help="archivo SQLite de la PMO (con --db sqlite)")
+    parser.add_argument("--delta", action="store_true",
+                        help="aplicar un día de cambios a una PMO existente (requiere --db) en lugar de generarla completa")
+    parser.add_argument("--rate", type=float, default=TASA_DELTA, help="fracción de proyectos activos que cambian en el día (--delta)")
+    parser.add_argument("--date", default=str(HOY), help="fecha del delta, AAAA-MM-DD (--delta)")
+    args = parser.parse_args()
+    if args.delta and not args.db:
+        parser.error("--delta requiere --db")
+    if args.format == "parquet" and pq is None:
+        parser.error("--format parquet requiere pyarrow")
+
+    random.seed(args.seed)
+    fake = get_fake(seed=args.seed)
+    if args.delta:
+        aplicar_delta(args)
+    else:
+        generar_instantanea(args)
     print("🏁 Listo.")
@@ -1,14 +1,27 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 import os
+import re
+import time
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, inspect, text
 from dotenv import load_dotenv
 
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
 # Load env vars
 base_dir = os.path.dirname(os.path.abspath(__file__))
 load_dotenv(os.path.join(base_dir, 'etl.env'))
 
 # Configuration
 CSV_DIR = os.path.join(base_dir, 'synthetic_output')
+PARQUET_BATCH_ROWS = 100_000  # rows per record batch read from a Parquet file
+RENAMES = {'proyecto': {'horas_totales': 'horas_planificadas'}}  # generator column -> PMO column
+SCHEMA_FILE = os.path.join(base_dir, '..', 'database', 'create_pmo_db.sql')
+# Tables loaded concurrently, each on its own pooled connection (1 = one table at a time)
+LOAD_WORKERS = int(os.getenv('PMO_LOAD_WORKERS', '4'))
 
 def get_db_connection():
     user = os.getenv('PMO_USER')
@@ -21,9 +34,115 @@ def get_db_connection():
         raise ValueError("Missing PMO database configuration in etl.env")
         
     url = f"mysql+mysqlconnector://{user}:{password}@{host}:{port}/{database}"
-    return create_engine(url)
+    return create_engine(url, pool_size=LOAD_WORKERS, max_overflow=0)
+
+def fk_dependencies(schema_path=SCHEMA_FILE):
+    """
+    Map each table in the schema to the tables its FOREIGN KEYs reference.
+    """
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        sql = '\n'.join(line.split('--')[0] for line in f)
+    deps = {}
+    for name, body in re.findall(r'CREATE TABLE\s+(?:IF NOT EXISTS\s+)?`?(\w+)`?\s*\((.*?)\);', sql, re.S | re.I):
+        deps[name] = set(re.findall(r'REFERENCES\s+`?(\w+)`?', body, re.I)) - {name}
+    return deps
+
+def secondary_indexes(inspector, table_name):
+    """
+    Indexes of `table_name` that can be dropped for a bulk load: everything but the primary key
+    and the indexes backing a FOREIGN KEY (InnoDB refuses to drop those).
+    """
+    fk_columns = [fk['constrained_columns'] for fk in inspector.get_foreign_keys(table_name)]
+    return [ix for ix in inspector.get_indexes(table_name)
+            if not any(ix['column_names'][:len(cols)] == cols for cols in fk_columns)]
+
+def read_table_batches(csv_file, table_name, table_columns):
+    """
+    Yield the generator output for `table_name` as DataFrames with PMO column names. A Parquet file
+    (generate_pmo_data.py --format parquet) is preferred: it is memory-mapped and only the columns
+    the table has are read, batch by batch. A CSV is read whole.
+    """
+    renames = RENAMES.get(table_name, {})
+    parquet_path = os.path.join(CSV_DIR, csv_file[:-len('.csv')] + '.parquet')
+    if os.path.exists(parquet_path):
+        if pq is None:
+            raise ImportError(f"{parquet_path} needs pyarrow to be read (pip install pyarrow)")
+        parquet_file = pq.ParquetFile(parquet_path, memory_map=True)
+        columns = [c for c in parquet_file.schema_arrow.names if renames.get(c, c) in table_columns]
+        for batch in parquet_file.iter_batches(batch_size=PARQUET_BATCH_ROWS, columns=columns):
+            yield batch.to_pandas().rename(columns=renames)
+        return
+
+    csv_path = os.path.join(CSV_DIR, csv_file)
+    if os.path.exists(csv_path):
+        yield pd.read_csv(csv_path).rename(columns=renames)
 
-def load_data(engine):
+def clear_tables(engine, deps):
+    """
+    Empty the tables in `deps` (table -> referenced tables) children first, so every DELETE passes
+    the FK checks. TRUNCATE is not an option: InnoDB refuses it on a referenced table.
+    """
+    remaining = dict(deps)
+    with engine.connect() as conn:
+        while remaining:
+            # Tables no other remaining table references
+            leaves = [t for t in remaining if not any(t in parents for parents in remaining.values())]
+            if not leaves:
+                raise ValueError(f"Circular foreign keys between {', '.join(sorted(remaining))}")
+            for table_name in sorted(leaves):
+                conn.execute(text(f"DELETE FROM {table_name};"))
+                del remaining[table_name]
+        conn.commit()
+
+def load_table(engine, csv_file, table_name):
+    """
+    Insert the generator output into one (emptied) table, on a connection of its own. Droppable
+    secondary indexes are removed for the bulk insert and rebuilt once at the end. FK checks stay
+    on: load_data only starts a table once its parents are loaded.
+    """
+    mysql = engine.dialect.name == 'mysql'
+    start = time.time()
+    inspector = inspect(engine)
+    table_columns = {c['name'] for c in inspector.get_columns(table_name)}
+    indexes = secondary_indexes(inspector, table_name)
+
+    with engine.connect() as conn:
+        if mysql:
+            # Session setting: skip unique checks on secondary indexes for the bulk insert
+            conn.execute(text("SET UNIQUE_CHECKS = 0;"))
+        rows = 0
+        try:
+            for ix in indexes:
+                conn.execute(text(f"DROP INDEX {ix['name']}{f' ON {table_name}' if mysql else ''};"))
+            for df in read_table_batches(csv_file, table_name, table_columns):
+                df.to_sql(table_name, conn, if_exists='append', index=False, chunksize=1000)
+                rows += len(df)
+            conn.commit()
+        except Exception:
+            # Discard the partial rows; MySQL has already committed the DROP INDEX statements
+            conn.rollback()
+            raise
+        finally:
+            # Rebuild the dropped indexes (a rollback may have restored them on SQLite) and reset
+            # the session before the connection goes back to the pool
+            existing = {ix['name'] for ix in inspect(conn).get_indexes(table_name)}
+            for ix in indexes:
+                if ix['name'] not in existing:
+                    unique = 'UNIQUE ' if ix.get('unique') else ''
+                    conn.execute(text(f"CREATE {unique}INDEX {ix['name']} ON {table_name} ({', '.join(ix['column_names'])});"))
+            if mysql:
+                conn.execute(text("SET UNIQUE_CHECKS = 1;"))
+            conn.commit()
+    return rows, time.time() - start
+
+def load_data(engine, workers=LOAD_WORKERS):
+    """
+    Replace the PMO rows with the generator output: every table with a file is emptied children
+    first, then loaded in foreign-key order. A table starts as soon as every table it references
+    is loaded, so independent tables load concurrently (up to `workers`) and the total approaches
+    the longest chain of dependent tables. If a table fails, the tables that depend on it are
+    skipped instead of being loaded without their parents.
+    """
     files = {
         "departamento.csv": "departamento",
         "rol.csv": "rol",
@@ -40,36 +159,46 @@ def load_data(engine):
         "fase_sdlc.csv": "fase_sdlc",
         "defecto.csv": "defecto"
     }
+    start = time.time()
+    schema_deps = fk_dependencies()
+    pending = {}
+    for csv_file, table_name in files.items():
+        parquet_file = csv_file[:-len('.csv')] + '.parquet'
+        if os.path.exists(os.path.join(CSV_DIR, csv_file)) or os.path.exists(os.path.join(CSV_DIR, parquet_file)):
+            pending[table_name] = csv_file
+        else:
+            print(f"File {csv_file} not found.")
+    # Only wait for parents that are part of this load
+    deps = {t: schema_deps.get(t, set()) & set(pending) for t in pending}
+    clear_tables(engine, deps)
 
-    with engine.connect() as conn:
-        # Disable FK checks for bulk load
-        conn.execute(text("SET FOREIGN_KEY_CHECKS = 0;"))
-        
-        for csv_file, table_name in files.items():
-            file_path = os.path.join(CSV_DIR, csv_file)
-            if os.path.exists(file_path):
+    loaded, failed = set(), set()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        running = {}
+        while pending or running:
+            for table_name in [t for t in pending if deps[t] & failed]:
+                print(f"Skipping {table_name}: depends on {', '.join(sorted(deps[table_name] & failed))}")
+                failed.add(table_name)
+                del pending[table_name]
+            for table_name in [t for t in pending if deps[t] <= loaded]:
                 print(f"Loading {table_name}...")
-                df = pd.read_csv(file_path)
-                
-                if table_name == 'proyecto':
-                    df.rename(columns={'horas_totales': 'horas_planificadas'}, inplace=True)
-                
-                # Truncate table before loading
+                running[executor.submit(load_table, engine, pending.pop(table_name), table_name)] = table_name
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                table_name = running.pop(future)
                 try:
-                    conn.execute(text(f"TRUNCATE TABLE {table_name};"))
-                except Exception as e:
-                    print(f"Error truncating {table_name}: {e}")
-
-                try:
-                    df.to_sql(table_name, engine, if_exists='append', index=False, chunksize=1000)
-                    print(f"Loaded {len(df)} rows into {table_name}")
+                    rows, seconds = future.result()
+                    loaded.add(table_name)
+                    print(f"Loaded {rows} rows into {table_name} in {seconds:.2f}s")
                 except Exception as e:
+                    failed.add(table_name)
                     print(f"Error loading {table_name}: {e}")
-            else:
-                print(f"File {csv_file} not found.")
-        
-        conn.execute(text("SET FOREIGN_KEY_CHECKS = 1;"))
-        conn.commit()
+
+    print(f"Loaded {len(loaded)} tables in {time.time() - start:.2f}s"
+          + (f" ({len(failed)} failed or skipped)" if failed else ""))
+    return loaded, failed
 
 if __name__ == '__main__':
     try:
@@ -0,0 +1,121 @@
+"""
+Shared fixtures for the generator, PMO loader and ETL tests: seeded SQLite PMOs built by the
+generator, empty SSDs from create_ssd_db.sql and an in-process ETL run against them.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+
+import pandas as pd
+import pytest
+
+ETL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(ETL_DIR)
+sys.path[:0] = [ETL_DIR, os.path.join(ETL_DIR, 'ETL-Proyecto', 'ETL-Proyecto')]
+
+import etl
+import generate_pmo_data as gen
+
+SEED = 11
+N_PROJECTS = 150
+BATCH_SIZE = 60
+
+def generate(seed: int = SEED, **options) -> None:
+    """
+    Run the generator in-process with the CLI defaults, overridden by `options`.
+    """
+    args = dict(projects=N_PROJECTS, seed=seed, batch_size=BATCH_SIZE, workers=1, output='.',
+                format='csv', db=None, db_path=None)
+    args.update(options)
+    random.seed(seed)
+    gen.fake = gen.get_fake(seed=seed)
+    gen.generar_instantanea(argparse.Namespace(**args))
+
+def read_table(db_path: str, table: str, drop: tuple = ()) -> pd.DataFrame:
+    """
+    Every row of `table` without the `drop` columns, sorted, for order-independent comparisons.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        df = pd.read_sql(f"SELECT * FROM {table}", conn).drop(columns=list(drop))
+    finally:
+        conn.close()
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+# PMO tables carrying the metadata_extraccion flag
+FLAGGED_TABLES = ['proyecto', 'tarea', 'finanzas_proyecto', 'proyecto_empleado', 'defecto']
+
+def unflagged(pmo_path: str) -> dict:
+    """
+    Rows still waiting for the ETL (metadata_extraccion = 0), per flagged PMO table.
+    """
+    conn = sqlite3.connect(pmo_path)
+    try:
+        return {t: conn.execute(f"SELECT COUNT(*) FROM {t} WHERE metadata_extraccion = 0").fetchone()[0]
+                for t in FLAGGED_TABLES}
+    finally:
+        conn.close()
+
+def last_run_state(ssd_path: str) -> str:
+    conn = sqlite3.connect(ssd_path)
+    try:
+        return conn.execute("SELECT estado FROM etl_run ORDER BY run_id DESC LIMIT 1").fetchone()[0]
+    finally:
+        conn.close()
+
+@pytest.fixture(name='read_table')
+def read_table_fixture():
+    return read_table
+
+@pytest.fixture(name='unflagged')
+def unflagged_fixture():
+    return unflagged
+
+@pytest.fixture(name='last_run_state')
+def last_run_state_fixture():
+    return last_run_state
+
+@pytest.fixture
+def make_pmo(tmp_path):
+    def make_pmo(name: str = 'pmo_db.sqlite', **options) -> str:
+        path = str(tmp_path / name)
+        generate(db='sqlite', db_path=path, output=str(tmp_path), **options)
+        return path
+    return make_pmo
+
+@pytest.fixture
+def make_snapshot(tmp_path):
+    def make_snapshot(name: str, **options) -> str:
+        path = tmp_path / name
+        path.mkdir()
+        generate(output=str(path), **options)
+        return str(path)
+    return make_snapshot
+
+@pytest.fixture
+def make_ssd(tmp_path):
+    def make_ssd(name: str = 'ssd_db.sqlite') -> str:
+        path = str(tmp_path / name)
+        conn = sqlite3.connect(path)
+        with open(etl.SSD_SCHEMA_FILE, encoding='utf-8') as f:
+            conn.executescript(f.read())
+        conn.close()
+        return path
+    return make_ssd
+
+@pytest.fixture
+def run_etl(monkeypatch):
+    """
+    Run etl.main() on SQLite between `pmo` and `ssd`; other module settings (ETL_MODE,
+    ETL_CHUNK_PROJECTS, ...) can be overridden as keyword arguments.
+    """
+    def run_etl(pmo: str, ssd: str, resume: bool = False, **settings) -> None:
+        defaults = {'DB_TYPE': 'sqlite', 'ETL_MODE': 'full', 'ETL_REPORT_DIR': '', 'ETL_STAGING_DIR': '',
+                    'ETL_CHUNK_PROJECTS': 0, 'ETL_TRANSFORM_WORKERS': 1}
+        defaults.update(settings, PMO_DB_PATH=pmo, SSD_DB_PATH=ssd)
+        for name, value in defaults.items():
+            monkeypatch.setattr(etl, name, value)
+        etl.main(resume=resume)
+    return run_etl
@@ -0,0 +1,86 @@
+import datetime
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import calendario
+
+DIAS = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
+MESES = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto',
+         'septiembre', 'octubre', 'noviembre', 'diciembre']
+
+def test_tiempo_id_of_mixed_inputs():
+    values = ['2024-02-29', datetime.date(1999, 12, 31), pd.Timestamp('2000-01-01 13:45'), None,
+              np.datetime64('2031-07-04'), pd.NaT]
+    ids = calendario.to_tiempo_id(values)
+    assert ids.dtype == 'Int64'
+    assert ids.tolist() == [20240229, 19991231, 20000101, pd.NA, 20310704, pd.NA]
+
+    series = pd.Series(values, index=list('abcdef'))
+    result = calendario.to_tiempo_id(series)
+    assert result.index.tolist() == list('abcdef')
+    assert result.tolist() == ids.tolist()
+
+@pytest.mark.parametrize('start, end', [('2023-11-15', '2025-03-02'), ('1999-12-31', '2000-01-01'), ('2024-02-29', '2024-02-29')])
+def test_calendar_matches_a_day_by_day_build(start, end):
+    calendar = calendario.build_calendar(start, end)
+
+    expected = []
+    day = datetime.date.fromisoformat(start)
+    while day <= datetime.date.fromisoformat(end):
+        key = int(day.strftime('%Y%m%d'))
+        expected.append({
+            'tiempo_id': key, 'fecha': pd.Timestamp(day), 'dia_id': key, 'dia': day.day,
+            'nombre_dia': DIAS[day.weekday()], 'mes_id': day.year * 100 + day.month,
+            'numero_mes': day.month, 'nombre_mes': MESES[day.month - 1],
+            'trimestre': (day.month - 1) // 3 + 1, 'anio_id': day.year, 'anio': day.year,
+        })
+        day += datetime.timedelta(days=1)
+    assert calendar.to_dict('records') == expected
+
+def test_time_dimensions_keys():
+    dim_tiempo, dim_dia, dim_mes, dim_anio = calendario.time_dimensions(
+        calendario.calendar_for(['2024-12-30', None, '2023-01-05']))
+
+    assert len(dim_tiempo) == (datetime.date(2024, 12, 30) - datetime.date(2023, 1, 5)).days + 1
+    for dim, key in ((dim_tiempo, 'tiempo_id'), (dim_dia, 'dia_id'), (dim_mes, 'mes_id'), (dim_anio, 'anio_id')):
+        assert dim[key].is_unique
+    assert dim_mes.mes_id.tolist() == [2023 * 100 + m for m in range(1, 13)] + [2024 * 100 + m for m in range(1, 13)]
+    assert dim_anio.anio_id.tolist() == [2023, 2024]
+    assert set(dim_dia.mes_id) == set(dim_mes.mes_id)
+    assert set(dim_mes.anio_id) == set(dim_anio.anio_id)
+
+    assert calendario.calendar_for([None, pd.NaT]).empty
+
+def test_random_dates_stay_in_range():
+    start = calendario.to_days(['2024-01-01', '2024-05-10', '2024-03-01'])
+    end = calendario.to_days(['2024-01-31', '2024-05-10', '2024-02-01'])  # last pair is reversed
+    draws = np.stack([calendario.random_dates(start, end, rng=np.random.default_rng(seed)) for seed in range(200)])
+    assert (draws >= start).all()
+    assert (draws[:, 0] <= end[0]).all() and len(np.unique(draws[:, 0])) == 31
+    assert (draws[:, 1:] == start[1:]).all()
+
+    again = calendario.random_dates(start, end, rng=np.random.default_rng(0))
+    assert (again == draws[0]).all()
+
+def test_etl_facts_reference_the_calendar(make_pmo, make_ssd, run_etl):
+    ssd = make_ssd()
+    run_etl(make_pmo(), ssd)
+    conn = sqlite3.connect(ssd)
+    try:
+        orphans = conn.execute("""
+            SELECT COUNT(*) FROM (
+                SELECT fecha_inicio_plan AS t FROM fact_proyecto UNION ALL
+                SELECT fecha_fin_plan FROM fact_proyecto UNION ALL
+                SELECT fecha_inicio_real FROM fact_proyecto UNION ALL
+                SELECT fecha_fin_real FROM fact_proyecto UNION ALL
+                SELECT tiempo_id FROM fact_defecto
+            ) AS k WHERE t IS NOT NULL AND t NOT IN (SELECT tiempo_id FROM dim_tiempo)
+        """).fetchone()[0]
+        assert orphans == 0
+        assert conn.execute("SELECT COUNT(*) FROM fact_defecto WHERE tiempo_id IS NOT NULL").fetchone()[0] > 0
+        assert conn.execute("SELECT COUNT(*) FROM dim_tiempo WHERE dia_id NOT IN (SELECT dia_id FROM dim_dia)").fetchone()[0] == 0
+    finally:
+        conn.close()
@@ -0,0 +1,62 @@
+import pytest
+
+import etl
+
+MYSQL_CONFIG = {'user': 'etl', 'password': 'secreto', 'host': 'pmo', 'port': '3306', 'database': 'pmo_db'}
+
+class FakeEngine:
+    def __init__(self, url, **options):
+        self.url, self.options, self.disposed = url, options, False
+
+    def raw_connection(self):
+        return self
+
+    def dispose(self):
+        self.disposed = True
+
+@pytest.fixture
+def engines(monkeypatch):
+    """
+    Every engine get_connection_factory creates, with a clean engine cache.
+    """
+    if etl.sqlalchemy is None:
+        pytest.skip('sqlalchemy not installed')
+    created = []
+
+    def create_engine(url, **options):
+        created.append(FakeEngine(url, **options))
+        return created[-1]
+    monkeypatch.setattr(etl, 'create_engine', create_engine)
+    monkeypatch.setattr(etl, '_ENGINES', {})
+    return created
+
+def test_mysql_engines_are_shared_and_disposed(engines):
+    connect = etl.get_connection_factory(MYSQL_CONFIG, 'mysql', pool_size=4)
+    assert etl.get_connection_factory(dict(MYSQL_CONFIG), 'mysql', pool_size=4)() is connect()
+    etl.get_connection_factory(MYSQL_CONFIG, 'mysql')
+    etl.get_connection_factory({**MYSQL_CONFIG, 'database': 'ssd_db'}, 'mysql', pool_size=4)
+
+    assert [(e.url.rsplit('/', 1)[1], e.options['pool_size']) for e in engines] == [('pmo_db', 4), ('pmo_db', 1), ('ssd_db', 4)]
+    etl.dispose_engines()
+    assert all(e.disposed for e in engines) and etl._ENGINES == {}
+    etl.get_connection_factory(MYSQL_CONFIG, 'mysql', pool_size=4)
+    assert len(engines) == 4
+
+def test_standalone_connection_bypasses_the_pools(engines, monkeypatch):
+    if etl.mysql is None:
+        pytest.skip('mysql-connector not installed')
+    opened = []
+    monkeypatch.setattr(etl.mysql.connector, 'connect', lambda **kwargs: opened.append(kwargs) or object())
+    monkeypatch.setattr(etl, 'ETL_LOADER', 'infile')
+
+    assert etl.get_db_connection(MYSQL_CONFIG) is not etl.get_db_connection(MYSQL_CONFIG)
+    assert opened == [{**MYSQL_CONFIG, 'allow_local_infile': True}] * 2 and engines == []
+
+def test_main_disposes_engines(make_pmo, make_ssd, run_etl, monkeypatch):
+    disposed = []
+    monkeypatch.setattr(etl, 'dispose_engines', lambda: disposed.append(True))
+    monkeypatch.setattr(etl, 'migrate_ssd_schema', lambda *args, **kwargs: 1 / 0)
+
+    with pytest.raises(ZeroDivisionError):
+        run_etl(make_pmo(), make_ssd())
+    assert disposed == [True]
@@ -0,0 +1,74 @@
+import sqlite3
+
+import numpy as np
+
+import generate_pmo_data as gen
+
+COMPARED_TABLES = {'fact_proyecto': (), 'fact_defecto': (), 'agg_kpi': ('agg_id',), 'agg_kpi_defecto': ('agg_id',)}
+
+def apply_delta(pmo, day, rate=0.4):
+    conn = sqlite3.connect(pmo)
+    try:
+        return gen.generar_delta(conn, 'sqlite', np.datetime64(day), rate, np.random.default_rng(5))
+    finally:
+        conn.close()
+
+def test_full_run_flags_every_extracted_row(make_pmo, make_ssd, run_etl, unflagged):
+    pmo = make_pmo()
+    assert sum(unflagged(pmo).values()) > 0
+
+    run_etl(pmo, make_ssd())
+
+    # Open projects are flagged too; the PMO resets the flag when one of their rows changes
+    assert not any(unflagged(pmo).values())
+
+def test_incremental_run_matches_full_reload(make_pmo, make_ssd, run_etl, read_table, unflagged, last_run_state):
+    pmo = make_pmo()
+    incremental_ssd = make_ssd('ssd_incremental.sqlite')
+    run_etl(pmo, incremental_ssd)
+    changes = apply_delta(pmo, '2026-03-02')
+    assert changes['proyectos cerrados'] > 0 and changes['defectos nuevos'] > 0
+
+    run_etl(pmo, incremental_ssd, ETL_MODE='incremental')
+    assert last_run_state(incremental_ssd) == 'publicado'
+    assert not any(unflagged(pmo).values())
+
+    full_ssd = make_ssd('ssd_full.sqlite')
+    run_etl(pmo, full_ssd)
+    for table, drop in COMPARED_TABLES.items():
+        incremental = read_table(incremental_ssd, table, drop)
+        assert len(incremental) > 0, table
+        assert incremental.equals(read_table(full_ssd, table, drop)), table
+
+def test_incremental_run_without_changes_publishes_nothing(make_pmo, make_ssd, run_etl, read_table, last_run_state):
+    pmo = make_pmo()
+    ssd = make_ssd()
+    run_etl(pmo, ssd)
+    before = read_table(ssd, 'fact_proyecto')
+
+    run_etl(pmo, ssd, ETL_MODE='incremental')
+
+    assert last_run_state(ssd) == 'sin_cambios'
+    assert read_table(ssd, 'fact_proyecto').equals(before)
+
+def test_plain_sql_update_is_picked_up_by_incremental_run(make_pmo, make_ssd, run_etl, read_table, unflagged, last_run_state):
+    pmo = make_pmo()
+    incremental_ssd = make_ssd('ssd_incremental.sqlite')
+    run_etl(pmo, incremental_ssd)
+    first, second = read_table(incremental_ssd, 'fact_proyecto')['proyecto_id'].iloc[:2].tolist()
+    conn = sqlite3.connect(pmo)
+    # Edits made outside the generator, which does not touch the flag
+    conn.execute("UPDATE proyecto SET horas_trabajadas = horas_trabajadas + 7 WHERE proyecto_id = ?", (first,))
+    conn.execute("UPDATE finanzas_proyecto SET monto_real_acumulado = monto_real_acumulado + 1000 WHERE proyecto_id = ?", (second,))
+    conn.commit()
+    conn.close()
+    assert unflagged(pmo) == {'proyecto': 1, 'tarea': 0, 'finanzas_proyecto': 1, 'proyecto_empleado': 0, 'defecto': 0}
+
+    run_etl(pmo, incremental_ssd, ETL_MODE='incremental')
+    assert last_run_state(incremental_ssd) == 'publicado'
+    assert not any(unflagged(pmo).values())
+
+    full_ssd = make_ssd('ssd_full.sqlite')
+    run_etl(pmo, full_ssd)
+    for table, drop in COMPARED_TABLES.items():
+        assert read_table(incremental_ssd, table, drop).equals(read_table(full_ssd, table, drop)), table
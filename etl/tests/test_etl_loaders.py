@@ -0,0 +1,189 @@
+import os
+import re
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import etl
+
+LOAD_QUERIES = etl.load_sql_queries(os.path.join(os.path.dirname(etl.__file__), 'sql_queries', 'load_queries.sql'))
+LOADERS = ['executemany', 'multirow', 'infile']
+
+def row_loop_rows(df):
+    """
+    The per-cell conversion insert_dataframe used before iter_row_batches, kept as the reference.
+    """
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = df[col].dt.strftime('%Y-%m-%d')
+        elif pd.api.types.is_object_dtype(df[col]):
+            df[col] = df[col].apply(lambda x: x.strftime('%Y-%m-%d') if hasattr(x, 'strftime') else x)
+    df = df.astype(object).where(pd.notnull(df), None)
+    return [tuple(x.item() if hasattr(x, 'item') else x for x in row) for row in df.to_numpy()]
+
+def read_load_data_file(path):
+    """
+    Rows of a CSV written for LOAD DATA (backslash escapes, \\N for NULL) as lists of strings.
+    """
+    field = re.compile(r'"((?:[^"\\]|\\.)*)"|([^,]*)')
+    rows = []
+    with open(path, encoding='utf-8', newline='') as f:
+        for line in f:
+            values, pos, line = [], 0, line[:-1]
+            while True:
+                match = field.match(line, pos)
+                if match.group(1) is not None:
+                    values.append(re.sub(r'\\(.)', lambda m: '\n' if m.group(1) == 'n' else m.group(1), match.group(1)))
+                else:
+                    values.append(None if match.group(2) == '\\N' else match.group(2))
+                pos = match.end() + 1
+                if pos > len(line):
+                    break
+            rows.append(values)
+    return rows
+
+class MySQLOnSQLite:
+    """
+    Connection and cursor in one that runs the MySQL statements of the three loaders on SQLite.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = []
+        self.rowcount = 0
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def execute(self, sql, params=()):
+        self.statements.append(' '.join(sql.split()))
+        load = re.match(r"LOAD DATA LOCAL INFILE '(.+?)' (\w*) ?INTO TABLE (\w+) .*\(([\w, ]+)\)(?: SET (.*))?$",
+                        self.statements[-1])
+        like = re.fullmatch(r'CREATE TEMPORARY TABLE (\w+) LIKE (\w+)', self.statements[-1])
+        if load:
+            path, duplicates, table, columns, constants = load.groups()
+            constants = [c.split(' = ') for c in constants.split(', ')] if constants else []
+            columns = columns.split(', ') + [c for c, _ in constants]
+            values = ['?'] * len(columns[:len(columns) - len(constants)]) + [v for _, v in constants]
+            self.rowcount = self.conn.executemany(
+                f"INSERT OR {duplicates or 'ABORT'} INTO {table} ({', '.join(columns)}) VALUES ({', '.join(values)})",
+                read_load_data_file(path)).rowcount
+        elif like:
+            ddl = self.conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (like.group(2),)).fetchone()[0]
+            self.conn.execute(re.sub(r'^CREATE TABLE (IF NOT EXISTS )?\w+', f'CREATE TEMP TABLE {like.group(1)}', ddl))
+        else:
+            self.rowcount = self.conn.execute(self.to_sqlite(sql), params).rowcount
+
+    def executemany(self, sql, rows):
+        self.statements.append(' '.join(sql.split()))
+        self.rowcount = self.conn.executemany(self.to_sqlite(sql), rows).rowcount
+
+    @staticmethod
+    def to_sqlite(sql):
+        sql = ' '.join(sql.split()).rstrip(';').replace('%s', '?').replace('INSERT IGNORE', 'INSERT OR IGNORE')
+        sql = sql.replace('DROP TEMPORARY TABLE', 'DROP TABLE')
+        if 'ON DUPLICATE KEY UPDATE' in sql:
+            head, updates = sql.split(' ON DUPLICATE KEY UPDATE ')
+            if ' SELECT ' in head:
+                head += ' WHERE true'  # SQLite needs it to parse INSERT ... SELECT ... ON CONFLICT
+            updates = re.sub(r'VALUES[(](\w+)[)]', r'excluded.\1', updates)
+            sql = f"{head} ON CONFLICT DO UPDATE SET {updates}"
+        return sql
+
+@pytest.fixture
+def mysql_ssd(make_ssd):
+    """
+    Open an SSD that already holds one row per table the loads below overlap with.
+    """
+    def mysql_ssd(name):
+        conn = sqlite3.connect(make_ssd(name))
+        conn.executescript("""
+            INSERT INTO dim_anio (anio_id, anio) VALUES (3, 1999);
+            INSERT INTO dim_cliente (cliente_id, nombre_cliente, sector, pais) VALUES (2, 'Viejo', 'Retail', 'Chile');
+            INSERT INTO fact_defecto (defecto_id, proyecto_id, severidad, count_defecto) VALUES (4, 1, 'Baja', 5);
+        """)
+        return MySQLOnSQLite(conn)
+    return mysql_ssd
+
+def sample_frames():
+    rng = np.random.default_rng(3)
+    n = 40
+    names = ['Acme, S.A.', 'Comillas "dobles"', 'Barra \\ invertida', 'Salto\nde línea', 'Ñandú', None]
+    return {
+        'dim_anio': pd.DataFrame({'anio_id': np.arange(1, 6), 'anio': np.arange(2020, 2025)}),
+        'dim_cliente': pd.DataFrame({
+            'cliente_id': np.arange(1, n + 1),
+            'nombre_cliente': [names[i % len(names)] for i in range(n)],
+            'sector': rng.choice(['Banca', 'Salud'], n),
+            'pais': ['México'] * n,
+        }),
+        'fact_defecto': pd.DataFrame({
+            'defecto_id': np.arange(1, n + 1),
+            'proyecto_id': rng.integers(1, 9, n),
+            'tipo_defecto_id': pd.array(np.where(rng.random(n) < 0.2, None, rng.integers(1, 4, n)), dtype='Int64'),
+            'fase_sdlc_id': rng.integers(1, 6, n),
+            'severidad': rng.choice(['Alta', 'Media', 'Baja'], n),
+            'tiempo_id': rng.integers(20200101, 20201231, n),
+        }),
+    }
+
+def load(ssd, loader):
+    for table, df in sample_frames().items():
+        assert etl.insert_dataframe(ssd, df, LOAD_QUERIES[f'load_{table}'], 'mysql', loader)
+    return {table: pd.read_sql(f"SELECT * FROM {table} ORDER BY 1", ssd.conn) for table in sample_frames()}
+
+def test_loaders_write_the_same_rows(mysql_ssd, monkeypatch):
+    monkeypatch.setattr(etl, 'ETL_BATCH_ROWS', 7)
+    tables = {loader: load(mysql_ssd(f'{loader}.sqlite'), loader) for loader in LOADERS}
+
+    expected = tables['executemany']
+    assert expected['dim_anio'].loc[expected['dim_anio'].anio_id == 3, 'anio'].item() == 1999  # IGNORE kept it
+    assert expected['dim_cliente'].nombre_cliente.tolist()[:6] == sample_frames()['dim_cliente'].nombre_cliente.tolist()[:6]
+    # The UPDATE clause leaves count_defecto alone
+    assert expected['fact_defecto'].set_index('defecto_id').count_defecto.to_dict() == {i: 5 if i == 4 else 1 for i in range(1, 41)}
+    for loader in ('multirow', 'infile'):
+        for table, df in expected.items():
+            pd.testing.assert_frame_equal(tables[loader][table], df, obj=f'{loader} {table}')
+
+def test_infile_upserts_through_a_temporary_table(mysql_ssd):
+    ssd = mysql_ssd('infile.sqlite')
+    load(ssd, 'infile')
+
+    loads = [s for s in ssd.statements if s.startswith('LOAD DATA')]
+    assert [re.search(r"' (\w*) ?INTO TABLE (\w+)", s).groups() for s in loads] == [
+        ('IGNORE', 'dim_anio'), ('REPLACE', 'dim_cliente_infile'), ('REPLACE', 'fact_defecto_infile')]
+    assert loads[2].endswith('SET count_defecto = 1')
+    upsert = next(s for s in ssd.statements if s.startswith('INSERT INTO fact_defecto'))
+    assert 'SELECT defecto_id, proyecto_id' in upsert and 'FROM fact_defecto_infile ON DUPLICATE KEY UPDATE' in upsert
+    assert ssd.statements[-1] == 'DROP TEMPORARY TABLE IF EXISTS fact_defecto_infile'
+
+def test_row_batches_match_the_per_cell_conversion():
+    rng = np.random.default_rng(8)
+    n = 53
+    days = pd.Series(pd.date_range('2024-01-01', periods=n)).where(rng.random(n) > 0.2)
+    df = pd.DataFrame({
+        'entero': rng.integers(-5, 5, n),
+        'flotante': np.where(rng.random(n) < 0.2, np.nan, rng.random(n)),
+        'booleano': rng.random(n) < 0.5,
+        'texto': [None if i % 7 == 0 else f'p{i}' for i in range(n)],
+        'fecha': days,
+        'fecha_objeto': [None if pd.isna(d) else d.date() for d in days],
+        'nulable': pd.array([None if i % 5 == 0 else i for i in range(n)], dtype='Int64'),
+    })
+    before = df.copy()
+
+    batches = list(etl.iter_row_batches(df, 10))
+    assert [len(batch) for batch in batches] == [10] * 5 + [3]
+    rows = [row for batch in batches for row in batch]
+    expected = row_loop_rows(df)
+    assert rows == expected
+    assert [[type(v) for v in row] for row in rows] == [[type(v) for v in row] for row in expected]
+    pd.testing.assert_frame_equal(df, before)
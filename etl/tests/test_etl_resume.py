@@ -0,0 +1,90 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+import etl
+
+pytest.importorskip('pyarrow')
+
+COMPARED_TABLES = {'dim_tiempo': (), 'dim_cliente': (), 'fact_proyecto': (), 'fact_defecto': (),
+                   'agg_kpi': ('agg_id',), 'agg_kpi_defecto': ('agg_id',)}
+CHUNK_PROJECTS = 40
+
+@pytest.fixture
+def clean_ssd(make_pmo, make_ssd, run_etl):
+    """
+    SSD loaded by an uninterrupted run over an identical (same seed) PMO.
+    """
+    ssd = make_ssd('clean.sqlite')
+    run_etl(make_pmo('clean_pmo.sqlite'), ssd, ETL_CHUNK_PROJECTS=CHUNK_PROJECTS)
+    return ssd
+
+def fail_load(monkeypatch, table, call):
+    """
+    Make the `call`-th load into `table` (1-based) fail as a rejected insert would.
+    """
+    insert_dataframe = etl.insert_dataframe
+    calls = []
+
+    def failing(conn, df, sql, *args, **kwargs):
+        if f'INTO {table}' in sql:
+            calls.append(sql)
+            if len(calls) == call:
+                return False
+        return insert_dataframe(conn, df, sql, *args, **kwargs)
+    monkeypatch.setattr(etl, 'insert_dataframe', failing)
+
+def last_report(ssd):
+    conn = sqlite3.connect(ssd)
+    try:
+        return json.loads(conn.execute("SELECT reporte FROM etl_run ORDER BY run_id DESC LIMIT 1").fetchone()[0])
+    finally:
+        conn.close()
+
+def test_resume_after_a_failed_load(make_pmo, make_ssd, run_etl, clean_ssd, read_table, unflagged,
+                                    last_run_state, monkeypatch, tmp_path):
+    pmo, ssd = make_pmo(), make_ssd()
+    settings = dict(ETL_STAGING_DIR=str(tmp_path / 'staging'), ETL_CHUNK_PROJECTS=CHUNK_PROJECTS)
+
+    with monkeypatch.context() as patch:
+        fail_load(patch, 'fact_defecto_staging', call=2)
+        run_etl(pmo, ssd, **settings)
+    assert last_run_state(ssd) == 'sin_publicar'
+    assert read_table(ssd, 'fact_proyecto').empty  # nothing published
+    assert sum(unflagged(pmo).values()) > 0
+    checkpoint = etl.read_checkpoint(settings['ETL_STAGING_DIR'], 'full')
+    assert list(checkpoint['bloques']) == ['chunk_0000', 'chunk_0002', 'chunk_0003']
+    assert 'fact_proyecto' in checkpoint['cargas']['chunk_0001']
+
+    run_etl(pmo, ssd, resume=True, **settings)
+    assert last_run_state(ssd) == 'publicado'
+    assert not any(unflagged(pmo).values())
+    # Only the failed table of the failed chunk is loaded again, plus the summaries
+    reloaded = [entry['tabla'] for entry in last_report(ssd)['cargas']]
+    assert reloaded == ['fact_defecto_staging', 'agg_kpi_staging', 'agg_kpi_defecto_staging']
+    for table, drop in COMPARED_TABLES.items():
+        assert read_table(ssd, table, drop).equals(read_table(clean_ssd, table, drop)), table
+
+    assert etl.read_checkpoint(settings['ETL_STAGING_DIR'], 'full')['marcado']
+    run_etl(pmo, ssd, resume=True, **settings)  # nothing left to resume
+    assert last_run_state(ssd) == 'publicado'
+
+def test_resume_after_a_failed_source_marking(make_pmo, make_ssd, run_etl, clean_ssd, read_table, unflagged,
+                                              monkeypatch, tmp_path):
+    pmo, ssd = make_pmo(), make_ssd()
+    settings = dict(ETL_STAGING_DIR=str(tmp_path / 'staging'), ETL_CHUNK_PROJECTS=CHUNK_PROJECTS)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(etl, 'mark_source_rows', lambda *args, **kwargs: False)
+        run_etl(pmo, ssd, **settings)
+    assert sum(unflagged(pmo).values()) > 0
+    published = read_table(ssd, 'fact_proyecto')
+    assert published.equals(read_table(clean_ssd, 'fact_proyecto'))
+
+    run_etl(pmo, ssd, resume=True, **settings)
+    assert not any(unflagged(pmo).values())
+    assert last_report(ssd)['cargas'] == []  # already published: only the marking is redone
+    assert read_table(ssd, 'fact_proyecto').equals(published)
+    assert os.path.exists(os.path.join(settings['ETL_STAGING_DIR'], etl.CHECKPOINT_FILE))
@@ -0,0 +1,107 @@
+import re
+import sqlite3
+
+import pytest
+
+import etl
+
+class FakeInnoDB:
+    """
+    Connection/cursor stand-in that keeps the foreign keys of each table the way InnoDB does:
+    CREATE TABLE ... LIKE copies none, RENAME TABLE re-points the children of a renamed parent,
+    and DROP TABLE of a referenced parent fails while FOREIGN_KEY_CHECKS is on (error 3730).
+    """
+    def __init__(self):
+        self.tables = {}
+        self.fk_checks = True
+
+    def cursor(self):
+        return self
+
+    def commit(self):
+        pass
+
+    def execute(self, sql, params=None):
+        sql = ' '.join(sql.split()).rstrip(';')
+        if match := re.fullmatch(r'SET FOREIGN_KEY_CHECKS = (\d)', sql):
+            self.fk_checks = match.group(1) == '1'
+        elif match := re.fullmatch(r'DROP TABLE IF EXISTS (\w+)', sql):
+            self.drop(match.group(1))
+        elif match := re.fullmatch(r'CREATE TABLE (\w+) LIKE (\w+)', sql):
+            assert match.group(2) in self.tables and match.group(1) not in self.tables
+            self.tables[match.group(1)] = []
+        elif match := re.match(r'CREATE TABLE (?:IF NOT EXISTS )?(\w+) \(', sql):
+            self.tables[match.group(1)] = self.references(sql)
+        elif match := re.match(r'ALTER TABLE (\w+) ADD FOREIGN KEY', sql):
+            parents = self.references(sql)
+            assert all(parent in self.tables for parent in parents), f"1824: {sql}"
+            self.tables[match.group(1)] += parents
+        elif sql.startswith('RENAME TABLE '):
+            for rename in sql[len('RENAME TABLE '):].split(', '):
+                old, new = rename.split(' TO ')
+                assert old in self.tables and new not in self.tables
+                self.tables[new] = self.tables.pop(old)
+                for parents in self.tables.values():
+                    parents[:] = [new if parent == old else parent for parent in parents]
+        else:
+            raise AssertionError(f"unexpected statement: {sql}")
+
+    def drop(self, table):
+        if table not in self.tables:
+            return
+        children = [child for child, parents in self.tables.items() if child != table and table in parents]
+        if self.fk_checks and children:
+            raise RuntimeError(f"3730: Cannot drop table '{table}' referenced by {children}")
+        del self.tables[table]
+
+    @staticmethod
+    def references(sql):
+        return re.findall(r'REFERENCES (\w+)', sql)
+
+@pytest.fixture
+def mysql_ssd():
+    db = FakeInnoDB()
+    for ddl in etl.ssd_table_ddl('mysql').values():
+        db.execute(ddl)
+    return db
+
+@pytest.mark.parametrize('tables', [etl.SSD_TABLES, etl.AGG_TABLES], ids=['full', 'incremental'])
+def test_mysql_swap_keeps_foreign_keys_on_live_tables(mysql_ssd, tables):
+    expected = {table: list(parents) for table, parents in mysql_ssd.tables.items()}
+    assert expected['fact_defecto']  # the fake tracks the schema's FKs
+
+    for _ in range(2):
+        etl.create_staging_tables(mysql_ssd, tables, 'mysql')
+        etl.swap_staging_tables(mysql_ssd, tables, 'mysql')
+        assert mysql_ssd.tables == expected
+        assert mysql_ssd.fk_checks
+
+def test_mysql_staging_references_staged_parents(mysql_ssd):
+    etl.create_staging_tables(mysql_ssd, ['dim_tiempo', 'fact_proyecto', 'fact_defecto'], 'mysql')
+    assert mysql_ssd.tables['fact_defecto_staging'] == [
+        'fact_proyecto_staging', 'dim_tipo_defecto', 'dim_fase_sdlc', 'dim_tiempo_staging']
+    assert mysql_ssd.tables['dim_tiempo_staging'] == ['dim_dia']
+
+def test_mysql_staging_leftovers_are_dropped(mysql_ssd):
+    etl.create_staging_tables(mysql_ssd, etl.SSD_TABLES, 'mysql')
+    # A failed run leaves its staging tables behind; the next one starts over
+    etl.create_staging_tables(mysql_ssd, etl.SSD_TABLES, 'mysql')
+    etl.drop_staging_tables(mysql_ssd, etl.SSD_TABLES, 'mysql')
+    assert set(mysql_ssd.tables) == set(etl.ssd_table_ddl('mysql'))
+
+def test_sqlite_swap_publishes_staging_rows(make_ssd):
+    conn = sqlite3.connect(make_ssd())
+    try:
+        for year in (2024, 2025):
+            etl.create_staging_tables(conn, etl.SSD_TABLES, 'sqlite')
+            conn.execute(f"INSERT INTO dim_anio{etl.STAGING_SUFFIX} (anio_id, anio) VALUES (1, ?)", (year,))
+            conn.commit()
+            etl.swap_staging_tables(conn, etl.SSD_TABLES, 'sqlite')
+            assert conn.execute("SELECT anio FROM dim_anio").fetchall() == [(year,)]
+
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert not {name for name in names if name.endswith(('_old', etl.STAGING_SUFFIX))}
+        parents = {row[2] for row in conn.execute("PRAGMA foreign_key_list(fact_defecto)")}
+        assert parents == {'fact_proyecto', 'dim_tipo_defecto', 'dim_fase_sdlc', 'dim_tiempo'}
+    finally:
+        conn.close()
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+import etl
+
+def agg_inputs():
+    projects = pd.DataFrame({
+        'proyecto_id': [1, 2, 3],
+        'cliente_id': [10, 10, 20],
+        'tipo_proyecto_id': [1, 1, 2],
+        'estado_id': [4, 4, 5],
+        'fecha_inicio_real': ['2023-01-05', '2023-01-28', '2023-02-01'],
+        'ganancia_proyecto': [100.0, 50.0, -20.0],
+        'roi': [10.0, 5.0, -2.0],
+        'monto_planificado': [1000.0, 500.0, 200.0],
+        'monto_real': [900.0, 450.0, 220.0],
+        'ev': [800.0, 500.0, 0.0],
+        'tareas_planificadas': [10, 0, 4],
+        'tareas_completadas': [8, 0, 0],
+        'tareas_retrasadas': [2, 0, 1],
+        'horas_planificadas': [100.0, 50.0, 20.0],
+        'horas_trabajadas': [110.0, 40.0, 25.0],
+        'empleados_asignados': [3, 2, 1],
+        'on_time': [1, 0, np.nan],
+        'delay_days': [0, 4, np.nan]
+    })
+    defects = pd.DataFrame({
+        'proyecto_id': [1, 1, 2, 3],
+        'severidad': ['Alta', 'Alta', 'Alta', 'Baja'],
+        'fase_id': [1, 1, 1, 2],
+        'tipo_defecto_id': [7, np.nan, 7, 8]
+    })
+    clients = pd.DataFrame({'cliente_id': [10, 20], 'pais': ['México', 'Chile']})
+    return projects, defects, clients
+
+def test_build_agg_kpi_buckets_by_start_month():
+    agg_kpi, _ = etl.build_agg_kpi(*agg_inputs())
+
+    assert len(agg_kpi) == 2
+    january = agg_kpi[agg_kpi['mes_inicio'] == pd.Timestamp('2023-01-01')].iloc[0]
+    assert january['pais'] == 'México'
+    assert january['n_proyectos'] == 2
+    assert january['ganancia_proyecto'] == 150.0
+    # A project without planned tasks counts as one, as in the API
+    assert january['tareas_planificadas'] == 11
+    assert january['proyectos_a_tiempo'] == 1
+    assert january['dias_retraso'] == 4
+
+def test_build_agg_kpi_counts_typed_defects_separately():
+    _, agg_defecto = etl.build_agg_kpi(*agg_inputs())
+
+    alta = agg_defecto[agg_defecto['severidad'] == 'Alta'].iloc[0]
+    assert (alta['n_defectos'], alta['con_tipo']) == (3, 2)
+    assert agg_defecto['n_defectos'].sum() == 4
+    assert list(agg_defecto.columns) == etl.AGG_KPI_DEFECTO_COLUMNS
+
+def row_loop_task_metrics(tasks, project_row):
+    """
+    The per-project row loop _calculate_task_metrics replaced, kept as the reference.
+    """
+    project_tasks = tasks.loc[tasks['catalogo_tareas_id'] == project_row['catalogo_id']]
+    total = len(project_tasks)
+    completed = int(project_tasks['completada'].sum())
+    delay_count = 0
+    for _, t in project_tasks.iterrows():
+        entrega, completado, finished = t.get('fecha_entrega'), t.get('fecha_completado'), bool(t.get('completada'))
+        if pd.notnull(entrega): entrega = pd.to_datetime(entrega)
+        if pd.notnull(completado): completado = pd.to_datetime(completado)
+        if finished and pd.notnull(entrega) and pd.notnull(completado):
+            if completado > entrega:
+                delay_count += 1
+        elif not finished and pd.notnull(entrega) and pd.notnull(project_row.get('fecha_fin_real')):
+            if entrega <= pd.to_datetime(project_row['fecha_fin_real']):
+                delay_count += 1
+    return total, completed, delay_count
+
+def random_dates(rng, n, missing):
+    dates = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 120, n), unit='D')
+    return pd.Series(dates.strftime('%Y-%m-%d'), dtype=object).where(rng.random(n) >= missing, None)
+
+def test_vectorized_task_metrics_match_row_loop():
+    rng = np.random.default_rng(3)
+    n_projects, n_tasks = 40, 600
+    projects = pd.DataFrame({
+        'proyecto_id': np.arange(1, n_projects + 1),
+        'catalogo_id': np.arange(101, 101 + n_projects),
+        'fecha_fin_real': random_dates(rng, n_projects, 0.2)
+    }, index=np.arange(n_projects) * 3)  # the merged frame's index need not be a RangeIndex
+    completada = pd.Series(rng.integers(0, 2, n_tasks), dtype=float)
+    completada[rng.random(n_tasks) < 0.05] = np.nan
+    tasks = pd.DataFrame({
+        # Catalogue ids 141-145 belong to no project; the last projects have no tasks
+        'catalogo_tareas_id': rng.integers(101, 146, n_tasks),
+        'completada': completada,
+        'fecha_entrega': random_dates(rng, n_tasks, 0.1),
+        'fecha_completado': random_dates(rng, n_tasks, 0.3)
+    })
+
+    metrics = etl._calculate_task_metrics(tasks, projects)
+
+    assert metrics.index.equals(projects.index)
+    expected = [row_loop_task_metrics(tasks, row) for _, row in projects.iterrows()]
+    assert [tuple(row) for row in metrics.itertuples(index=False)] == expected
+    assert metrics['tareas_retrasadas'].sum() > 0
+
+def test_task_metrics_without_tasks_are_zero():
+    projects = pd.DataFrame({'catalogo_id': [1, 2], 'fecha_fin_real': ['2023-01-01', None]})
+    tasks = pd.DataFrame(columns=['catalogo_tareas_id', 'completada', 'fecha_entrega', 'fecha_completado'])
+
+    metrics = etl._calculate_task_metrics(tasks, projects)
+
+    assert metrics.values.tolist() == [[0, 0, 0], [0, 0, 0]]
@@ -0,0 +1,85 @@
+import re
+import sqlite3
+
+import pytest
+
+import generate_pmo_data as gen
+import load_pmo_data
+
+class RecordingConnection:
+    """
+    Connection and cursor in one that records statements; `fail_on` makes matching ones raise.
+    """
+    def __init__(self, fail_on=None):
+        self.statements = []
+        self.fail_on = fail_on
+        self.commits = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        if self.fail_on and self.fail_on in sql:
+            raise RuntimeError(f"failed: {sql}")
+
+    def commit(self):
+        self.commits += 1
+
+def fk_statements(conn):
+    start = conn.statements.index("SET FOREIGN_KEY_CHECKS = 0")
+    return conn.statements[start:]
+
+def test_mysql_preparation_turns_fk_checks_back_on():
+    conn = RecordingConnection()
+    gen.preparar_pmo(conn, "mysql")
+
+    tables = [fname[:-4] for fname in reversed(gen.ORDEN_CARGA)]
+    assert fk_statements(conn) == (["SET FOREIGN_KEY_CHECKS = 0"] + [f"TRUNCATE TABLE {t}" for t in tables]
+                                   + ["SET FOREIGN_KEY_CHECKS = 1"])
+    assert conn.commits == 1
+
+def test_failed_truncate_turns_fk_checks_back_on():
+    conn = RecordingConnection(fail_on="TRUNCATE TABLE proyecto")
+    with pytest.raises(RuntimeError):
+        gen.preparar_pmo(conn, "mysql")
+    assert fk_statements(conn)[-1] == "SET FOREIGN_KEY_CHECKS = 1"
+
+def test_load_order_puts_parents_first():
+    # Inserts run with FK checks on, so every referenced table must be filled before
+    deps = load_pmo_data.fk_dependencies(gen.SQL_ESQUEMA_PMO)
+    order = [fname[:-4] for fname in gen.ORDEN_CARGA]
+    assert set(order) == set(deps)
+    for position, table in enumerate(order):
+        assert deps[table] <= set(order[:position]), table
+
+def test_flag_reset_triggers_cover_every_column(make_pmo, unflagged):
+    # A column missing from a trigger's comparison would change without the ETL noticing
+    pmo = make_pmo()
+    schemas = []
+    for path in (gen.SQL_ESQUEMA_PMO, gen.SQL_TRIGGERS_SQLITE):
+        with open(path, encoding='utf-8') as f:
+            schemas.append(f.read())
+    conn = sqlite3.connect(pmo)
+    try:
+        for table in unflagged(pmo):
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")} - {'metadata_extraccion'}
+            for sql in schemas:
+                trigger = re.search(rf"CREATE TRIGGER {table}_reset_extraccion .*?;\n", sql, re.S).group(0)
+                assert set(re.findall(r"OLD\.(\w+)", trigger)) == columns, table
+    finally:
+        conn.close()
+
+def test_only_data_changes_reset_the_flag(make_pmo, unflagged):
+    pmo = make_pmo()
+    conn = sqlite3.connect(pmo)
+    for table in unflagged(pmo):
+        conn.execute(f"UPDATE {table} SET metadata_extraccion = 1")
+    conn.execute("UPDATE proyecto SET metadata_extraccion = 1")  # marking again keeps the flag
+    conn.execute("UPDATE defecto SET severidad = severidad")  # same values: nothing changed
+    conn.execute("UPDATE tarea SET prioridad = prioridad || '!' WHERE tarea_id IN (1, 2)")
+    conn.execute("UPDATE finanzas_proyecto SET ingreso_proyecto = NULL WHERE id = 1")
+    conn.commit()
+    conn.close()
+
+    assert unflagged(pmo) == {'proyecto': 0, 'tarea': 2, 'finanzas_proyecto': 1, 'proyecto_empleado': 0, 'defecto': 0}
@@ -0,0 +1,36 @@
+import filecmp
+import os
+import sqlite3
+
+import pytest
+
+def assert_same_files(left, right):
+    names = sorted(os.listdir(left))
+    assert names and names == sorted(os.listdir(right))
+    _, mismatch, errors = filecmp.cmpfiles(left, right, names, shallow=False)
+    assert (mismatch, errors) == ([], [])
+
+@pytest.mark.parametrize('output_format', ['csv', 'parquet'])
+def test_output_is_identical_for_any_worker_count(make_snapshot, output_format):
+    if output_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    single = make_snapshot('w1', workers=1, format=output_format)
+    assert any(name.endswith(f'.{output_format}') for name in os.listdir(single))
+    for workers in (2, 3):
+        assert_same_files(single, make_snapshot(f'w{workers}', workers=workers, format=output_format))
+
+def test_seed_changes_the_output(make_snapshot):
+    first, second = make_snapshot('seed11', seed=11), make_snapshot('seed12', seed=12)
+    _, mismatch, _ = filecmp.cmpfiles(first, second, os.listdir(first), shallow=False)
+    assert 'proyecto.csv' in mismatch
+
+def test_database_output_is_identical_for_any_worker_count(make_pmo, read_table):
+    single, parallel = make_pmo('w1.sqlite', workers=1), make_pmo('w2.sqlite', workers=2)
+    conn = sqlite3.connect(single)
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    conn.close()
+    assert 'proyecto' in tables
+    for table in tables:
+        expected = read_table(single, table)
+        assert len(expected) > 0, table
+        assert read_table(parallel, table).equals(expected), table
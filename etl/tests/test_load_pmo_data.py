@@ -0,0 +1,105 @@
+import threading
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, event, inspect, text
+
+import load_pmo_data
+
+@pytest.fixture
+def pmo_engine(make_pmo, make_snapshot, monkeypatch):
+    """
+    Engine on a populated SQLite PMO with FK enforcement on, loading from a snapshot of the same seed.
+    """
+    monkeypatch.setattr(load_pmo_data, 'CSV_DIR', make_snapshot('snapshot'))
+    engine = create_engine(f"sqlite:///{make_pmo()}")
+    event.listen(engine, 'connect', lambda dbapi_conn, record: dbapi_conn.execute('PRAGMA foreign_keys = ON'))
+    yield engine
+    engine.dispose()
+
+def record_loads(monkeypatch, fail=()):
+    """
+    Log ('start'|'end', table) around every load_table call; tables in `fail` raise instead.
+    """
+    events, lock = [], threading.Lock()
+    load_table = load_pmo_data.load_table
+
+    def recording(engine, csv_file, table_name):
+        with lock:
+            events.append(('start', table_name))
+        if table_name in fail:
+            raise RuntimeError(f"{table_name} failed")
+        result = load_table(engine, csv_file, table_name)
+        with lock:
+            events.append(('end', table_name))
+        return result
+    monkeypatch.setattr(load_pmo_data, 'load_table', recording)
+    return events
+
+def test_reload_in_fk_order_with_checks_on(pmo_engine, make_pmo, read_table, monkeypatch):
+    with pmo_engine.begin() as conn:
+        conn.execute(text("DELETE FROM defecto WHERE defecto_id % 2 = 0"))
+        conn.execute(text("UPDATE proyecto SET nombre = 'cambiado'"))
+    events = record_loads(monkeypatch)
+
+    loaded, failed = load_pmo_data.load_data(pmo_engine, workers=3)
+
+    deps = load_pmo_data.fk_dependencies()
+    assert failed == set() and loaded == set(deps)
+    for table in loaded:
+        started = events.index(('start', table))
+        assert all(events.index(('end', parent)) < started for parent in deps[table]), table
+    with pmo_engine.connect() as conn:
+        assert conn.execute(text("PRAGMA foreign_key_check")).fetchall() == []
+
+    fresh = make_pmo('fresh.sqlite')
+    pmo = pmo_engine.url.database
+    for table in loaded:
+        assert read_table(pmo, table).equals(read_table(fresh, table)), table
+
+def test_dependents_of_a_failed_table_are_skipped(pmo_engine, monkeypatch):
+    events = record_loads(monkeypatch, fail={'proyecto'})
+
+    loaded, failed = load_pmo_data.load_data(pmo_engine, workers=2)
+
+    assert failed == {'proyecto', 'proyecto_empleado', 'finanzas_proyecto', 'defecto'}
+    assert {'tarea', 'empleado', 'estado'} <= loaded
+    assert not {('start', table) for table in failed - {'proyecto'}} & set(events)
+
+def test_clear_tables_rejects_circular_keys(pmo_engine):
+    with pytest.raises(ValueError, match='Circular'):
+        load_pmo_data.clear_tables(pmo_engine, {'a': {'b'}, 'b': {'a'}})
+
+def test_parquet_without_pyarrow_is_an_error(make_snapshot, monkeypatch):
+    pytest.importorskip('pyarrow')
+    monkeypatch.setattr(load_pmo_data, 'CSV_DIR', make_snapshot('parquet', format='parquet'))
+    batches = list(load_pmo_data.read_table_batches('estado.csv', 'estado', {'estado_id', 'nombre_estado'}))
+    assert sum(len(df) for df in batches) > 0
+
+    monkeypatch.setattr(load_pmo_data, 'pq', None)
+    with pytest.raises(ImportError, match='pyarrow'):
+        list(load_pmo_data.read_table_batches('estado.csv', 'estado', {'estado_id', 'nombre_estado'}))
+
+def test_failed_load_keeps_secondary_indexes(pmo_engine, monkeypatch):
+    with pmo_engine.begin() as conn:
+        conn.execute(text("CREATE INDEX ix_tarea_prioridad ON tarea (prioridad)"))
+        conn.execute(text("CREATE UNIQUE INDEX ux_tarea_id_tipo ON tarea (tarea_id, tipo_tarea)"))
+        conn.execute(text("DELETE FROM tarea"))
+    indexes = load_pmo_data.secondary_indexes(inspect(pmo_engine), 'tarea')
+    assert {ix['name'] for ix in indexes} == {'ix_tarea_prioridad', 'ux_tarea_id_tipo'}
+
+    def failing_to_sql(df, name, con, **kwargs):
+        con.commit()  # MySQL commits the DROP INDEX statements implicitly
+        raise RuntimeError("bad batch")
+    monkeypatch.setattr(pd.DataFrame, 'to_sql', failing_to_sql)
+
+    with pytest.raises(RuntimeError, match='bad batch'):
+        load_pmo_data.load_table(pmo_engine, 'tarea.csv', 'tarea')
+
+    after = {ix['name']: ix for ix in inspect(pmo_engine).get_indexes('tarea')}
+    for ix in indexes:
+        assert ix['name'] in after
+        assert after[ix['name']]['column_names'] == ix['column_names']
+        assert bool(after[ix['name']]['unique']) == bool(ix['unique'])
+    with pmo_engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM tarea")).scalar() == 0
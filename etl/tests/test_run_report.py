@@ -0,0 +1,44 @@
+import json
+import sqlite3
+
+import pandas as pd
+
+import etl
+
+LOAD_DIM_ANIO = "INSERT IGNORE INTO dim_anio (anio_id, anio) VALUES (%s, %s);"
+
+def test_skipped_duplicates_are_not_rejections(make_ssd):
+    conn = sqlite3.connect(make_ssd())
+    report = etl.RunReport('full', 'sqlite')
+    try:
+        years = pd.DataFrame({'anio_id': [2023, 2024], 'anio': [2023, 2024]})
+        assert etl.insert_dataframe(conn, years, LOAD_DIM_ANIO, 'sqlite', report=report)
+        assert etl.insert_dataframe(conn, pd.concat([years, years.assign(anio_id=[2025, 2026])]),
+                                    LOAD_DIM_ANIO, 'sqlite', report=report)
+
+        conn.execute("DROP TABLE dim_mes")
+        months = pd.DataFrame({'mes_id': [202401], 'nombre_mes': ['enero'], 'numero_mes': [1],
+                               'trimestre': [1], 'anio_id': [2024]})
+        assert not etl.insert_dataframe(conn, months, "INSERT IGNORE INTO dim_mes (mes_id, nombre_mes, numero_mes, "
+                                        "trimestre, anio_id) VALUES (%s, %s, %s, %s, %s);", 'sqlite', report=report)
+    finally:
+        conn.close()
+
+    loads = [(e['tabla'], e['filas'], e['rechazadas'], e['duplicados_omitidos']) for e in report.data['cargas']]
+    assert loads == [('dim_anio', 2, 0, 0), ('dim_anio', 4, 0, 2), ('dim_mes', 1, 1, None)]
+
+def test_chunked_run_records_no_rejections(make_pmo, make_ssd, run_etl):
+    ssd = make_ssd()
+    run_etl(make_pmo(), ssd, ETL_CHUNK_PROJECTS=40)
+
+    conn = sqlite3.connect(ssd)
+    try:
+        cargadas, rechazadas, reporte = conn.execute(
+            "SELECT filas_cargadas, filas_rechazadas, reporte FROM etl_run ORDER BY run_id DESC").fetchone()
+    finally:
+        conn.close()
+    loads = json.loads(reporte)['cargas']
+    # Chunks share calendar rows, which INSERT IGNORE skips after the first chunk
+    assert sum(entry['duplicados_omitidos'] for entry in loads if entry['tabla'] == 'dim_anio_staging') > 0
+    assert rechazadas == 0
+    assert cargadas == sum(entry['filas'] for entry in loads)
@@ -0,0 +1,99 @@
+import shutil
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import etl
+
+@pytest.fixture
+def unmarked_pmo(make_pmo):
+    """
+    A PMO with every metadata_extraccion flag reset to 0.
+    """
+    path = make_pmo()
+    conn = sqlite3.connect(path)
+    for table, _ in etl.SOURCE_FLAGS.values():
+        conn.execute(f"UPDATE {table} SET metadata_extraccion = 0")
+    conn.commit()
+    conn.close()
+    return path
+
+def read_keys(pmo, table, key_cols, flagged=None):
+    conn = sqlite3.connect(pmo)
+    try:
+        where = '' if flagged is None else f" WHERE metadata_extraccion = {int(flagged)}"
+        return pd.read_sql(f"SELECT {', '.join(key_cols)} FROM {table}{where}", conn)
+    finally:
+        conn.close()
+
+def extracted_sample(pmo):
+    """
+    About half of each table's keys, split into overlapping chunk frames as the ETL collects them.
+    """
+    rng = np.random.default_rng(4)
+    extracted = {}
+    for table, key_cols in etl.SOURCE_FLAGS.values():
+        keys = read_keys(pmo, table, key_cols)
+        keys = keys[rng.random(len(keys)) < 0.5].reset_index(drop=True)
+        middle = len(keys) // 2
+        extracted[table] = [keys.iloc[:middle + 10], keys.iloc[middle:]]
+    return extracted
+
+def flagged_keys(pmo):
+    return {table: read_keys(pmo, table, key_cols, flagged=True).sort_values(list(key_cols)).reset_index(drop=True)
+            for table, key_cols in etl.SOURCE_FLAGS.values()}
+
+def test_join_and_in_marking_flag_the_same_rows(unmarked_pmo, tmp_path, monkeypatch):
+    monkeypatch.setattr(etl, 'MARK_KEY_BATCH', 97)  # several temporary-table batches per table
+    in_pmo = str(tmp_path / 'in_pmo.sqlite')
+    shutil.copy(unmarked_pmo, in_pmo)
+    extracted = extracted_sample(unmarked_pmo)
+    assert len(pd.concat(extracted['tarea'])) > 1000  # several IN chunks too
+
+    assert etl.mark_source_rows({'database': unmarked_pmo}, extracted, 'sqlite', mode='join')
+    assert etl.mark_source_rows({'database': in_pmo}, extracted, 'sqlite', mode='in')
+
+    joined, listed = flagged_keys(unmarked_pmo), flagged_keys(in_pmo)
+    for table, key_cols in etl.SOURCE_FLAGS.values():
+        expected = pd.concat(extracted[table]).drop_duplicates().sort_values(list(key_cols)).reset_index(drop=True)
+        pd.testing.assert_frame_equal(joined[table], expected, obj=table)
+        pd.testing.assert_frame_equal(listed[table], expected, obj=table)
+
+@pytest.mark.parametrize('mode', ['join', 'in'])
+def test_failed_marking_flags_nothing(unmarked_pmo, mode):
+    extracted = extracted_sample(unmarked_pmo)
+    # A key frame without its second key column makes the last table fail
+    extracted['proyecto_empleado'] = [frame[['proyecto_id']] for frame in extracted['proyecto_empleado']]
+    extracted = {table: extracted[table] for table in ('proyecto', 'tarea', 'proyecto_empleado')}
+
+    assert not etl.mark_source_rows({'database': unmarked_pmo}, extracted, 'sqlite', mode=mode)
+    assert all(frame.empty for frame in flagged_keys(unmarked_pmo).values())
+
+class RecordingCursor:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+    def executemany(self, sql, rows):
+        self.statements.append((sql, list(rows)))
+
+def test_mysql_join_marking_statements(monkeypatch):
+    monkeypatch.setattr(etl, 'MARK_KEY_BATCH', 2)
+    cursor = RecordingCursor()
+    keys = [(1, 10), (1, 11), (2, 10)]
+
+    assert etl._mark_join(cursor, 'proyecto_empleado', ('proyecto_id', 'empleado_id'), keys, 'mysql') == 5
+    assert [sql for sql, _ in cursor.statements] == [
+        "CREATE TEMPORARY TABLE tmp_marcar_proyecto_empleado (proyecto_id BIGINT NOT NULL, "
+        "empleado_id BIGINT NOT NULL, PRIMARY KEY (proyecto_id, empleado_id))",
+        "INSERT INTO tmp_marcar_proyecto_empleado (proyecto_id, empleado_id) VALUES (%s, %s)",
+        "INSERT INTO tmp_marcar_proyecto_empleado (proyecto_id, empleado_id) VALUES (%s, %s)",
+        "UPDATE proyecto_empleado AS t JOIN tmp_marcar_proyecto_empleado AS k "
+        "ON t.proyecto_id = k.proyecto_id AND t.empleado_id = k.empleado_id SET t.metadata_extraccion = 1",
+        "DROP TEMPORARY TABLE tmp_marcar_proyecto_empleado",
+    ]
+    assert [rows for _, rows in cursor.statements[1:3]] == [keys[:2], keys[2:]]
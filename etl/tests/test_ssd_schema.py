@@ -0,0 +1,46 @@
+import sqlite3
+
+import etl
+
+DERIVED_COLUMNS = {'ev', 'spi', 'cpi', 'delay_days', 'on_time'}
+
+def columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+def test_column_definitions_keep_types_and_skip_constraints():
+    definitions = etl.column_definitions(etl.ssd_table_ddl('sqlite')['fact_proyecto'])
+
+    assert definitions['monto_planificado'] == 'monto_planificado DECIMAL(10,2)'
+    assert definitions['ev'] == 'ev DOUBLE'
+    assert definitions['cliente_id'] == 'cliente_id INT NULL'
+    assert not any(name.upper() in ('FOREIGN', 'UNIQUE') for name in definitions)
+
+def test_mysql_ddl_uses_auto_increment():
+    assert 'AUTO_INCREMENT' in etl.ssd_table_ddl('mysql')['etl_run']
+    assert 'AUTOINCREMENT' in etl.ssd_table_ddl('sqlite')['etl_run']
+
+def test_migration_upgrades_an_old_warehouse_and_is_idempotent():
+    conn = sqlite3.connect(':memory:')
+    # fact_proyecto and agg_kpi_defecto as they were before the derived columns and con_tipo
+    conn.execute("CREATE TABLE fact_proyecto (fact_id INT PRIMARY KEY, proyecto_id INT, nombre VARCHAR(255), "
+                 "roi DECIMAL(10,2), UNIQUE (proyecto_id))")
+    conn.execute("INSERT INTO fact_proyecto VALUES (1, 10, 'Portal', 12.5)")
+    conn.execute("CREATE TABLE agg_kpi_defecto (agg_id INTEGER PRIMARY KEY AUTOINCREMENT, severidad VARCHAR(50), "
+                 "n_defectos INT)")
+
+    changes = etl.migrate_ssd_schema(conn, 'sqlite')
+
+    assert DERIVED_COLUMNS <= columns(conn, 'fact_proyecto')
+    assert {f"fact_proyecto.{c}" for c in DERIVED_COLUMNS} <= set(changes)
+    assert 'agg_kpi_defecto.con_tipo' in changes
+    assert {'CREATE TABLE agg_kpi', 'CREATE TABLE etl_run', 'CREATE TABLE dim_tiempo'} <= set(changes)
+    assert 'CREATE TABLE agg_kpi_defecto' not in changes
+    assert conn.execute("SELECT proyecto_id, nombre, roi, ev FROM fact_proyecto").fetchall() == [(10, 'Portal', 12.5, None)]
+
+    assert etl.migrate_ssd_schema(conn, 'sqlite') == []
+
+def test_current_schema_needs_no_migration():
+    conn = sqlite3.connect(':memory:')
+    with open(etl.SSD_SCHEMA_FILE, encoding='utf-8') as f:
+        conn.executescript(f.read())
+    assert etl.migrate_ssd_schema(conn, 'sqlite') == []
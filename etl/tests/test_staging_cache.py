@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import etl
+
+pytest.importorskip('pyarrow')
+
+TABLES = ['dim_cliente', 'fact_proyecto', 'fact_defecto', 'agg_kpi', 'agg_kpi_defecto']
+
+def sample_tables():
+    return {
+        'projects': pd.DataFrame({
+            'proyecto_id': np.arange(1, 6),
+            'nombre': ['a', 'b', None, 'd', 'é'],
+            'presupuesto': [1.5, np.nan, 3.0, 4.25, 0.0],
+            'fecha_inicio': pd.to_datetime(['2024-01-01', None, '2024-03-01', '2024-04-01', '2024-05-01']),
+        }),
+        'tasks': pd.DataFrame({'tarea_id': pd.Series([], dtype='int64')}),
+    }
+
+def test_staging_round_trip(tmp_path):
+    entries = etl.write_staging(str(tmp_path), 'chunk_0000', sample_tables())
+
+    assert entries['projects']['file'] == os.path.join('chunk_0000', 'projects.parquet')
+    assert [entry['rows'] for entry in entries.values()] == [5, 0]
+    for entry in entries.values():
+        with open(tmp_path / entry['file'], 'rb') as f:
+            assert entry['sha256'] == hashlib.sha256(f.read()).hexdigest()
+
+    tables = etl.read_staging(str(tmp_path), entries)
+    for name, df in sample_tables().items():
+        pd.testing.assert_frame_equal(tables[name], df, check_dtype=name != 'tasks')
+
+def test_corrupted_staging_file_is_rejected(tmp_path):
+    entries = etl.write_staging(str(tmp_path), 'lookups', sample_tables())
+    with open(tmp_path / entries['projects']['file'], 'r+b') as f:
+        f.seek(20)
+        byte = f.read(1)
+        f.seek(20)
+        f.write(bytes([byte[0] ^ 0xFF]))
+
+    with pytest.raises(ValueError, match='checksum'):
+        etl.read_staging(str(tmp_path), entries)
+
+def test_manifest_must_be_complete_and_from_the_same_mode(tmp_path):
+    etl.write_staging_json(str(tmp_path), etl.STAGING_MANIFEST, {'mode': 'full', 'complete': False, 'parts': {}})
+    with pytest.raises(ValueError, match='incompleta'):
+        etl.read_staging_manifest(str(tmp_path), 'full')
+    assert etl.read_staging_manifest(str(tmp_path), 'full', require_complete=False)['parts'] == {}
+
+    etl.write_staging_json(str(tmp_path), etl.STAGING_MANIFEST, {'mode': 'full', 'complete': True, 'parts': {}})
+    with pytest.raises(ValueError, match='modo full'):
+        etl.read_staging_manifest(str(tmp_path), 'incremental')
+
+def test_replay_loads_the_cached_extraction(make_pmo, make_ssd, run_etl, read_table, tmp_path):
+    pmo, staging = make_pmo(), str(tmp_path / 'staging')
+    written, replayed = make_ssd('written.sqlite'), make_ssd('replayed.sqlite')
+    run_etl(pmo, written, ETL_STAGING_DIR=staging, ETL_CHUNK_PROJECTS=50)
+
+    with open(os.path.join(staging, etl.STAGING_MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    assert manifest['complete'] and len(manifest['chunks']) >= 3
+    assert sorted(manifest['parts']) == [f"chunk_{i:04d}" for i in range(len(manifest['chunks']))] + ['lookups']
+
+    # Replay must not see changes made to the PMO after the cache was written
+    conn = sqlite3.connect(pmo)
+    conn.execute("UPDATE proyecto SET nombre = 'cambiado'")
+    conn.commit()
+    conn.close()
+    run_etl(pmo, replayed, ETL_STAGING_DIR=staging, ETL_STAGING='replay', ETL_CHUNK_PROJECTS=50)
+
+    for table in TABLES:
+        drop = ('agg_id',) if table.startswith('agg_') else ()
+        pd.testing.assert_frame_equal(read_table(replayed, table, drop), read_table(written, table, drop), obj=table)
+    assert (read_table(replayed, 'fact_proyecto').nombre != 'cambiado').all()
@@ -3,6 +3,11 @@ import pandas as pd
 import os
 import sys
 
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
 # Configuration
 DB_CONFIG = {
     'host': 'yamabiko.proxy.rlwy.net',
@@ -14,6 +19,7 @@ DB_CONFIG = {
 
 SQL_FILE = 'create_pmo_db.sql'
 DATA_DIR = 'synthetic_output'
+PARQUET_BATCH_ROWS = 100_000  # rows per executemany when loading from Parquet
 
 def execute_sql_script(cursor, script_path):
     print(f"Executing SQL script: {script_path}")
@@ -32,6 +38,29 @@ def execute_sql_script(cursor, script_path):
         except mysql.connector.Error as err:
             print(f"Warning executing statement: {stmt[:50]}... -> {err}")
 
+def load_parquet(cursor, path, table_name):
+    """
+    Load a generator Parquet file (generate_pmo_data.py --format parquet): memory-mapped, only the
+    columns the table has, one record batch per executemany. Returns the rows inserted.
+    """
+    cursor.execute(f"SHOW COLUMNS FROM `{table_name}`")
+    table_columns = {row[0] for row in cursor.fetchall()}
+    renames = {'horas_totales': 'horas_planificadas'} if table_name == 'proyecto' else {}
+
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    columns = [c for c in parquet_file.schema_arrow.names if renames.get(c, c) in table_columns]
+    cols = ",".join([f"`{renames.get(c, c)}`" for c in columns])
+    placeholders = ",".join(["%s"] * len(columns))
+    sql = f"INSERT INTO `{table_name}` ({cols}) VALUES ({placeholders})"
+
+    rows = 0
+    for batch in parquet_file.iter_batches(batch_size=PARQUET_BATCH_ROWS, columns=columns):
+        # to_pylist gives plain Python values: str for dictionaries, date for date32, None for nulls
+        data = list(zip(*(batch.column(i).to_pylist() for i in range(batch.num_columns))))
+        cursor.executemany(sql, data)
+        rows += len(data)
+    return rows
+
 def load_data(conn):
     print("Loading data from CSVs...")
     files_tables = [
@@ -54,6 +83,19 @@ def load_data(conn):
     cursor = conn.cursor()
     
     for csv_file, table_name in files_tables:
+        parquet_path = os.path.join(DATA_DIR, csv_file[:-len('.csv')] + '.parquet')
+        if os.path.exists(parquet_path):
+            if pq is None:
+                raise ImportError(f"{parquet_path} needs pyarrow to be read (pip install pyarrow)")
+            print(f"Loading {table_name} from {parquet_path}...")
+            try:
+                rows = load_parquet(cursor, parquet_path, table_name)
+            except mysql.connector.Error as err:
+                print(f"❌ Error loading {table_name}: {err}")
+                raise err # Re-raise to trigger rollback
+            print(f"Loaded {rows} rows into {table_name}")
+            continue
+
         path = os.path.join(DATA_DIR, csv_file)
         if not os.path.exists(path):
             print(f"Warning: {path} not found.")